@@ -6,6 +6,7 @@ setup(name='webcoverageservice',
       version='0.1.0',
       install_requires=["requests >= 2.3.0",
                         "python-dateutil"],
+      extras_require={"arrays" : ["numpy"]},
       description='Python interface to web coverage services',
       author='Met Office Informatics Lab',
       maintainer='Met Office Informatics Lab',
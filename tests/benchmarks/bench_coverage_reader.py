@@ -0,0 +1,159 @@
+"""
+Time wcs2_reader.CoverageReader.get_coverage on synthetic describeCoverage
+documents (see synthetic.py) describing many coverages, against a copy of
+the getters it had before reading the metadata extension in a single walk,
+which look up the extension again for each of the components, reference
+time and CRSs.
+
+The document is read into elements before timing, so only the reading of
+the coverage descriptions is measured and not the XML parsing.
+
+Usage: python tests/benchmarks/bench_coverage_reader.py [--descriptions
+1000 10000] [--components 1 100]
+
+"""
+import argparse
+import json
+import xml.etree.ElementTree as ET
+from timeit import default_timer
+from webcoverageservice.coverage import Coverage
+from webcoverageservice.readers import wcs2_reader
+from webcoverageservice.readers.xml_reader import get_elements, \
+                                                  get_elements_text, \
+                                                  get_elements_attr
+import synthetic
+
+
+class PreviousCoverageReader(wcs2_reader.CoverageReader):
+    """
+    The getters of CoverageReader as they were before the metadata extension
+    was read in a single walk, kept unchanged as the baseline.
+
+    """
+    def get_components(self):
+        components = []
+        extension_elem = get_elements("metadata/Extension", self.root,
+                                      single_elem=True, namespace=self.gmlcov)
+        member_list_elems = get_elements("extensionProperty/"\
+                                         "MetOceanCoverageMetadata/"\
+                                         "dataMaskReferenceProperty/"\
+                                         "DataMaskReferenceMemberList/"\
+                                         "dataMaskReference",
+                                         extension_elem,
+                                         namespace=self.metocean)
+        for elem in member_list_elems:
+            components.append(get_elements_attr("fieldName", elem))
+        return components
+
+    def get_ref_time(self):
+        extension_elem = get_elements("metadata/Extension", self.root,
+                                      single_elem=True, namespace=self.gmlcov)
+        source_obs_elem = get_elements("extensionProperty/"\
+                                       "MetOceanCoverageMetadata/"\
+                                       "sourceObservationProperty/"\
+                                       "SourceObservation", extension_elem,
+                                       single_elem=True,
+                                       namespace=self.metocean)
+        value_elem = get_elements("parameter/NamedValue/value",
+                                  source_obs_elem, single_elem=True,
+                                  namespace=self.om)
+        return get_elements_text("TimeInstant/timePosition", value_elem,
+                                 single_elem=True, namespace=self.gml)
+
+    def get_crss(self):
+        extension_elem = get_elements("metadata/Extension", self.root,
+                                      single_elem=True, namespace=self.gmlcov)
+        source_obs_elem = get_elements("extensionProperty/"\
+                                       "MetOceanCoverageMetadata/"\
+                                       "sourceObservationProperty/"\
+                                       "SourceObservation", extension_elem,
+                                       single_elem=True,
+                                       namespace=self.metocean)
+        intrst_elem = get_elements("featureOfInterest", source_obs_elem,
+                                   single_elem=True, namespace=self.om)
+        SF_spatial_elem = get_elements("SF_SpatialSamplingFeature",
+                                       intrst_elem, single_elem=True,
+                                       namespace=self.sams)
+        sample_feat_elem = get_elements("sampledFeature", SF_spatial_elem,
+                                        single_elem=True, namespace=self.sam)
+        horzon_proj_elem = get_elements("ModelDescription/geometryComponent/"\
+                                        "ModelDomain/horizontalProjection",
+                                        sample_feat_elem, single_elem=True,
+                                        namespace=self.metocean)
+        poly_elem = get_elements("Polygon", horzon_proj_elem, single_elem=True,
+                                 namespace=self.gml)
+        return get_elements_attr("srsName", poly_elem)
+
+    def get_coverage(self):
+        cov_name   = self.get_coverage_name()
+        components = self.get_components()
+        cov_bbox   = self.get_bbox()
+        cov_ref_time = self.get_ref_time()
+        cov_crss   = self.get_crss()
+        return Coverage(name=cov_name, components=components, bbox=cov_bbox,
+                        CRSs=cov_crss, dim_runs=cov_ref_time)
+
+
+READERS = [("single walk", wcs2_reader.CoverageReader),
+           ("previous", PreviousCoverageReader)]
+
+def read_all(reader_class, desc_elems):
+    for elem in desc_elems:
+        reader_class.from_element(elem).get_coverage()
+
+def measure(reader_class, desc_elems, repeat):
+    """
+    Return the shortest of repeat times taken to read every description.
+
+    """
+    times = []
+    for _ in range(repeat):
+        started = default_timer()
+        read_all(reader_class, desc_elems)
+        times.append(default_timer() - started)
+    return min(times)
+
+def run(n_descriptions, n_components, repeat):
+    document = synthetic.make_describeCoverages(n_descriptions, n_components)
+    root = ET.fromstring(document)
+    desc_elems = get_elements("CoverageDescription", root,
+                              namespace="http://www.opengis.net/wcs/2.0")
+    result = {"descriptions" : n_descriptions,
+              "components" : n_components,
+              "document_bytes" : len(document)}
+    for name, reader_class in READERS:
+        result[name] = measure(reader_class, desc_elems, repeat)
+    result["speedup"] = result["previous"] / result["single walk"]
+    print "%12d %10d %12.4f s %10.4f s %8.2fx" % (
+          n_descriptions, n_components, result["single walk"],
+          result["previous"], result["speedup"])
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--descriptions", type=int, nargs="+",
+                        default=[100, 1000, 10000],
+                        help="coverages described by each document")
+    parser.add_argument("--components", type=int, nargs="+", default=[1, 100],
+                        help="components of each coverage")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="reads of each document, the fastest is kept")
+    parser.add_argument("--output", help="write the results as JSON here")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print "%12s %10s %14s %12s %9s" % ("descriptions", "components",
+                                       "single walk", "previous",
+                                       "speedup")
+    results = [run(n_descriptions, n_components, args.repeat)
+               for n_components in args.components
+               for n_descriptions in args.descriptions]
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({"args" : vars(args), "results" : results}, outfile,
+                      indent=2, sort_keys=True)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Compare the time taken to write getCoverage request XML with the DOM based
+GetCoverageRequestWriter and the GetCoverageRequestTemplateWriter.
+
+Usage: python tests/benchmarks/bench_getCoverage_writer.py [number]
+
+"""
+import sys
+import timeit
+from webcoverageservice.builders import wcs2_builder
+
+def make_builder():
+    builder = wcs2_builder.GetCoverageRequestBuilder()
+    builder.setCoverageId("air_temperature")
+    builder.setComponents("air_temperature", "surface_altitude")
+    builder.setCRS("crs1", "EPSG:4326")
+    builder.setInterpolation("Long", "linear", samplesize=100)
+    builder.setInterpolation("Lat", "linear", samplesize=100)
+    builder.setLatRange(-10, 60)
+    builder.setLongRange(-30, 40)
+    builder.setLevelRange("100", "1000")
+    builder.setTimeRange("2015-01-01T00:00:00Z", "2015-01-02T00:00:00Z")
+    builder.setFormat("NetCDF3")
+    return builder
+
+def bench(writer, number):
+    builder = make_builder()
+    builder.writer = writer
+    return min(timeit.repeat(builder.toXML, number=number, repeat=3)) / number
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    dom_time = bench(wcs2_builder.GetCoverageRequestWriter, number)
+    template_time = bench(wcs2_builder.GetCoverageRequestTemplateWriter,
+                          number)
+    print "GetCoverageRequestWriter:         %8.1f us" % (dom_time * 1e6)
+    print "GetCoverageRequestTemplateWriter: %8.1f us" % (template_time * 1e6)
+    print "Speed up: %.1fx" % (dom_time / template_time)
@@ -0,0 +1,184 @@
+"""
+Time the response readers on synthetic documents of increasing size (see
+synthetic.py), and the memory they use, to find readers whose time grows
+faster than the size of the document.
+
+For each case the scaling exponent is the slope of log(time) against
+log(size): 1 for linear, 2 for quadratic. At small sizes the time is
+mostly fixed costs, so a case is marked as super-linear if the exponent
+between its two largest sizes is above --threshold.
+
+Each measurement is made in a new process, so the memory used (the growth
+of the peak resident set size while the document is first read) is not
+hidden by earlier measurements.
+
+Usage: python tests/benchmarks/bench_readers.py [--scale 0.1] [--output
+results.json]
+
+"""
+import argparse
+import gc
+import json
+import math
+import multiprocessing
+import sys
+from timeit import default_timer
+from webcoverageservice.readers import wcs1_reader, wcs2_reader
+import synthetic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# (name, reader, document generator taking the size, sizes)
+CASES = [
+    ("wcs2 read_getCapabilities_res / coverages",
+     wcs2_reader.read_getCapabilities_res,
+     lambda n: synthetic.make_capabilities("2.0.0", n),
+     [100, 1000, 10000]),
+    ("wcs1 read_getCapabilities_res / coverages",
+     wcs1_reader.read_getCapabilities_res,
+     lambda n: synthetic.make_capabilities("1.0", n),
+     [100, 1000, 10000]),
+    ("wcs2 read_getCoverageCollections_res / collections",
+     wcs2_reader.read_getCoverageCollections_res,
+     lambda n: synthetic.make_capabilities("2.0.0", 10, n_collections=n),
+     [10, 100, 1000, 5000]),
+    ("wcs1 read_describeCoverage_res / values per axis",
+     wcs1_reader.read_describeCoverage_res,
+     lambda n: synthetic.make_describeCoverage("1.0", n_values=n),
+     [1000, 10000, 100000]),
+    ("wcs2 read_describeCoverage_res / components",
+     wcs2_reader.read_describeCoverage_res,
+     lambda n: synthetic.make_describeCoverage("2.0.0", n_components=n),
+     [10, 100, 1000]),
+    ("wcs2 read_describeCoverageCollection_res / coverages",
+     wcs2_reader.read_describeCoverageCollection_res,
+     lambda n: synthetic.make_describeCoverageCollection(n),
+     [100, 1000, 10000]),
+]
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives KB, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def measure(case_index, size, repeat):
+    """
+    Return the document size, the shortest of repeat reading times and the
+    memory growth while it is first read.
+
+    """
+    _, reader, make_document, _ = CASES[case_index]
+    document = make_document(size)
+    gc.collect()
+    before = peak_rss_kb()
+    started = default_timer()
+    reader(document)
+    times = [default_timer() - started]
+    after = peak_rss_kb()
+    for _ in range(repeat - 1):
+        started = default_timer()
+        reader(document)
+        times.append(default_timer() - started)
+    return {"size" : size,
+            "document_bytes" : len(document),
+            "seconds" : min(times),
+            "peak_rss_growth_kb" : None if before is None
+                                   else after - before}
+
+def _measure_child(queue, case_index, size, repeat):
+    try:
+        queue.put(measure(case_index, size, repeat))
+    except Exception as err:
+        queue.put(err)
+
+def measure_in_process(case_index, size, repeat):
+    """
+    Run measure in a new process.
+
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure_child,
+                                      args=(queue, case_index, size, repeat))
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+def scaling_exponent(sizes, seconds):
+    """
+    Return the least squares slope of log(seconds) against log(sizes).
+
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+def run_case(case_index, scale, repeat, threshold):
+    name, _, _, sizes = CASES[case_index]
+    sizes = sorted(set(max(1, int(size * scale)) for size in sizes))
+    measurements = []
+    for size in sizes:
+        result = measure_in_process(case_index, size, repeat)
+        measurements.append(result)
+        print "%-52s %8d %10.1f KB %10.4f s %8s KB" % (
+              name, size, result["document_bytes"] / 1024.0,
+              result["seconds"], result["peak_rss_growth_kb"])
+    seconds = [result["seconds"] for result in measurements]
+    exponent = scaling_exponent(sizes, seconds)
+    last_exponent = scaling_exponent(sizes[-2:], seconds[-2:]) \
+                    if len(sizes) > 1 else None
+    super_linear = last_exponent is not None and last_exponent > threshold
+    print "%-52s scaling exponent %s, largest sizes %s%s\n" % (
+          name, "n/a" if exponent is None else "%.2f" % exponent,
+          "n/a" if last_exponent is None else "%.2f" % last_exponent,
+          "  SUPER-LINEAR" if super_linear else "")
+    return {"measurements" : measurements,
+            "scaling_exponent" : exponent,
+            "largest_sizes_exponent" : last_exponent,
+            "super_linear" : super_linear}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the document sizes by this")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="reads of each document, the fastest is kept")
+    parser.add_argument("--threshold", type=float, default=1.15,
+                        help="scaling exponent above which a case is "\
+                             "super-linear")
+    parser.add_argument("--cases", nargs="+",
+                        help="only run cases whose names contain one of "\
+                             "these")
+    parser.add_argument("--output", help="write the results as JSON here")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print "%-52s %8s %13s %12s %11s" % ("case", "size", "document",
+                                         "time", "memory")
+    results = {}
+    for case_index, (name, _, _, _) in enumerate(CASES):
+        if args.cases and not any(part in name for part in args.cases):
+            continue
+        results[name] = run_case(case_index, args.scale, args.repeat,
+                                 args.threshold)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({"args" : vars(args), "results" : results}, outfile,
+                      indent=2, sort_keys=True)
+    return results
+
+if __name__ == '__main__':
+    main()
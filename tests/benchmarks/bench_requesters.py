@@ -0,0 +1,243 @@
+"""
+End to end benchmarks of the WCS1 and WCS2 requesters against an in-process
+stand-in server (see fake_wcs.py). For each requester operation the
+requests per second, latency percentiles, the stages of the requests (see
+webcoverageservice/timing.py) and memory are measured.
+
+The getCoverages operation sends a batch of concurrency * 4 getCoverage
+requests at once, so its latencies are of whole batches.
+
+Memory is the peak resident set size of the process, which only grows, so
+the growth during an operation is only seen if it needs more memory than
+the operations before it.
+
+Results can be written as JSON and compared with those of another commit:
+
+    python tests/benchmarks/bench_requesters.py --output before.json
+    (change the code)
+    python tests/benchmarks/bench_requesters.py --compare before.json
+
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+from webcoverageservice import WCS1Requester, WCS2Requester
+from webcoverageservice.timing import _percentile as percentile
+from fake_wcs import FakeWCSServer
+import synthetic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+REQUESTERS = {"1.0" : WCS1Requester, "2.0.0" : WCS2Requester}
+
+def peak_rss_kb():
+    """
+    Return the peak resident set size of the process in KB, or None if it
+    is not known on this platform.
+
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives KB, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def summarise(latencies, wall, requests=None):
+    """
+    Return the statistics of a list of latencies (seconds), taking wall
+    seconds in all to make requests requests.
+
+    """
+    ordered = sorted(latencies)
+    requests = len(latencies) if requests is None else requests
+    return {"n"                : len(latencies),
+            "requests_per_sec" : requests / wall,
+            "mean"             : sum(ordered) / len(ordered),
+            "min"              : ordered[0],
+            "p50"              : percentile(ordered, 50),
+            "p95"              : percentile(ordered, 95),
+            "p99"              : percentile(ordered, 99),
+            "max"              : ordered[-1]}
+
+def operations(version, tmp_dir, concurrency):
+    """
+    Return the (name, function) of each operation to benchmark. Each
+    function takes a requester and makes the operation's requests, returning
+    the number of requests made.
+
+    """
+    kwargs = {"coverage_id" : synthetic.coverage_name(version, 0),
+              "format" : "NetCDF3"}
+    if version == "2.0.0":
+        kwargs["components"] = ["data"]
+    savepath = os.path.join(tmp_dir, "coverage.nc")
+
+    def getCapabilities(requester):
+        requester.getCapabilities(show=False)
+        return 1
+
+    def describeCoverage(requester):
+        requester.describeCoverage(kwargs["coverage_id"], show=False)
+        return 1
+
+    def getCoverage(requester):
+        requester.getCoverage(**kwargs).content
+        return 1
+
+    def getCoverage_save(requester):
+        requester.getCoverage(savepath=savepath, **kwargs)
+        return 1
+
+    def getCoverage_decode(requester):
+        requester.getCoverage(decode=True, **kwargs)["data"].data.sum()
+        return 1
+
+    def getCoverages(requester):
+        # Distinct requests, as getCoverages sends identical ones only once.
+        specs = [dict(kwargs, width=100 + i) for i in range(concurrency * 4)]
+        for result in requester.getCoverages(specs, max_workers=concurrency):
+            if isinstance(result, Exception):
+                raise result
+            result.content
+        return len(specs)
+
+    ops = [("getCapabilities", getCapabilities),
+           ("describeCoverage", describeCoverage),
+           ("getCoverage", getCoverage),
+           ("getCoverage_save", getCoverage_save)]
+    if numpy is not None:
+        ops.append(("getCoverage_decode", getCoverage_decode))
+    ops.append(("getCoverages", getCoverages))
+    return ops
+
+def run_operation(requester, stats, func, number):
+    """
+    Time number calls of func after one to warm up.
+
+    """
+    func(requester)
+    stats.reset()
+    before = peak_rss_kb()
+    latencies = []
+    requests = 0
+    start = default_timer()
+    for _ in range(number):
+        started = default_timer()
+        requests += func(requester)
+        latencies.append(default_timer() - started)
+    result = summarise(latencies, default_timer() - start, requests)
+    after = peak_rss_kb()
+    result["peak_rss_kb"] = after
+    result["peak_rss_growth_kb"] = None if after is None else after - before
+    result["stages"] = dict((operation, dict((stage, values["p50"])
+                                             for stage, values
+                                             in summary.items()
+                                             if isinstance(values, dict)))
+                            for operation, summary
+                            in stats.summary().items())
+    return result
+
+def run_version(version, args):
+    server = FakeWCSServer(version, n_coverages=args.coverages,
+                           payload_bytes=args.payload_bytes,
+                           latency=args.latency).start()
+    tmp_dir = tempfile.mkdtemp()
+    requester = REQUESTERS[version](server.url,
+                                    pool_maxsize=max(args.concurrency, 10))
+    stats = requester.collect_timings()
+    results = {}
+    try:
+        for name, func in operations(version, tmp_dir, args.concurrency):
+            number = args.number
+            if name == "getCoverages":
+                number = max(1, number // (args.concurrency * 4))
+            results[name] = run_operation(requester, stats, func, number)
+            print_result(version, name, results[name])
+    finally:
+        requester.close()
+        server.stop()
+        shutil.rmtree(tmp_dir)
+    return results
+
+def print_result(version, name, result):
+    print "%-6s %-20s %9.1f req/s  p50 %8.2f ms  p95 %8.2f ms  " \
+          "p99 %8.2f ms" % (version, name, result["requests_per_sec"],
+                            result["p50"] * 1e3, result["p95"] * 1e3,
+                            result["p99"] * 1e3)
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(old, new):
+    """
+    Print the change in requests per second and median latency of each
+    operation between two sets of results.
+
+    """
+    print "\nCompared with %s:" % (old["meta"].get("commit") or "old results")
+    for version, ops in sorted(new["results"].items()):
+        for name, result in sorted(ops.items()):
+            old_result = old["results"].get(version, {}).get(name)
+            if old_result is None:
+                continue
+            print "%-6s %-20s req/s %+6.1f%%  p50 %+6.1f%%" % (
+                  version, name,
+                  100.0 * (result["requests_per_sec"] /
+                           old_result["requests_per_sec"] - 1),
+                  100.0 * (result["p50"] / old_result["p50"] - 1))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--versions", nargs="+", default=["1.0", "2.0.0"],
+                        choices=sorted(REQUESTERS))
+    parser.add_argument("--coverages", type=int, default=1000,
+                        help="coverages listed by getCapabilities")
+    parser.add_argument("--payload-bytes", type=int, default=1048576,
+                        help="size of each getCoverage response")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds the server waits before responding")
+    parser.add_argument("--number", type=int, default=50,
+                        help="requests made for each operation")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="max_workers for getCoverages")
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--compare", help="JSON results to compare with")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {"meta" : {"commit" : git_commit(),
+                         "python" : platform.python_version(),
+                         "platform" : platform.platform(),
+                         "args" : vars(args)},
+               "results" : {}}
+    for version in args.versions:
+        results["results"][version] = run_version(version, args)
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(results, outfile, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, "r") as infile:
+            compare(json.load(infile), results)
+    return results
+
+if __name__ == '__main__':
+    main()
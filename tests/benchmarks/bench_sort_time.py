@@ -0,0 +1,38 @@
+"""
+Compare param_checks.sort_time with parsing every time with dateutil, for a
+run of distinct ISO times (as taken from Coverage.times) and for repeats of
+them, which sort_time remembers.
+
+Usage: python tests/benchmarks/bench_sort_time.py [number]
+
+"""
+import sys
+import timeit
+import dateutil.parser
+from webcoverageservice.builders import param_checks
+
+def make_times(number):
+    return ["2015-%02d-%02dT%02d:00:00Z" % (month, day, hour)
+            for month in range(1, 13) for day in range(1, 29)
+            for hour in range(0, 24, 6)][:number]
+
+def dateutil_sort(times):
+    for time in times:
+        dateutil.parser.parse(time, ignoretz=True).isoformat() + "Z"
+
+def sort_times(times):
+    for time in times:
+        param_checks.sort_time(time)
+
+if __name__ == '__main__':
+    times = make_times(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
+    dateutil_time = min(timeit.repeat(lambda: dateutil_sort(times),
+                                      number=1, repeat=3))
+    param_checks._sorted_times.clear()
+    iso_time = timeit.timeit(lambda: sort_times(times), number=1)
+    memo_time = min(timeit.repeat(lambda: sort_times(times), number=1,
+                                  repeat=3))
+    print "sort_time on %d times:" % len(times)
+    print "dateutil:      %8.1f ms" % (dateutil_time * 1e3)
+    print "ISO fast path: %8.1f ms" % (iso_time * 1e3)
+    print "Memoised:      %8.1f ms" % (memo_time * 1e3)
@@ -0,0 +1,121 @@
+"""
+An in-process stand-in WCS1 or WCS2 server for benchmarks, serving synthetic
+documents (see synthetic.py) after a configurable delay.
+
+"""
+import BaseHTTPServer
+import SocketServer
+import threading
+import time
+import urlparse
+import synthetic
+
+class FakeWCSHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Answer WCS requests with the documents of the server (a FakeWCSServer).
+    WCS1 requests are all GET requests, named by their REQUEST parameter.
+    WCS2 getCapabilities requests are GET and describeCoverage and
+    getCoverage requests are POST, named by the root element posted.
+
+    """
+    protocol_version = "HTTP/1.1"
+    # The headers and body are written separately, so without this each
+    # keep-alive response waits for Nagle's algorithm and delayed ACKs
+    # (about 40 ms), which would swamp the requesters' own times.
+    disable_nagle_algorithm = True
+
+    def _respond(self, operation):
+        body, content_type = self.server.documents[operation]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        query = urlparse.parse_qs(urlparse.urlparse(self.path).query)
+        request = query.get("REQUEST", ["GetCapabilities"])[0].lower()
+        operation = {"getcapabilities" : "getCapabilities",
+                     "describecoverage" : "describeCoverage",
+                     "getcoverage" : "getCoverage"}.get(request)
+        if operation is None:
+            self.send_error(400)
+        else:
+            self._respond(operation)
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers["Content-Length"]))
+        if "DescribeCoverage" in payload[:1000]:
+            self._respond("describeCoverage")
+        elif "GetCoverage" in payload[:1000]:
+            self._respond("getCoverage")
+        else:
+            self.send_error(400)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeWCSServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Serve FakeWCSHandler on a free local port, each request in its own
+    thread.
+
+    Args:
+
+    * version: string
+        "1.0" or "2.0.0"
+
+    Kwargs:
+
+    * n_coverages: integer
+        The number of coverages listed by getCapabilities.
+
+    * payload_bytes: integer
+        The size of the NetCDF getCoverage response.
+
+    * latency: float
+        Seconds to wait before each response, standing in for the server's
+        work and the network.
+
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, version, n_coverages=100, payload_bytes=1048576,
+                 latency=0.0):
+        BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", 0),
+                                           FakeWCSHandler)
+        self.version = version
+        self.latency = latency
+        self.documents = {
+            "getCapabilities" : (synthetic.make_capabilities(version,
+                                                             n_coverages),
+                                 "text/xml"),
+            "describeCoverage" : (synthetic.make_describeCoverage(version),
+                                  "text/xml"),
+            "getCoverage" : (synthetic.make_netcdf_payload(payload_bytes),
+                             "application/x-netcdf")}
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%s/wcs" % self.server_port
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,270 @@
+"""
+Make synthetic WCS responses of any size for benchmarks, by scaling up the
+example documents in tests/unit/wcs1_xml_examples and wcs2_xml_examples.
+
+"""
+import datetime
+import os
+import re
+import struct
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, "unit")
+
+# The element repeated for each coverage in a getCapabilities document and
+# the element naming the coverage within it.
+CAPABILITIES_ENTRIES = {"1.0" : ("CoverageOffering", "name"),
+                        "2.0.0" : ("wcs:CoverageSummary", "wcs:CoverageId")}
+
+def example_path(version, name):
+    folder = "wcs1_xml_examples" if version == "1.0" else "wcs2_xml_examples"
+    return os.path.join(EXAMPLES_DIR, folder, name)
+
+def read_example(version, name):
+    with open(example_path(version, name), "r") as infile:
+        return infile.read()
+
+def _element_pattern(tag):
+    return re.compile(r"[ \t]*<%s[ >].*?</%s>\s*" % (tag, tag), re.S)
+
+def repeat_element(xml_str, tag, count, rename=None):
+    """
+    Replace the tag elements of xml_str with count copies of the first one.
+
+    Args:
+
+    * xml_str: string
+
+    * tag: string
+        e.g. "wcs:CoverageSummary".
+
+    * count: integer
+
+    Kwargs:
+
+    * rename: callable or None
+        Called with the element text and the copy's index, returns the text
+        of the copy (e.g. with a unique name).
+
+    returns:
+        string
+
+    """
+    pattern = _element_pattern(tag)
+    matches = list(pattern.finditer(xml_str))
+    if not matches:
+        raise ValueError("No %s element to repeat." % tag)
+    element = matches[0].group(0)
+    copies = [rename(element, i) if rename else element
+              for i in range(count)]
+    start, end = matches[0].start(), matches[-1].end()
+    # Anything between the first and last elements (other than the
+    # elements themselves) is kept after the copies.
+    between = pattern.sub("", xml_str[start:end])
+    return xml_str[:start] + "".join(copies) + between + xml_str[end:]
+
+def rename_child(tag):
+    """
+    Return a rename function (see repeat_element) which adds the copy's
+    index to the text of the first tag child.
+
+    """
+    pattern = re.compile(r"(<%s>)([^<]*)(</%s>)" % (tag, tag))
+    def rename(element, index):
+        return pattern.sub(lambda match: "%s%s_%d%s" % (match.group(1),
+                                                         match.group(2),
+                                                         index,
+                                                         match.group(3)),
+                           element, count=1)
+    return rename
+
+def coverage_name(version, index):
+    """
+    The name given to the index-th coverage by make_capabilities.
+
+    """
+    entry, name_tag = CAPABILITIES_ENTRIES[version]
+    element = _element_pattern(entry).search(
+                  read_example(version, "getCapabilities.xml")).group(0)
+    name = re.search(r"<%s>([^<]*)</%s>" % (name_tag, name_tag),
+                     element).group(1)
+    return "%s_%d" % (name, index)
+
+def make_capabilities(version, n_coverages, n_collections=None):
+    """
+    Return a getCapabilities document listing n_coverages coverages.
+
+    Args:
+
+    * version: string
+        "1.0" or "2.0.0"
+
+    * n_coverages: integer
+
+    Kwargs:
+
+    * n_collections: integer or None
+        WCS2 only, the number of CoverageCollectionSummary elements. Default
+        is those of the example.
+
+    returns:
+        string
+
+    """
+    entry, name_tag = CAPABILITIES_ENTRIES[version]
+    xml_str = repeat_element(read_example(version, "getCapabilities.xml"),
+                             entry, n_coverages, rename_child(name_tag))
+    if n_collections is not None:
+        if version != "2.0.0":
+            raise ValueError("Only WCS2 has coverage collections.")
+        xml_str = repeat_element(xml_str, "metocean:CoverageCollectionSummary",
+                                 n_collections,
+                                 rename_child("metocean:coverageCollectionId"))
+    return xml_str
+
+def axis_values(first, count):
+    """
+    Return count values for an axis whose first value is first: hourly
+    times, PT<n>H forecast periods or numbered copies of other values.
+
+    """
+    try:
+        start = datetime.datetime.strptime(first, "%Y-%m-%dT%H:%M:%SZ")
+    except ValueError:
+        start = None
+    if start is not None:
+        hour = datetime.timedelta(hours=1)
+        return [(start + i * hour).strftime("%Y-%m-%dT%H:%M:%SZ")
+                for i in range(count)]
+    if first.startswith("PT"):
+        return ["PT%dH" % i for i in range(count)]
+    return [first] + ["%s_%d" % (first, i) for i in range(1, count)]
+
+def _scale_axis_values(xml_str, count):
+    """
+    Give every AxisDescription of a WCS1 document count values.
+
+    """
+    value_pattern = re.compile(r"([ \t]*)<singleValue>([^<]*)</singleValue>")
+    def scale(match):
+        axis = match.group(0)
+        values = value_pattern.findall(axis)
+        indent, first = values[0]
+        lines = "\n".join("%s<singleValue>%s</singleValue>" % (indent, value)
+                          for value in axis_values(first, count))
+        start = value_pattern.search(axis).start()
+        end = list(value_pattern.finditer(axis))[-1].end()
+        return axis[:start] + lines + axis[end:]
+    return re.sub(r"<AxisDescription>.*?</AxisDescription>", scale, xml_str,
+                  flags=re.S)
+
+def make_describeCoverage(version, n_values=None, n_components=None):
+    """
+    Return a describeCoverage document.
+
+    Args:
+
+    * version: string
+        "1.0" or "2.0.0"
+
+    Kwargs:
+
+    * n_values: integer or None
+        WCS1 only, the number of values of every AxisDescription (e.g. of
+        TIME). Default is those of the example.
+
+    * n_components: integer or None
+        WCS2 only, the number of components (dataMaskReference elements).
+        Default is those of the example.
+
+    returns:
+        string
+
+    """
+    xml_str = read_example(version, "describeCoverage.xml")
+    if n_values is not None:
+        if version != "1.0":
+            raise ValueError("Only WCS1 describes axis values.")
+        xml_str = _scale_axis_values(xml_str, n_values)
+    if n_components is not None:
+        if version != "2.0.0":
+            raise ValueError("Only WCS2 describes components.")
+        field = re.compile(r'fieldName="([^"]*)"')
+        xml_str = repeat_element(xml_str, "metocean:dataMaskReference",
+                                 n_components,
+                                 lambda element, i: field.sub(
+                                     r'fieldName="\1_%d"' % i, element))
+    return xml_str
+
+def make_describeCoverages(n_descriptions, n_components=None):
+    """
+    Return a WCS2 describeCoverage document describing n_descriptions
+    coverages, in the form read by wcs2_reader.read_describeCoverages_res.
+
+    Kwargs:
+
+    * n_components: integer or None
+        The number of components of each coverage. Default is those of the
+        example.
+
+    """
+    xml_str = make_describeCoverage("2.0.0", n_components=n_components)
+    return repeat_element(xml_str, "wcs:CoverageDescription", n_descriptions,
+                          rename_child("wcs:CoverageId"))
+
+def make_describeCoverageCollection(n_coverages, n_ref_times=1,
+                                    collection_id="UKPPBEST"):
+    """
+    Return a WCS2 describeCoverageCollection document for a collection of
+    n_coverages coverages, in the form read by wcs2_reader.CollectionReader.
+
+    """
+    ref_times = axis_values("2014-05-16T00:00:00Z", n_ref_times)
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<metocean:CoverageCollectionDescriptions '\
+             'xmlns:metocean="http://def.wmo.int/metce/2013/metocean" '\
+             'xmlns:wcs="http://www.opengis.net/wcs/2.0" '\
+             'xmlns:gml="http://www.opengis.net/gml/3.2">',
+             '  <metocean:CoverageCollectionDescription>',
+             '    <metocean:coverageCollectionId>%s'\
+             '</metocean:coverageCollectionId>' % collection_id,
+             '    <gml:boundedBy>',
+             '      <gml:Envelope srsName="CRS:84" axisLabels="Long Lat">',
+             '        <gml:lowerCorner>-14 47.5</gml:lowerCorner>',
+             '        <gml:upperCorner>7 61</gml:upperCorner>',
+             '      </gml:Envelope>',
+             '    </gml:boundedBy>',
+             '    <metocean:referenceTime>']
+    lines += ['      <gml:TimeInstant><gml:timePosition>%s</gml:timePosition>'\
+              '</gml:TimeInstant>' % ref_time for ref_time in ref_times]
+    lines += ['    </metocean:referenceTime>',
+              '    <metocean:coverageIdList>']
+    lines += ['      <wcs:CoverageSummary><wcs:CoverageId>%s_%d'\
+              '</wcs:CoverageId></wcs:CoverageSummary>' % (collection_id, i)
+              for i in range(n_coverages)]
+    lines += ['    </metocean:coverageIdList>',
+              '  </metocean:CoverageCollectionDescription>',
+              '</metocean:CoverageCollectionDescriptions>', '']
+    return "\n".join(lines)
+
+def make_netcdf_payload(size):
+    """
+    Return a NetCDF3 classic file of about size bytes, holding a square grid
+    of float32 values called "data".
+
+    """
+    side = max(1, int((size / 4.0) ** 0.5))
+    def name(text):
+        return struct.pack(">i", len(text)) + text + "\x00" * (-len(text) % 4)
+    header = "CDF\x01" + struct.pack(">iii", 0, 10, 2) + \
+             name("y") + struct.pack(">i", side) + \
+             name("x") + struct.pack(">i", side) + \
+             struct.pack(">ii", 0, 0) + struct.pack(">ii", 11, 1) + \
+             name("data") + struct.pack(">iii", 2, 0, 1) + \
+             struct.pack(">ii", 0, 0)
+    vsize = side * side * 4
+    # The remaining fields are the type, vsize and begin.
+    header += struct.pack(">ii", 5, vsize)
+    header += struct.pack(">i", len(header) + 4)
+    row = struct.pack(">%df" % side, *[float(i) for i in range(side)])
+    return header + row * side
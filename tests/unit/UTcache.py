@@ -0,0 +1,219 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+from webcoverageservice.cache import make_request_key, ResponseCache, \
+                                     MetadataCache
+from webcoverageservice.senders.sender import send_cached_request
+from webcoverageservice.builders import wcs1_builder, wcs2_builder
+
+# Create dummy response class.
+class Response(object):
+    def __init__(self, body, status_code=200, content_type="application/x-netcdf"):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {"content-type" : content_type}
+        self.url = "test_url"
+        self.retries = 0
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+# Create dummy requester class.
+class Requester(object):
+    def __init__(self, response_cache):
+        self.url = "test_url"
+        self.response_cache = response_cache
+
+
+class Test_make_request_key(unittest.TestCase):
+    def test_param_order(self):
+        key1 = make_request_key("url", {"COVERAGE" : "a", "WIDTH" : 10})
+        key2 = make_request_key("url", {"WIDTH" : 10, "COVERAGE" : "a"})
+        self.assertEqual(key1, key2)
+
+    def test_api_key_ignored(self):
+        key1 = make_request_key("url", {"COVERAGE" : "a", "key" : "secret"})
+        key2 = make_request_key("url", {"COVERAGE" : "a"})
+        self.assertEqual(key1, key2)
+
+    def test_different_requests(self):
+        self.assertNotEqual(make_request_key("url", "<xml>a</xml>"),
+                            make_request_key("url", "<xml>b</xml>"))
+        self.assertNotEqual(make_request_key("url1", "<xml>a</xml>"),
+                            make_request_key("url2", "<xml>a</xml>"))
+
+    def test_equivalent_requests(self):
+        req1 = wcs2_builder.make_getCoverage_request(
+            "cov", ["b", "a"], bbox=["-10", "50", "2", "60"],
+            time="1/2/2015")
+        req2 = wcs2_builder.make_getCoverage_request(
+            "cov", ["a", "b"], bbox=(-10, 50.0, 2, 60),
+            time="2015-01-02T00:00:00Z")
+        self.assertEqual(make_request_key("url", req1),
+                         make_request_key("url", req2))
+        req3 = wcs1_builder.make_getCoverage_request(
+            "cov", dim_forecast="pt3h", bbox=[-10, 50, 2, 60])
+        req4 = wcs1_builder.make_getCoverage_request(
+            "cov", dim_forecast="PT3H", bbox=("-10", "50", "2", "60"))
+        self.assertEqual(make_request_key("url", req3),
+                         make_request_key("url", req4))
+        self.assertNotEqual(make_request_key("url", req1),
+                            make_request_key("url", req3))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    # Each test gets an empty cache in its own temporary directory.
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ResponseCache(os.path.join(self.tmpdir, "cache"),
+                                   max_bytes=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+class Test_ResponseCache(ResponseCacheTestCase):
+    def test_put_get(self):
+        stored = self.cache.put("getCoverage", "k1", Response("abcdef"))
+        self.assertEqual(stored.content, "abcdef")
+        cached = self.cache.get("getCoverage", "k1")
+        self.assertEqual("".join(cached.iter_content(4)), "abcdef")
+        self.assertEqual(cached.headers["Content-Type"],
+                         "application/x-netcdf")
+        self.assertEqual(self.cache.get("getCoverage", "k2"), None)
+
+    def test_expired(self):
+        self.cache.ttls["getCoverage"] = 0
+        self.cache.put("getCoverage", "k1", Response("abcdef"))
+        time.sleep(0.01)
+        self.assertEqual(self.cache.get("getCoverage", "k1"), None)
+
+    def test_lru_eviction(self):
+        self.cache.put("getCoverage", "k1", Response("abcd"))
+        self.cache.put("getCoverage", "k2", Response("efgh"))
+        # Make both entries old, then use k1 so k2 is the least recently
+        # used.
+        past = time.time() - 100
+        for name in ["k1.json", "k2.json"]:
+            os.utime(os.path.join(self.cache.directory, name), (past, past))
+        self.cache.get("getCoverage", "k1")
+        self.cache.put("getCoverage", "k3", Response("ijkl"))
+        self.assertNotEqual(self.cache.get("getCoverage", "k1"), None)
+        self.assertEqual(self.cache.get("getCoverage", "k2"), None)
+        self.assertNotEqual(self.cache.get("getCoverage", "k3"), None)
+        self.assertEqual(sorted(os.listdir(self.cache.directory)),
+                         ["k1.body", "k1.json", "k3.body", "k3.json"])
+
+    def test_orphaned_tmp_removed(self):
+        # Only temporary files too old to still be being written go.
+        past = time.time() - 7200
+        for name in ["old.tmp", "new.tmp"]:
+            open(os.path.join(self.cache.directory, name), "w").close()
+        os.utime(os.path.join(self.cache.directory, "old.tmp"), (past, past))
+        self.cache.evict()
+        self.assertEqual(os.listdir(self.cache.directory), ["new.tmp"])
+        os.utime(os.path.join(self.cache.directory, "new.tmp"), (past, past))
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+
+class Test_send_cached_request(ResponseCacheTestCase):
+    def setUp(self):
+        super(Test_send_cached_request, self).setUp()
+        self.requester = Requester(self.cache)
+        self.sent = []
+
+    def send(self, response):
+        def send_func():
+            self.sent.append(response)
+            return response
+        return send_func
+
+    def test_hit(self):
+        request = {"COVERAGE" : "a"}
+        send_cached_request(self.requester, "getCoverage", request,
+                            self.send(Response("abc")))
+        response = send_cached_request(self.requester, "getCoverage",
+                                       request, self.send(Response("xyz")))
+        self.assertEqual(len(self.sent), 1)
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.content, "abc")
+
+    def test_equivalent_request_hit(self):
+        send_cached_request(self.requester, "getCoverage",
+                            wcs2_builder.make_getCoverage_request(
+                                "cov", ["b", "a"], bbox=["1", "2", "3", "4"]),
+                            self.send(Response("abc")))
+        response = send_cached_request(self.requester, "getCoverage",
+                            wcs2_builder.make_getCoverage_request(
+                                "cov", ["a", "b"], bbox=(1, 2, 3, 4)),
+                            self.send(Response("xyz")))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(response.content, "abc")
+
+    def test_errors_not_cached(self):
+        request = {"COVERAGE" : "a"}
+        for response in [Response("", status_code=500),
+                         Response("<xml/>", content_type="text/xml")]:
+            send_cached_request(self.requester, "getCoverage", request,
+                                self.send(response))
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_operation_not_cached(self):
+        for i in range(2):
+            send_cached_request(self.requester, "describeCoverage", "<xml/>",
+                                self.send(Response("abc")))
+        self.assertEqual(len(self.sent), 2)
+
+
+class Test_MetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = MetadataCache(ttls={"describeCoverage" : 10,
+                                         "getCapabilities"  : 100},
+                                   max_entries=2, clock=lambda: self.now)
+
+    def test_hit_miss(self):
+        self.assertEqual(self.cache.get("describeCoverage", "a"), None)
+        self.cache.put("describeCoverage", "a", "coverage_a")
+        self.assertEqual(self.cache.get("describeCoverage", "a"),
+                         "coverage_a")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_ttl(self):
+        self.cache.put("describeCoverage", "a", "coverage_a")
+        self.cache.put("getCapabilities", None, "coverages")
+        self.now = 50
+        self.assertEqual(self.cache.get("describeCoverage", "a"), None)
+        self.assertEqual(self.cache.get("getCapabilities", None),
+                         "coverages")
+
+    def test_operation_not_cached(self):
+        self.cache.put("describeCoverageCollection", "a", "collection")
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru(self):
+        self.cache.put("describeCoverage", "a", "coverage_a")
+        self.cache.put("describeCoverage", "b", "coverage_b")
+        self.cache.get("describeCoverage", "a")
+        self.cache.put("describeCoverage", "c", "coverage_c")
+        self.assertEqual(self.cache.get("describeCoverage", "b"), None)
+        self.assertEqual(self.cache.get("describeCoverage", "a"),
+                         "coverage_a")
+
+    def test_invalidate(self):
+        self.cache.put("describeCoverage", "a", "coverage_a")
+        self.cache.put("getCapabilities", None, "coverages")
+        self.cache.invalidate("describeCoverage", "b")
+        self.assertEqual(len(self.cache), 2)
+        self.cache.invalidate("describeCoverage")
+        self.assertEqual(len(self.cache), 1)
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
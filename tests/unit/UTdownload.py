@@ -0,0 +1,147 @@
+import unittest
+import os
+import shutil
+import tempfile
+from requests.structures import CaseInsensitiveDict
+from webcoverageservice import download
+
+# Create dummy streamed response class.
+class StreamedResponse(object):
+    def __init__(self, chunks, status_code=200, headers=None,
+                 fail_after=None):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.fail_after = fail_after
+
+    def iter_content(self, chunk_size=1):
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise IOError("Connection dropped")
+            yield chunk
+
+
+class Test_download(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.savepath = os.path.join(self.tmpdir, "coverage.nc")
+        self.headers = {"Accept-Ranges" : "bytes",
+                        "ETag" : '"abc"',
+                        "Content-Length" : "6"}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_saved(self):
+        with open(self.savepath, "rb") as infile:
+            return infile.read()
+
+    def failed_download(self):
+        # Leave a partial download containing the first 4 bytes.
+        response = StreamedResponse(["ab", "cd", "ef"], headers=self.headers,
+                                    fail_after=2)
+        self.assertRaises(IOError, download.save_response, response,
+                          self.savepath, 2, resume=True)
+
+
+class Test_save_response(Test_download):
+    def test_chunks_written(self):
+        chunks = ["\x00\x01", "\x02" * 10, "\n\r"]
+        download.save_response(StreamedResponse(chunks), self.savepath, 2)
+        self.assertEqual(self.read_saved(), "".join(chunks))
+        self.assertEqual(os.listdir(self.tmpdir), ["coverage.nc"])
+
+    def test_failed_download(self):
+        # A partial download must not appear under the final name.
+        response = StreamedResponse(["a", "b", "c"], fail_after=2)
+        self.assertRaises(IOError, download.save_response, response,
+                          self.savepath, 1)
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_failed_resumable_download(self):
+        self.failed_download()
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ["coverage.nc.part", "coverage.nc.part.json"])
+
+    def test_resumed_download(self):
+        self.failed_download()
+        headers = {"Content-Range" : "bytes 4-5/6", "ETag" : '"abc"'}
+        response = StreamedResponse(["ef"], status_code=206, headers=headers)
+        self.assertTrue(download.check_resumed_response(response,
+                                                        self.savepath))
+        download.save_response(response, self.savepath, 2, resume=True)
+        self.assertEqual(self.read_saved(), "abcdef")
+        self.assertEqual(os.listdir(self.tmpdir), ["coverage.nc"])
+
+
+class Test_replace_file(Test_download):
+    def test_replace(self):
+        src = os.path.join(self.tmpdir, "new")
+        for path, text in [(src, "new"), (self.savepath, "old")]:
+            with open(path, "w") as outfile:
+                outfile.write(text)
+        download.replace_file(src, self.savepath)
+        self.assertEqual(self.read_saved(), "new")
+        self.assertEqual(os.listdir(self.tmpdir), ["coverage.nc"])
+
+    def test_missing_src(self):
+        self.assertRaises(OSError, download.replace_file,
+                          os.path.join(self.tmpdir, "new"), self.savepath)
+
+
+class Test_resume_headers(Test_download):
+    def test_no_partial(self):
+        self.assertEqual(download.resume_headers(self.savepath), None)
+
+    def test_partial(self):
+        self.failed_download()
+        self.assertEqual(download.resume_headers(self.savepath),
+                         {"Range" : "bytes=4-", "If-Range" : '"abc"'})
+
+    def test_ranges_not_accepted(self):
+        del self.headers["Accept-Ranges"]
+        self.failed_download()
+        self.assertEqual(download.resume_headers(self.savepath), None)
+
+
+class Test_check_resumed_response(Test_download):
+    def setUp(self):
+        super(Test_check_resumed_response, self).setUp()
+        self.failed_download()
+
+    def check(self, status_code, headers):
+        response = StreamedResponse([], status_code=status_code,
+                                    headers=headers)
+        return download.check_resumed_response(response, self.savepath)
+
+    def test_full_response(self):
+        # The server ignored the range, which is fine.
+        self.assertTrue(self.check(200, {}))
+
+    def test_wrong_start(self):
+        self.assertFalse(self.check(206, {"Content-Range" : "bytes 2-5/6"}))
+
+    def test_changed_length(self):
+        self.assertFalse(self.check(206, {"Content-Range" : "bytes 4-7/8"}))
+
+    def test_changed_etag(self):
+        self.assertFalse(self.check(206, {"Content-Range" : "bytes 4-5/6",
+                                          "ETag" : '"xyz"'}))
+
+    def test_changed_last_modified(self):
+        self.headers["Last-Modified"] = "Mon, 02 Jan 2017 00:00:00 GMT"
+        self.failed_download()
+        headers = {"Content-Range" : "bytes 4-5/6",
+                   "Last-Modified" : "Tue, 03 Jan 2017 00:00:00 GMT"}
+        self.assertFalse(self.check(206, headers))
+
+    def test_range_not_satisfiable(self):
+        self.assertFalse(self.check(416, {}))
+
+    def test_server_error(self):
+        # The request failed, which says nothing about the partial download.
+        self.assertTrue(self.check(503, {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
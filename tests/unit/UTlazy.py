@@ -0,0 +1,91 @@
+import unittest
+from collections import OrderedDict
+import numpy
+from webcoverageservice import lazy, netcdf
+from webcoverageservice.coverage import Coverage
+
+class FakeRequester(object):
+    """
+    Answers getCoverage requests with cuts of full, a (time, y, x) array on
+    a grid of 1 degree cells from (0, 0), with latitudes running north to
+    south.
+
+    """
+    def __init__(self, full, times):
+        self.full = full
+        self.times = times
+        self.requests = []
+
+    def getCoverage(self, coverage_id, bbox, width, height, decode,
+                    dim_forecast, **kwargs):
+        self.requests.append((bbox, dim_forecast))
+        x0, y0 = int(bbox[0]), int(bbox[1])
+        t = self.times.index(dim_forecast)
+        data = self.full[t, y0:y0 + height, x0:x0 + width][::-1]
+        lats = (numpy.arange(y0, y0 + height) + 0.5)[::-1]
+        variables = OrderedDict([
+            ("lat", netcdf.Variable("lat", ("lat",), {}, lats)),
+            ("temp", netcdf.Variable("temp", ("lat", "lon"), {}, data))])
+        return netcdf.Dataset(OrderedDict([("lat", height), ("lon", width)]),
+                              variables, {})
+
+
+class Test_LazyCoverageArray(unittest.TestCase):
+    def setUp(self):
+        self.times = ["PT0H", "PT1H", "PT2H"]
+        self.full = numpy.arange(3 * 10 * 12, dtype="f4").reshape(3, 10, 12)
+        self.requester = FakeRequester(self.full, self.times)
+        coverage = Coverage("cov", bbox=[0, 0, 12, 10],
+                            dim_forecasts=self.times)
+        self.array = lazy.LazyCoverageArray(self.requester, coverage, "temp",
+                                            (10, 12), chunks=(1, 4, 5),
+                                            max_chunks=8, format="NetCDF3")
+
+    def test_shape(self):
+        self.assertEqual(self.array.shape, (3, 10, 12))
+        self.assertEqual(len(self.array), 3)
+        numpy.testing.assert_array_equal(self.array.y_points,
+                                         numpy.arange(10) + 0.5)
+
+    def test_slices(self):
+        numpy.testing.assert_array_equal(self.array[1, 2:7, 3:11],
+                                         self.full[1, 2:7, 3:11])
+        numpy.testing.assert_array_equal(self.array[:, ::3, -1],
+                                         self.full[:, ::3, -1])
+        numpy.testing.assert_array_equal(self.array[:], self.full)
+        numpy.testing.assert_array_equal(self.array[0], self.full[0])
+
+    def test_only_touched_chunks_requested(self):
+        self.array[0, 0:4, 0:5]
+        self.assertEqual(self.requester.requests,
+                         [([0.0, 0.0, 5.0, 4.0], "PT0H")])
+        self.array[0, 1:3, 6:7]
+        self.assertEqual(len(self.requester.requests), 2)
+
+    def test_cached(self):
+        self.array[2, :, :]
+        requests = len(self.requester.requests)
+        self.assertEqual(requests, 9)
+        numpy.testing.assert_array_equal(self.array[2, 5:, :6],
+                                         self.full[2, 5:, :6])
+        self.assertEqual(len(self.requester.requests), requests)
+        self.assertTrue(self.array.cache.hits > 0)
+
+    def test_cache_bounded(self):
+        self.array[:, :, :]
+        self.assertEqual(len(self.array.cache), 8)
+
+    def test_bad_index(self):
+        self.assertRaises(IndexError, self.array.__getitem__, (3, 0, 0))
+        self.assertRaises(IndexError, self.array.__getitem__, (0, 0, 0, 0))
+
+    def test_dim_forecast_chunks(self):
+        coverage = Coverage("cov", bbox=[0, 0, 12, 10],
+                            dim_forecasts=self.times)
+        self.assertRaises(UserWarning, lazy.LazyCoverageArray,
+                          self.requester, coverage, "temp", (10, 12),
+                          chunks=(2, 4, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
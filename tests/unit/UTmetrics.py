@@ -0,0 +1,114 @@
+import unittest
+from webcoverageservice.metrics import Counter, Gauge, Histogram, \
+                                       MetricsRegistry, ClientMetrics, \
+                                       _format_value
+from webcoverageservice.timing import Timings
+
+class Test__format_value(unittest.TestCase):
+    def test_values(self):
+        self.assertEqual(_format_value(3), "3")
+        self.assertEqual(_format_value(0.5), "0.5")
+        self.assertEqual(_format_value(float("inf")), "+Inf")
+        self.assertEqual(_format_value(float("nan")), "NaN")
+
+
+class Test_Counter(unittest.TestCase):
+    def test_render(self):
+        counter = Counter("requests_total", "Requests.", ["op"])
+        counter.inc(op="a")
+        counter.inc(2, op='say "hi"\n')
+        self.assertEqual(counter.value(op="a"), 1)
+        self.assertEqual(counter.render(),
+                         ["# HELP requests_total Requests.",
+                          "# TYPE requests_total counter",
+                          'requests_total{op="a"} 1',
+                          'requests_total{op="say \\"hi\\"\\n"} 2'])
+
+    def test_bad_labels(self):
+        counter = Counter("requests_total", "Requests.", ["op"])
+        self.assertRaises(ValueError, counter.inc, status=200)
+        self.assertRaises(ValueError, counter.inc, -1, op="a")
+
+
+class Test_Gauge(unittest.TestCase):
+    def test_inc_dec(self):
+        gauge = Gauge("in_flight", "In flight.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(gauge.render()[-1], "in_flight 1")
+        gauge.set(5)
+        self.assertEqual(gauge.value(), 5)
+
+
+class Test_Histogram(unittest.TestCase):
+    def test_render(self):
+        hist = Histogram("duration_seconds", "Duration.", ["op"],
+                         buckets=[0.1, 1])
+        for value in [0.05, 0.5, 0.5, 3]:
+            hist.observe(value, op="a")
+        self.assertEqual(hist.value(op="a"), (4, 4.05))
+        self.assertEqual(hist.render()[2:],
+                         ['duration_seconds_bucket{op="a",le="0.1"} 1',
+                          'duration_seconds_bucket{op="a",le="1.0"} 3',
+                          'duration_seconds_bucket{op="a",le="+Inf"} 4',
+                          'duration_seconds_sum{op="a"} 4.05',
+                          'duration_seconds_count{op="a"} 4'])
+
+    def test_bad_buckets(self):
+        self.assertRaises(ValueError, Histogram, "h", "H.", buckets=[2, 1])
+        self.assertRaises(ValueError, Histogram, "h", "H.", ["le"])
+
+
+class Test_MetricsRegistry(unittest.TestCase):
+    def test_register(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("a_total", "A.")
+        self.assertTrue(registry.counter("a_total", "A.") is counter)
+        self.assertRaises(ValueError, registry.gauge, "a_total", "A.")
+        registry.gauge("b", "B.").set(2)
+        self.assertEqual(registry.render(),
+                         "# HELP a_total A.\n# TYPE a_total counter\n"\
+                         "# HELP b B.\n# TYPE b gauge\nb 2\n")
+
+
+class Test_ClientMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = ClientMetrics()
+        self.labels = {"operation" : "getCoverage", "version" : "2.0.0"}
+
+    def test_requests(self):
+        self.metrics.request_started("getCoverage", "2.0.0")
+        self.assertEqual(self.metrics.in_flight.value(**self.labels), 1)
+        self.metrics.request_finished("getCoverage", "2.0.0", 500, retries=2,
+                                      request_bytes=100)
+        self.assertEqual(self.metrics.in_flight.value(**self.labels), 0)
+        self.assertEqual(self.metrics.requests.value(status=500,
+                                                     **self.labels), 1)
+        self.assertEqual(self.metrics.retries.value(**self.labels), 2)
+        self.assertEqual(self.metrics.request_bytes.value(**self.labels),
+                         100)
+
+    def test_timings(self):
+        timings = Timings("getCoverage", "2.0.0")
+        timings.total = 0.2
+        timings.build = 0.01
+        timings.bytes = 2048
+        timings.from_cache = True
+        self.metrics(timings)
+        self.assertEqual(self.metrics.duration.value(**self.labels),
+                         (1, 0.2))
+        self.assertEqual(self.metrics.stage_duration.value(stage="build",
+                                                           **self.labels),
+                         (1, 0.01))
+        self.assertEqual(self.metrics.response_bytes.value(**self.labels),
+                         2048)
+        self.assertEqual(self.metrics.cache_hits.value(cache="response",
+                                                       **self.labels), 1)
+        self.assertTrue('wcs_client_response_bytes_total{'\
+                        'operation="getCoverage",version="2.0.0"} 2048'
+                        in self.metrics.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
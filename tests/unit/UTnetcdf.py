@@ -0,0 +1,205 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import numpy
+from webcoverageservice import netcdf, WCS1Requester
+
+NC_TYPE_CODES = {"i1" : 1, "S1" : 2, "i2" : 3, "i4" : 4, "f4" : 5, "f8" : 6}
+
+def _pack_name(name):
+    return struct.pack(">i", len(name)) + name + "\x00" * (-len(name) % 4)
+
+def _pack_values(values):
+    values = numpy.asarray(values)
+    raw = values.astype(values.dtype.newbyteorder(">")).tostring()
+    return raw + "\x00" * (-len(raw) % 4)
+
+def _pack_attrs(attrs):
+    if not attrs:
+        return struct.pack(">ii", 0, 0)
+    header = struct.pack(">ii", netcdf.NC_ATTRIBUTE, len(attrs))
+    for name, value in sorted(attrs.items()):
+        value = numpy.atleast_1d(numpy.asarray(value))
+        if value.dtype.char == "S":
+            value = numpy.frombuffer(value[0], dtype="S1")
+        code = NC_TYPE_CODES[value.dtype.str[1:]]
+        header += _pack_name(name) + struct.pack(">ii", code, value.size) + \
+                  _pack_values(value)
+    return header
+
+def make_netcdf(dims, variables, num_records=0, attrs=None):
+    """
+    Write a NetCDF3 classic file. dims is a list of (name, length), with
+    length 0 for the record dimension, and variables a list of (name,
+    dimension names, data, attributes).
+
+    """
+    dim_ids = dict((name, i) for i, (name, _) in enumerate(dims))
+    record_dims = [name for name, length in dims if length == 0]
+    is_record = [bool(var_dims) and var_dims[0] in record_dims
+                 for _, var_dims, _, _ in variables]
+
+    def header(begins):
+        out = "CDF\x01" + struct.pack(">i", num_records)
+        out += struct.pack(">ii", netcdf.NC_DIMENSION, len(dims))
+        for name, length in dims:
+            out += _pack_name(name) + struct.pack(">i", length)
+        out += _pack_attrs(attrs)
+        out += struct.pack(">ii", netcdf.NC_VARIABLE, len(variables))
+        for (name, var_dims, data, var_attrs), begin, record in \
+            zip(variables, begins, is_record):
+            data = numpy.asarray(data)
+            size = data[0].nbytes if record else data.nbytes
+            out += _pack_name(name) + struct.pack(">i", len(var_dims))
+            out += "".join(struct.pack(">i", dim_ids[dim])
+                           for dim in var_dims)
+            out += _pack_attrs(var_attrs)
+            out += struct.pack(">iii", NC_TYPE_CODES[data.dtype.str[1:]],
+                               size + (-size % 4), begin)
+        return out
+
+    header_size = len(header([0] * len(variables)))
+    begins = []
+    body = ""
+    for (_, _, data, _), record in zip(variables, is_record):
+        begins.append(header_size + len(body) if not record else None)
+        if not record:
+            body += _pack_values(data)
+    record_vars = [numpy.asarray(var[2]) for var, record in
+                   zip(variables, is_record) if record]
+    record_start = header_size + len(body)
+    offset = record_start
+    for i, record in enumerate(is_record):
+        if record:
+            begins[i] = offset
+            size = numpy.asarray(variables[i][2])[0].nbytes
+            offset += size if len(record_vars) == 1 else size + (-size % 4)
+    for rec in range(num_records):
+        for data in record_vars:
+            raw = data[rec:rec + 1].astype(data.dtype.newbyteorder(">"))\
+                                  .tostring()
+            if len(record_vars) > 1:
+                raw += "\x00" * (-len(raw) % 4)
+            body += raw
+    return header(begins) + body
+
+
+class Test_read_bytes(unittest.TestCase):
+    def setUp(self):
+        self.lats = numpy.array([50, 51, 52], dtype="f4")
+        self.temps = numpy.arange(12, dtype="f4").reshape(2, 3, 2)
+        self.content = make_netcdf(
+            [("time", 0), ("lat", 3), ("lon", 2), ("name_len", 3)],
+            [("lat", ["lat"], self.lats, {"units" : "degrees_north"}),
+             ("lon", ["lon"], numpy.array([0, 1], dtype="f8"), {}),
+             ("time", ["time"], numpy.array([0, 3600], dtype="i4"), {}),
+             ("temp", ["time", "lat", "lon"], self.temps,
+              {"_FillValue" : numpy.float32(-1)}),
+             ("level", ["time"], numpy.array([1, 2], dtype="i2"), {})],
+            num_records=2, attrs={"title" : "test"})
+
+    def test_variables(self):
+        dataset = netcdf.read_bytes(self.content)
+        self.assertEqual(dataset.dimensions.items(),
+                         [("time", 2), ("lat", 3), ("lon", 2),
+                          ("name_len", 3)])
+        self.assertEqual(dataset.attributes["title"], "test")
+        numpy.testing.assert_array_equal(dataset.variables["lat"].data,
+                                         self.lats)
+        self.assertEqual(dataset.variables["lat"].attributes["units"],
+                         "degrees_north")
+
+    def test_record_variables(self):
+        dataset = netcdf.read_bytes(self.content)
+        temp = dataset.variables["temp"]
+        self.assertEqual(temp.dimensions, ("time", "lat", "lon"))
+        numpy.testing.assert_array_equal(temp.data, self.temps)
+        self.assertEqual(temp.attributes["_FillValue"], -1)
+        numpy.testing.assert_array_equal(dataset.variables["level"].data,
+                                         [1, 2])
+        numpy.testing.assert_array_equal(dataset.variables["time"].data,
+                                         [0, 3600])
+
+    def test_not_copied(self):
+        dataset = netcdf.read_bytes(self.content)
+        self.assertFalse(dataset.variables["temp"].data.flags.owndata)
+
+    def test_not_netcdf(self):
+        self.assertRaises(ValueError, netcdf.read_bytes, "<xml/>")
+
+    def test_memoryview(self):
+        dataset = netcdf.read_bytes(memoryview(self.content))
+        numpy.testing.assert_array_equal(dataset["temp"].data, self.temps)
+        self.assertFalse(dataset["temp"].data.flags.owndata)
+
+    def test_coordinates(self):
+        dataset = netcdf.read_bytes(self.content)
+        coords = dataset.coordinates("temp")
+        self.assertEqual(coords.keys(), ["time", "lat", "lon"])
+        numpy.testing.assert_array_equal(coords["lat"], self.lats)
+
+
+class Test_Variable_decode(unittest.TestCase):
+    def test_decode(self):
+        content = make_netcdf(
+            [("x", 3)],
+            [("packed", ["x"], numpy.array([1, -99, 3], dtype="i2"),
+              {"scale_factor" : numpy.float32(0.5),
+               "add_offset" : numpy.float32(10),
+               "_FillValue" : numpy.int16(-99)})])
+        values = netcdf.read_bytes(content)["packed"].decode()
+        self.assertEqual(values.mask.tolist(), [False, True, False])
+        self.assertEqual(values.compressed().tolist(), [10.5, 11.5])
+
+
+class Test_getCoverage_decode(unittest.TestCase):
+    def test_decode(self):
+        content = make_netcdf([("x", 2)],
+                              [("data", ["x"], numpy.array([1.5, 2.5]), {})])
+        class Response(object):
+            status_code = 200
+            headers = {"content-type" : "application/x-netcdf"}
+            def __init__(self):
+                self.content = content
+                self.closed = False
+            def close(self):
+                self.closed = True
+        responses = []
+        class Sender(object):
+            @staticmethod
+            def send_getCoverage_req(requester, coverage_id, **kwargs):
+                responses.append(Response())
+                return responses[-1]
+        request = WCS1Requester(url="test_url")
+        request.request_sender = Sender
+        dataset = request.getCoverage("cov", format="NetCDF3", decode=True)
+        numpy.testing.assert_array_equal(dataset["data"].data, [1.5, 2.5])
+        self.assertTrue(responses[0].closed)
+        response = request.getCoverage("cov", format="NetCDF3")
+        self.assertTrue(response is responses[1])
+
+
+class Test_read_file(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_memory_mapped(self):
+        path = os.path.join(self.tmpdir, "data.nc")
+        data = numpy.arange(6, dtype="f8").reshape(2, 3)
+        with open(path, "wb") as outfile:
+            outfile.write(make_netcdf([("y", 2), ("x", 3)],
+                                      [("data", ["y", "x"], data, {})]))
+        dataset = netcdf.read_file(path)
+        numpy.testing.assert_array_equal(dataset.variables["data"].data,
+                                         data)
+        self.assertTrue(isinstance(dataset.variables["data"].data.base,
+                                   numpy.memmap))
+
+
+if __name__ == '__main__':
+    unittest.main()
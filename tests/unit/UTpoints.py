@@ -0,0 +1,76 @@
+import unittest
+from collections import OrderedDict
+import numpy
+from webcoverageservice import points, netcdf, WCS1Requester
+
+def make_dataset(bbox, field):
+    """
+    Return a dataset of field (a function of x and y) at the centres of the
+    cells of a 0.5 degree grid which overlap bbox, with latitudes running
+    north to south.
+
+    """
+    def centres(low, high):
+        return numpy.arange(numpy.floor(low * 2) / 2,
+                            numpy.ceil(high * 2) / 2, 0.5) + 0.25
+    lons = centres(bbox[0], bbox[2])
+    lats = centres(bbox[1], bbox[3])[::-1]
+    data = field(lons[numpy.newaxis, :], lats[:, numpy.newaxis])
+    variables = OrderedDict([
+        ("lat", netcdf.Variable("lat", ("lat",), {}, lats)),
+        ("lon", netcdf.Variable("lon", ("lon",), {}, lons)),
+        ("temp", netcdf.Variable("temp", ("time", "lat", "lon"),
+                                 {"_FillValue" : -99.0},
+                                 data[numpy.newaxis]))])
+    return netcdf.Dataset(OrderedDict([("time", 1), ("lat", len(lats)),
+                                       ("lon", len(lons))]), variables, {})
+
+
+class Test_cluster_points(unittest.TestCase):
+    def test_clusters(self):
+        pts = [(0.2, 0.2), (0.8, 0.9), (5.5, 5.5), (0.3, 0.1)]
+        clusters = points.cluster_points(pts, max_span=1.0, buffer=0.1)
+        self.assertEqual(len(clusters), 2)
+        self.assertEqual(clusters[0][0].tolist(), [0, 1, 3])
+        numpy.testing.assert_allclose(clusters[0][1], [0.1, 0.0, 0.9, 1.0])
+        self.assertEqual(clusters[1][0].tolist(), [2])
+
+
+class Test_sample_points(unittest.TestCase):
+    def test_nearest(self):
+        field = lambda x, y: x * 100 + y
+        dataset = make_dataset([0, 0, 2, 2], field)
+        pts = numpy.array([[0.3, 0.3], [1.7, 0.6], [1.2, 1.9]])
+        numpy.testing.assert_allclose(points.sample_points(dataset, "temp",
+                                                           pts),
+                                      [25.25, 175.75, 126.75])
+
+    def test_missing(self):
+        dataset = make_dataset([0, 0, 1, 1], lambda x, y: x * 0 + y * 0 - 99)
+        self.assertTrue(numpy.isnan(points.sample_points(
+            dataset, "temp", numpy.array([[0.5, 0.5]]))).all())
+
+
+class Test_getPointSeries(unittest.TestCase):
+    def test_series(self):
+        times = ["PT0H", "PT1H", "PT2H"]
+        requests = []
+        def getCoverage(coverage_id, bbox, decode, dim_forecast, **kwargs):
+            requests.append((bbox, dim_forecast))
+            step = times.index(dim_forecast)
+            return make_dataset(bbox, lambda x, y: x * 100 + y + step * 1000)
+        request = WCS1Requester(url="test_url")
+        request.getCoverage = getCoverage
+        pts = [(0.3, 0.3), (10.2, 20.8), (0.6, 0.7)]
+        series = request.getPointSeries("cov", pts, times, "temp",
+                                        format="NetCDF3")
+        self.assertEqual(series.shape, (3, 3))
+        # Two groups of points, one request per group per time.
+        self.assertEqual(len(requests), 6)
+        numpy.testing.assert_allclose(series[0], [25.25, 1025.25, 2025.25])
+        numpy.testing.assert_allclose(series[1][0], 1045.75)
+        numpy.testing.assert_allclose(series[2][2], 2075.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
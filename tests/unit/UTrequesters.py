@@ -1,6 +1,16 @@
 import unittest
 import os
-from webcoverageservice import _Requester, WCS1Requester, WCS2Requester
+import json
+import socket
+import urllib
+import shutil
+import tempfile
+import numpy
+import requests
+from webcoverageservice import _Requester, WCS1Requester, WCS2Requester, \
+                               MetadataCache, ClientMetrics, RetryPolicy
+from stand_in import StandInServerTestCase, GridHandler, FlakyHandler, \
+                     UnavailableHandler
 
 # Create dummy response class.
 class Response(object):
@@ -17,6 +27,29 @@ class Test__Requester(unittest.TestCase):
         self.request = _Requester(url="test_url", wcs_version="0.0")
 
 
+class Test_session(unittest.TestCase):
+    def test_shared_session(self):
+        wcs1 = WCS1Requester(url="test_url")
+        wcs2 = WCS2Requester(url="test_url", session=wcs1.session)
+        self.assertTrue(wcs1.session is wcs2.session)
+
+    def test_close(self):
+        # Only the requester which created the session closes it.
+        closed = []
+        wcs1 = WCS1Requester(url="test_url", pool_maxsize=2)
+        wcs1.session.close = lambda: closed.append(True)
+        wcs2 = WCS2Requester(url="test_url", session=wcs1.session)
+        wcs2.close()
+        self.assertEqual(closed, [])
+        wcs1.close()
+        self.assertEqual(closed, [True])
+
+    def test_keep_alive(self):
+        request = _Requester(url="test_url", wcs_version="0.0",
+                             keep_alive=False)
+        self.assertEqual(request.session.headers["Connection"], "close")
+
+
 class Test__check_api_key(Test__Requester):
     # See integration tests.
     pass
@@ -66,6 +99,47 @@ class Test_describeCoverage(Test__Requester):
     pass
 
 
+class Test_getCoverages(Test__Requester):
+    def test_order_and_errors(self):
+        def getCoverage(coverage_id, dim_forecast=None):
+            if coverage_id == "bad":
+                raise RuntimeError("404 Error")
+            return (coverage_id, dim_forecast)
+        self.request.getCoverage = getCoverage
+        specs = [{"coverage_id" : "cov%s" % i, "dim_forecast" : "PT%sH" % i}
+                 for i in range(6)]
+        specs.insert(2, {"coverage_id" : "bad"})
+        results = self.request.getCoverages(specs, max_workers=3)
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results[0], ("cov0", "PT0H"))
+        self.assertTrue(isinstance(results[2], RuntimeError))
+        self.assertEqual(results[6], ("cov5", "PT5H"))
+
+    def test_empty(self):
+        request = WCS1Requester(url="test_url")
+        self.assertEqual(request.getCoverages([]), [])
+
+    def test_duplicates_sent_once(self):
+        sent = []
+        def getCoverage(**kwargs):
+            sent.append(kwargs)
+            return len(sent)
+        request = WCS2Requester(url="test_url")
+        request.getCoverage = getCoverage
+        specs = [{"coverage_id" : "cov", "components" : ["a", "b"],
+                  "bbox" : [1, 2, 3, 4]},
+                 {"coverage_id" : "cov", "components" : ["b", "a"],
+                  "bbox" : ("1", "2", "3", "4")},
+                 {"coverage_id" : "cov", "components" : ["a", "b"],
+                  "bbox" : [1, 2, 3, 4], "decode" : True},
+                 {"coverage_id" : "cov", "components" : ["a", "b"],
+                  "bbox" : [1, 2, 3, 4], "stream" : True}]
+        results = request.getCoverages(specs)
+        self.assertEqual(len(sent), 3)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(set(results)), 3)
+
+
 class Test_WCS1Requester(unittest.TestCase):
     pass
 
@@ -89,5 +163,244 @@ class Test_WCS2getCoverage(unittest.TestCase):
     pass
 
 
+class Test_metadata_cache(StandInServerTestCase):
+    def test_repeated_describeCoverage(self):
+        cache = MetadataCache()
+        request = WCS2Requester(self.url, metadata_cache=cache)
+        cov1 = request.describeCoverage("test_id", show=False)
+        cov2 = request.describeCoverage("test_id", show=False)
+        self.assertTrue(cov1 is cov2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.invalidate("describeCoverage")
+        cov3 = request.describeCoverage("test_id", show=False)
+        self.assertFalse(cov1 is cov3)
+
+    def test_shared_cache(self):
+        # Results for one service are not returned for another.
+        cache = MetadataCache()
+        request1 = WCS2Requester(self.url, metadata_cache=cache)
+        request2 = WCS2Requester(self.url + "/other", metadata_cache=cache)
+        cov1 = request1.describeCoverage("test_id", show=False)
+        cov2 = request2.describeCoverage("test_id", show=False)
+        self.assertFalse(cov1 is cov2)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        self.assertTrue(request1.describeCoverage("test_id", show=False)
+                        is cov1)
+        cache.invalidate("describeCoverage", (self.url, "2.0.0", "test_id"))
+        self.assertEqual(len(cache), 1)
+
+
+class Test_describeCoverages(StandInServerTestCase):
+    def test_cached_ids_not_requested(self):
+        cache = MetadataCache()
+        request = WCS2Requester(self.url, metadata_cache=cache)
+        cov_id = "UKPPBEST_Latest_Atmosphere"
+        covs = request.describeCoverages([cov_id, cov_id])
+        self.assertEqual([cov.name for cov in covs], [cov_id, cov_id])
+        self.assertTrue(request.describeCoverage(cov_id, show=False)
+                        is covs[0])
+
+    def test_missing_description(self):
+        request = WCS2Requester(self.url)
+        self.assertRaises(UserWarning, request.describeCoverages,
+                          ["UKPPBEST_Latest_Atmosphere", "unknown_id"])
+
+
+class Test_getCoverageTiles(StandInServerTestCase):
+    def test_coverage_bbox(self):
+        request = WCS2Requester(self.url)
+        request.getCoverage = lambda **kwargs: kwargs
+        plan, responses = request.getCoverageTiles(
+            "UKPPBEST_Latest_Atmosphere", max_cells=50, components=["a"],
+            width=10, height=10)
+        self.assertEqual(len(plan), len(responses))
+        self.assertTrue(len(plan) > 1)
+        self.assertEqual(plan.bbox, [-14.0, 47.5, 7.0, 61.0])
+        self.assertEqual(responses[0], plan.tiles[0].kwargs)
+        self.assertEqual(responses[0]["coverage_id"],
+                         "UKPPBEST_Latest_Atmosphere")
+
+
+class Test_timing_hooks(StandInServerTestCase):
+    def test_no_hooks(self):
+        request = WCS2Requester(self.url)
+        self.assertEqual(request._start_timing("describeCoverage"), None)
+
+    def test_records(self):
+        request = WCS2Requester(self.url)
+        records = []
+        request.add_timing_hook(records.append)
+        stats = request.collect_timings()
+        request.describeCoverage("test_id", show=False)
+        request.getCapabilities(show=False)
+        self.assertEqual([timings.operation for timings in records],
+                         ["describeCoverage", "getCapabilities"])
+        described, capabilities = records
+        for phase in ["build", "ttfb", "download", "parse", "total"]:
+            self.assertTrue(getattr(described, phase) >= 0, phase)
+        self.assertEqual(described.save, None)
+        self.assertEqual(described.status_code, 200)
+        self.assertTrue(described.bytes > 0)
+        # The capabilities are parsed as they are streamed.
+        self.assertEqual(capabilities.download, None)
+        self.assertTrue(capabilities.bytes > 0)
+        self.assertEqual(stats.summary()["describeCoverage"]["count"], 1)
+
+        request.remove_timing_hook(records.append)
+        request.remove_timing_hook(stats)
+        self.assertEqual(request.timing_hooks, [])
+        request.describeCoverage("test_id", show=False)
+        self.assertEqual(len(records), 2)
+
+
+class Test_metrics(StandInServerTestCase):
+    def test_requests_counted(self):
+        metrics = ClientMetrics()
+        request = WCS2Requester(self.url, metadata_cache=MetadataCache(),
+                                metrics=metrics)
+        request.describeCoverage("test_id", show=False)
+        request.describeCoverage("test_id", show=False)
+        labels = {"operation" : "describeCoverage", "version" : "2.0.0"}
+        self.assertEqual(metrics.requests.value(status=200, **labels), 1)
+        self.assertEqual(metrics.cache_hits.value(cache="metadata",
+                                                  **labels), 1)
+        self.assertEqual(metrics.in_flight.value(**labels), 0)
+        self.assertEqual(metrics.duration.value(**labels)[0], 1)
+        self.assertTrue(metrics.request_bytes.value(**labels) > 0)
+        self.assertTrue(metrics.response_bytes.value(**labels) > 0)
+        self.assertTrue('wcs_client_requests_total{operation='\
+                        '"describeCoverage",version="2.0.0",status="200"} 1'
+                        in metrics.render())
+
+    def test_failed_request(self):
+        metrics = ClientMetrics()
+        request = WCS2Requester("http://127.0.0.1:1/wcs", metrics=metrics)
+        self.assertRaises(Exception, request.describeCoverage, "test_id",
+                          show=False)
+        labels = {"operation" : "describeCoverage", "version" : "2.0.0"}
+        self.assertEqual(metrics.requests.value(status="error", **labels), 1)
+        self.assertEqual(metrics.in_flight.value(**labels), 0)
+
+
+class Test_retries(StandInServerTestCase):
+    handler = FlakyHandler
+
+    def setUp(self):
+        super(Test_retries, self).setUp()
+        self.policy = RetryPolicy(max_attempts=2, jitter=False,
+                                  sleep=lambda seconds: None)
+
+    def test_last_retry_count(self):
+        request = WCS2Requester(self.url, retry_policy=self.policy)
+        self.assertEqual(request.last_retry_count, 0)
+        request.getCapabilities(show=False)
+        self.assertEqual(request.last_retry_count, 1)
+        self.assertEqual(request.last_error, None)
+        request.getCapabilities(show=False)
+        self.assertEqual(request.last_retry_count, 0)
+
+    def test_last_error(self):
+        # Nothing listens on a port which has just been released.
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        url = "http://127.0.0.1:%s/wcs" % sock.getsockname()[1]
+        sock.close()
+        request = WCS2Requester(url, retry_policy=self.policy)
+        self.assertRaises(requests.ConnectionError, request.getCapabilities,
+                          show=False)
+        self.assertEqual(request.last_retry_count, 1)
+        self.assertTrue(isinstance(request.last_error,
+                                   requests.ConnectionError))
+
+
+class Test_resume(StandInServerTestCase):
+    handler = UnavailableHandler
+
+    def setUp(self):
+        super(Test_resume, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.savepath = os.path.join(self.tmpdir, "coverage.nc")
+        with open(self.savepath + ".part", "wb") as outfile:
+            outfile.write("abcd")
+        with open(self.savepath + ".part.json", "w") as outfile:
+            json.dump({"accept_ranges" : True, "etag" : '"abc"',
+                       "length" : 6}, outfile)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        super(Test_resume, self).tearDown()
+
+    def test_server_error_keeps_partial(self):
+        request = WCS2Requester(self.url)
+        self.assertRaises(RuntimeError, request.getCoverage,
+                          "UKPPBEST_Latest_Atmosphere", ["temp"],
+                          format="NetCDF3", savepath=self.savepath,
+                          resume=True)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)),
+                         ["coverage.nc.part", "coverage.nc.part.json"])
+        with open(self.savepath + ".part", "rb") as infile:
+            self.assertEqual(infile.read(), "abcd")
+
+
+class Test_composites(StandInServerTestCase):
+    handler = GridHandler
+
+    def setUp(self):
+        super(Test_composites, self).setUp()
+        self.request = WCS2Requester(self.url)
+        self.cov_id = "UKPPBEST_Latest_Atmosphere"
+        self.kwargs = {"components" : ["temp"], "format" : "NetCDF3"}
+
+    def tearDown(self):
+        self.request.close()
+        super(Test_composites, self).tearDown()
+
+    def test_getCoverages(self):
+        responses = self.request.getCoverages([dict(self.kwargs,
+                                                    coverage_id=self.cov_id)]
+                                              * 3)
+        self.assertEqual([response.content for response in responses],
+                         [GridHandler.body] * 3)
+
+    def test_parameters_sent_as_given(self):
+        # Normalising the request for the response cache must not change
+        # what is sent.
+        bbox = ["-13.123456789012345", "48.5", "6", "60"]
+        self.request.getCoverage(self.cov_id, bbox=bbox, **self.kwargs)
+        self.assertTrue("<metocean:TrimLow>-13.123456789012345<" in
+                        self.server.coverage_request)
+
+        request = WCS1Requester(self.url)
+        request.getCoverage(self.cov_id, bbox=bbox, dim_forecast="pt1h")
+        sent = urllib.unquote(self.server.coverage_request)
+        self.assertTrue("DIM_FORECAST=pt1h" in sent)
+        self.assertTrue("BBOX=-13.123456789012345,48.5,6,60" in sent)
+
+    def test_getCoverageTiles(self):
+        plan, responses = self.request.getCoverageTiles(self.cov_id,
+            max_cells=8, width=4, height=4, **self.kwargs)
+        self.assertEqual(plan.bbox, [-14.0, 47.5, 7.0, 61.0])
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(responses[0].content, GridHandler.body)
+
+    def test_getCoverageMosaic(self):
+        mosaic, results = self.request.getCoverageMosaic(self.cov_id, "temp",
+            max_cells=16, width=4, height=4, **self.kwargs)
+        self.assertEqual(results, [None])
+        numpy.testing.assert_array_equal(mosaic.array,
+                                         GridHandler.temps[:, ::-1])
+
+    def test_getCoverageArray(self):
+        array = self.request.getCoverageArray(self.cov_id, "temp", (4, 4),
+            times=["2015-06-03T09:00:00Z"], chunks=(1, 4, 4), **self.kwargs)
+        numpy.testing.assert_array_equal(array[0], GridHandler.temps[0, ::-1])
+
+    def test_getPointSeries(self):
+        series = self.request.getPointSeries(self.cov_id,
+            [(GridHandler.lons[1], GridHandler.lats[0])],
+            ["2015-06-03T09:00:00Z"], "temp", **self.kwargs)
+        self.assertEqual(series.tolist(), [[1.0]])
+
+
 if __name__ == '__main__':
     unittest.main()
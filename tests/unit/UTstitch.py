@@ -0,0 +1,114 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import numpy
+from webcoverageservice import tiling, stitch, WCS1Requester
+from UTnetcdf import make_netcdf
+
+class Response(object):
+    def __init__(self, content):
+        self.content = content
+
+    def close(self):
+        pass
+
+def tile_content(full, plan, tile):
+    """
+    Return a NetCDF response for the tile, cut from full (a (time, y, x)
+    array) with latitudes running north to south as many services give them.
+
+    """
+    cell_y = (plan.bbox[3] - plan.bbox[1]) / plan.grid_shape[0]
+    rows = slice(tile.y_offset, tile.y_offset + tile.height)
+    cols = slice(tile.x_offset, tile.x_offset + tile.width)
+    data = full[:, rows, cols][:, ::-1, :]
+    lats = (plan.bbox[1] + cell_y * (numpy.arange(tile.y_offset,
+                                                  tile.y_offset + tile.height)
+                                     + 0.5))[::-1]
+    return make_netcdf(
+        [("time", 0), ("lat", tile.height), ("lon", tile.width)],
+        [("lat", ["lat"], lats, {}),
+         ("temp", ["time", "lat", "lon"], data.astype("f4"), {})],
+        num_records=data.shape[0])
+
+
+class Test_Mosaic(unittest.TestCase):
+    def setUp(self):
+        self.kwargs = {"coverage_id" : "cov", "bbox" : [0, 0, 9, 7],
+                       "width" : 9, "height" : 7}
+        self.plan = tiling.plan_tiles(self.kwargs, max_cells=10)
+        self.full = numpy.arange(63, dtype="f4").reshape(1, 7, 9)
+
+    def test_any_order(self):
+        mosaic = stitch.Mosaic(self.plan, "temp")
+        tiles = list(self.plan)
+        random.shuffle(tiles)
+        for tile in tiles:
+            self.assertFalse(mosaic.complete)
+            mosaic.add(tile, Response(tile_content(self.full, self.plan,
+                                                   tile)))
+        self.assertTrue(mosaic.complete)
+        numpy.testing.assert_array_equal(mosaic.array, self.full)
+
+    def test_missing_tiles_filled(self):
+        mosaic = stitch.Mosaic(self.plan, "temp")
+        tile = self.plan.tiles[0]
+        mosaic.add(tile, Response(tile_content(self.full, self.plan, tile)))
+        self.assertEqual(numpy.isnan(mosaic.array).sum(),
+                         63 - tile.width * tile.height)
+
+    def test_time_slices(self):
+        kwargs = dict(self.kwargs, dim_forecast=["PT0H", "PT1H"])
+        plan = tiling.plan_tiles(kwargs, max_cells=30)
+        full = numpy.arange(126, dtype="f4").reshape(2, 7, 9)
+        mosaic = stitch.Mosaic(plan, "temp")
+        for tile in plan:
+            mosaic.add(tile, Response(tile_content(full[tile.time_index:
+                                                        tile.time_index + 1],
+                                                   plan, tile)))
+        numpy.testing.assert_array_equal(mosaic.array, full)
+
+    def test_memory_mapped(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "mosaic.npy")
+            mosaic = stitch.Mosaic(self.plan, "temp", filename=filename)
+            for tile in self.plan:
+                mosaic.add(tile, Response(tile_content(self.full, self.plan,
+                                                       tile)))
+            mosaic.flush()
+            numpy.testing.assert_array_equal(numpy.load(filename), self.full)
+            del mosaic
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_wrong_tile_size(self):
+        mosaic = stitch.Mosaic(self.plan, "temp")
+        self.assertRaises(ValueError, mosaic.add, self.plan.tiles[0],
+                          Response(tile_content(self.full, self.plan,
+                                                self.plan.tiles[-1])))
+
+
+class Test_getCoverageMosaic(unittest.TestCase):
+    def test_stitched(self):
+        full = numpy.arange(63, dtype="f4").reshape(1, 7, 9)
+        kwargs = {"bbox" : [0, 0, 9, 7], "width" : 9, "height" : 7,
+                  "format" : "NetCDF3"}
+        plan = tiling.plan_tiles(dict(kwargs, coverage_id="cov"),
+                                 max_cells=10)
+        def getCoverage(**tile_kwargs):
+            tile = [tile for tile in plan if tile.kwargs == tile_kwargs][0]
+            return Response(tile_content(full, plan, tile))
+        request = WCS1Requester(url="test_url")
+        request.getCoverage = getCoverage
+        mosaic, results = request.getCoverageMosaic("cov", "temp",
+                                                    max_cells=10, **kwargs)
+        self.assertEqual(results, [None] * len(plan))
+        self.assertTrue(mosaic.complete)
+        numpy.testing.assert_array_equal(mosaic.array, full)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from webcoverageservice import tiling
+
+class Test_plan_tiles(unittest.TestCase):
+    def test_fits(self):
+        kwargs = {"coverage_id" : "cov", "bbox" : [0, 0, 10, 10],
+                  "width" : 10, "height" : 10}
+        plan = tiling.plan_tiles(kwargs, max_cells=100)
+        self.assertEqual(len(plan), 1)
+        self.assertEqual(plan.tiles[0].kwargs, kwargs)
+        self.assertEqual(plan.grid_shape, (10, 10))
+
+    def test_spatial_split(self):
+        kwargs = {"coverage_id" : "cov", "bbox" : [0, 0, 10, 20],
+                  "width" : 10, "height" : 20}
+        plan = tiling.plan_tiles(kwargs, max_bytes=200, bytes_per_cell=4)
+        self.assertTrue(plan.max_cells <= 50)
+        # The tiles cover the grid exactly once.
+        covered = set()
+        for tile in plan:
+            for y in range(tile.y_offset, tile.y_offset + tile.height):
+                for x in range(tile.x_offset, tile.x_offset + tile.width):
+                    self.assertNotIn((y, x), covered)
+                    covered.add((y, x))
+            self.assertEqual(tile.kwargs["width"], tile.width)
+            self.assertEqual(tile.kwargs["bbox"],
+                             [tile.x_offset, tile.y_offset,
+                              tile.x_offset + tile.width,
+                              tile.y_offset + tile.height])
+        self.assertEqual(len(covered), 200)
+
+    def test_resolution(self):
+        kwargs = {"coverage_id" : "cov", "resx" : 0.5, "resy" : 0.5}
+        plan = tiling.plan_tiles(kwargs, max_cells=100,
+                                 coverage_bbox=[-10, 50, 0, 60])
+        self.assertEqual(plan.grid_shape, (20, 20))
+        self.assertEqual(len(plan), 4)
+        self.assertEqual(plan.tiles[-1].kwargs["bbox"], [-5, 55, 0, 60])
+        self.assertNotIn("width", plan.tiles[0].kwargs)
+
+    def test_dim_forecasts(self):
+        kwargs = {"coverage_id" : "cov", "bbox" : [0, 0, 10, 10],
+                  "width" : 10, "height" : 10,
+                  "dim_forecast" : ["PT0H", "PT1H", "PT2H"],
+                  "savepath" : "data.nc"}
+        plan = tiling.plan_tiles(kwargs, max_cells=1000)
+        self.assertEqual(len(plan), 3)
+        self.assertEqual([tile.kwargs["dim_forecast"] for tile in plan],
+                         ["PT0H", "PT1H", "PT2H"])
+        self.assertEqual(plan.tiles[1].kwargs["savepath"],
+                         "data_t1_r0_c0.nc")
+
+    def test_time_range(self):
+        times = ["2015-01-01T0%d:00:00Z" % hour for hour in range(5)]
+        kwargs = {"coverage_id" : "cov", "bbox" : [0, 0, 10, 10],
+                  "width" : 10, "height" : 10,
+                  "time" : [times[0], times[-1]]}
+        plan = tiling.plan_tiles(kwargs, max_cells=200, times=times)
+        self.assertEqual([tile.kwargs["time"] for tile in plan],
+                         [[times[0], times[1]], [times[2], times[3]],
+                          times[4]])
+        self.assertEqual(plan.max_cells, 200)
+        self.assertRaises(UserWarning, tiling.plan_tiles, kwargs,
+                          max_cells=200)
+
+    def test_size_unknown(self):
+        self.assertRaises(UserWarning, tiling.plan_tiles,
+                          {"bbox" : [0, 0, 1, 1]}, max_cells=10)
+        self.assertRaises(UserWarning, tiling.plan_tiles,
+                          {"width" : 10, "height" : 10}, max_cells=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import datetime
+from webcoverageservice.timing import Timings, TimingStats, timed, \
+                                      _percentile
+
+class Response(object):
+    def __init__(self, content="body", from_cache=False):
+        self.status_code = 200
+        self.content = content
+        self.retries = 1
+        self.elapsed = datetime.timedelta(seconds=0.5)
+        if from_cache:
+            self.from_cache = True
+
+
+class Test_Timings(unittest.TestCase):
+    def test_add(self):
+        timings = Timings("getCoverage")
+        self.assertEqual(timings.build, None)
+        timings.add("build", 1.0)
+        timings.add("build", 0.5)
+        self.assertEqual(timings.build, 1.5)
+        self.assertEqual(timings.durations(), {"build" : 1.5})
+
+    def test_add_response(self):
+        timings = Timings("describeCoverage")
+        timings.add_response(Response(), timings.start - 2.0)
+        self.assertEqual(timings.ttfb, 0.5)
+        self.assertTrue(timings.download >= 1.5)
+        self.assertEqual(timings.bytes, 4)
+        self.assertEqual((timings.status_code, timings.retries), (200, 1))
+
+    def test_streamed_response(self):
+        timings = Timings("getCoverage")
+        timings.add_response(Response(), timings.start, stream=True)
+        self.assertEqual(timings.ttfb, 0.5)
+        self.assertEqual(timings.download, None)
+        self.assertEqual(timings.bytes, None)
+
+    def test_cached_response(self):
+        timings = Timings("getCoverage")
+        timings.add_response(Response(from_cache=True), timings.start)
+        self.assertTrue(timings.from_cache)
+        self.assertEqual(timings.ttfb, None)
+
+
+class Test_timed(unittest.TestCase):
+    def test_no_timings(self):
+        self.assertEqual(timed(None, "parse", int, "3"), 3)
+
+    def test_timings(self):
+        timings = Timings("describeCoverage")
+        self.assertEqual(timed(timings, "parse", int, "3"), 3)
+        self.assertTrue(timings.parse >= 0)
+
+    def test_error(self):
+        timings = Timings("describeCoverage")
+        self.assertRaises(ValueError, timed, timings, "parse", int, "x")
+        self.assertTrue(timings.parse is not None)
+
+
+class Test__percentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        ordered = range(1, 101)
+        self.assertEqual(_percentile(ordered, 50), 50)
+        self.assertEqual(_percentile(ordered, 95), 95)
+        self.assertEqual(_percentile(ordered, 99), 99)
+        self.assertEqual(_percentile(ordered, 0), 1)
+        self.assertEqual(_percentile(ordered, 100), 100)
+        self.assertEqual(_percentile([4.0], 99), 4.0)
+
+
+class Test_TimingStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = TimingStats()
+        for seconds in range(1, 21):
+            timings = Timings("getCoverage")
+            timings.total = float(seconds)
+            timings.bytes = 10
+            self.stats(timings)
+        self.stats(Timings("describeCoverage"))
+
+    def test_summary(self):
+        summary = self.stats.summary()
+        self.assertEqual(summary["getCoverage"]["count"], 20)
+        self.assertEqual(summary["getCoverage"]["bytes"], 200)
+        total = summary["getCoverage"]["total"]
+        self.assertEqual(total["count"], 20)
+        self.assertEqual(total["mean"], 10.5)
+        self.assertEqual((total["p50"], total["p95"], total["p99"]),
+                         (10.0, 19.0, 20.0))
+        self.assertEqual(summary["describeCoverage"],
+                         {"count" : 1, "bytes" : 0})
+
+    def test_percentile(self):
+        self.assertEqual(self.stats.percentile("getCoverage", "total", 50),
+                         10.0)
+        self.assertEqual(self.stats.percentile("getCoverage", "parse", 50),
+                         None)
+
+    def test_max_samples(self):
+        stats = TimingStats(max_samples=5)
+        for seconds in range(10):
+            timings = Timings("getCoverage")
+            timings.total = float(seconds)
+            stats(timings)
+        self.assertEqual(stats.counts["getCoverage"], 10)
+        self.assertEqual(stats.summary()["getCoverage"]["total"]["count"], 5)
+        self.assertEqual(stats.percentile("getCoverage", "total", 0), 5.0)
+
+    def test_reset(self):
+        self.stats.reset()
+        self.assertEqual(self.stats.summary(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
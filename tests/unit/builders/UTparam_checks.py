@@ -1,4 +1,5 @@
 import unittest
+import dateutil.parser
 from webcoverageservice.builders import param_checks as pchecks
 
 class Test__check_dim_forecast(unittest.TestCase):
@@ -34,6 +35,44 @@ class Test__sort_time(unittest.TestCase):
         self.assertEqual(vaild_date, pchecks.sort_time("21/4/2015"))
         self.assertEqual(vaild_date, pchecks.sort_time("21st April 2015"))
 
+    def test_iso_dates(self):
+        # The ISO fast path must agree with dateutil.
+        for time in ["2015-04-21", "2015-04-21T06:00Z",
+                     "2015-04-21 06:00:07", "2015-04-21T06:00:00.5+01:00",
+                     "2015-04-21T06:00:00.123456-0500"]:
+            dtime = dateutil.parser.parse(time, ignoretz=True)
+            self.assertIsNotNone(pchecks._parse_iso_time(time))
+            self.assertEqual(pchecks.sort_time(time),
+                             dtime.isoformat() + "Z")
+
+    def test_bad_iso_dates(self):
+        self.assertRaises(ValueError, pchecks.sort_time, "2015-02-30")
+        self.assertNotIn("2015-02-30", pchecks._sorted_times)
+
+    def test_dateutil_times_not_remembered(self):
+        # dateutil takes missing fields from the current date.
+        self.assertEqual(pchecks.sort_time("2015/02/01"),
+                         "2015-02-01T00:00:00Z")
+        self.assertNotIn("2015/02/01", pchecks._sorted_times)
+
+    def test_memo_bounded(self):
+        pchecks._sorted_times.clear()
+        for day in range(1, 29):
+            pchecks.sort_time("2015-02-%02d" % day)
+        self.assertEqual(len(pchecks._sorted_times), 28)
+        size = pchecks._SORTED_TIMES_SIZE
+        try:
+            pchecks._SORTED_TIMES_SIZE = 10
+            # Using the oldest time keeps it, only the least recently used
+            # are dropped.
+            pchecks.sort_time("2015-02-01")
+            pchecks.sort_time("2015-03-01")
+            self.assertEqual(len(pchecks._sorted_times), 10)
+            self.assertEqual(pchecks._sorted_times.keys()[-2:],
+                             ["2015-02-01", "2015-03-01"])
+        finally:
+            pchecks._SORTED_TIMES_SIZE = size
+
 
 class Test__check_bbox(unittest.TestCase):
     def test_bad_type(self):
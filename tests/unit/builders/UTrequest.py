@@ -0,0 +1,80 @@
+import unittest
+from webcoverageservice.builders import wcs1_builder, wcs2_builder
+
+class Test_make_getCoverage_request(unittest.TestCase):
+    def test_wcs1_normalised(self):
+        req1 = wcs1_builder.make_getCoverage_request(
+            "cov", bbox=["-10", "50", "2", "60"], time="1/2/2015",
+            width="100")
+        req2 = wcs1_builder.make_getCoverage_request(
+            "cov", bbox=[-10, 50.0, 2, 60], time="2015-01-02T00:00:00",
+            width=100.0)
+        self.assertEqual(req1, req2)
+        self.assertEqual(hash(req1), hash(req2))
+        self.assertEqual(req1.digest, req2.digest)
+        self.assertEqual(req1.bbox, (-10.0, 50.0, 2.0, 60.0))
+        self.assertEqual(req1.time, "2015-01-02T00:00:00Z")
+        self.assertEqual(req1.wcs_version, "1.0")
+
+    def test_dim_forecast_normalised(self):
+        req1 = wcs1_builder.make_getCoverage_request("cov",
+                                                     dim_forecast=" pt36h")
+        req2 = wcs1_builder.make_getCoverage_request("cov",
+                                                     dim_forecast="PT36H")
+        self.assertEqual(req1, req2)
+        self.assertEqual(req1.digest, req2.digest)
+        self.assertEqual(req1.dim_forecast, "PT36H")
+
+    def test_wcs1_checks(self):
+        self.assertRaises(UserWarning, wcs1_builder.make_getCoverage_request,
+                          "cov", dim_run="2015-01-01", time="2015-01-02",
+                          dim_forecast="PT24H")
+        self.assertRaises(UserWarning, wcs1_builder.make_getCoverage_request,
+                          "cov", width=10, resx=0.5)
+        self.assertRaises(UserWarning, wcs1_builder.make_getCoverage_request,
+                          "cov", bbox=[1, 2, 3])
+
+    def test_wcs2_normalised(self):
+        req1 = wcs2_builder.make_getCoverage_request(
+            "cov", ["b", "a"], time=["1/2/2015", "2015-01-03"],
+            elevation="1000")
+        req2 = wcs2_builder.make_getCoverage_request(
+            "cov", ["a", "b", "a"], time=("2015-01-02", "3rd January 2015"),
+            elevation=1000, interpolation="nearest")
+        self.assertEqual(req1, req2)
+        self.assertEqual(req1.digest, req2.digest)
+        self.assertEqual(req1.components, ("a", "b"))
+        self.assertEqual(req1.time, ("2015-01-02T00:00:00Z",
+                                     "2015-01-03T00:00:00Z"))
+        self.assertEqual(len(set([req1, req2])), 1)
+
+    def test_different(self):
+        req1 = wcs2_builder.make_getCoverage_request("cov", "a", width=10)
+        req2 = wcs2_builder.make_getCoverage_request("cov", "a", width=20)
+        req3 = wcs1_builder.make_getCoverage_request("cov", width=10)
+        self.assertNotEqual(req1, req2)
+        self.assertNotEqual(req1.digest, req2.digest)
+        self.assertNotEqual(req1, req3)
+        self.assertEqual(req1.interpolation, "linear")
+
+    def test_immutable(self):
+        req = wcs1_builder.make_getCoverage_request("cov")
+        self.assertRaises(AttributeError, setattr, req, "coverage_id", "x")
+
+    def test_as_kwargs(self):
+        req = wcs2_builder.make_getCoverage_request(
+            "cov", ["a"], bbox=[1, 2, 3, 4], time=["2015-01-01",
+                                                   "2015-01-02"])
+        kwargs = req.as_kwargs()
+        self.assertEqual(kwargs["bbox"], [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(kwargs["time"], ["2015-01-01T00:00:00Z",
+                                          "2015-01-02T00:00:00Z"])
+        self.assertNotIn("width", kwargs)
+        self.assertEqual(wcs2_builder.build_getCoverage_req(**kwargs),
+                         wcs2_builder.build_getCoverage_req(
+                             "cov", ["a"], bbox=[1.0, 2.0, 3.0, 4.0],
+                             time=["2015-01-01", "2015-01-02"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,13 @@ class Test_build_getCapabilities_req(unittest.TestCase):
         req_dict = wcs1_builder.build_getCapabilities_req()
         self.assertEqual(req_dict["REQUEST"], "GetCapabilities")
 
+    def test_section(self):
+        req_dict = wcs1_builder.build_getCapabilities_req(["ContentMetadata"])
+        self.assertEqual(req_dict["SECTION"],
+                         "/WCS_Capabilities/ContentMetadata")
+        self.assertRaises(UserWarning, wcs1_builder.build_getCapabilities_req,
+                          ["Service", "ContentMetadata"])
+
 
 class Test_build_describeCoverage_req(unittest.TestCase):
     def test_return(self):
@@ -13,6 +20,23 @@ class Test_build_describeCoverage_req(unittest.TestCase):
         self.assertEqual(req_dict["REQUEST"], "DescribeCoverage")
         self.assertEqual(req_dict["COVERAGE"], "test_id")
 
+    def test_many_ids(self):
+        req_dict = wcs1_builder.build_describeCoverage_req(["id1", "id2"])
+        self.assertEqual(req_dict["COVERAGE"], "id1,id2")
+
+
+class Test_batch_coverage_ids(unittest.TestCase):
+    def test_batch_size(self):
+        batches = wcs1_builder.batch_coverage_ids(["a", "b", "c"], 2)
+        self.assertEqual(batches, [["a", "b"], ["c"]])
+
+    def test_max_length(self):
+        # Each name is 10 characters and "%2C" separates them, so only 2 fit
+        # in 25 characters.
+        cov_ids = ["cov_%06d" % i for i in range(5)]
+        batches = wcs1_builder.batch_coverage_ids(cov_ids, 50, max_length=25)
+        self.assertEqual(batches, [cov_ids[0:2], cov_ids[2:4], cov_ids[4:]])
+
 
 class Test_build_getCoverage_req(unittest.TestCase):
     def setUp(self):
@@ -1,10 +1,17 @@
 import unittest
+import xml.etree.ElementTree as ET
 from webcoverageservice.builders import wcs2_builder
 
 class Test_build_getCapabilities_req(unittest.TestCase):
     def test_return(self):
         req_dict = wcs2_builder.build_getCapabilities_req()
         self.assertEqual(req_dict["REQUEST"], "GetCapabilities")
+        self.assertFalse("SECTIONS" in req_dict)
+
+    def test_sections(self):
+        req_dict = wcs2_builder.build_getCapabilities_req(
+                                ["OperationsMetadata", "Contents"])
+        self.assertEqual(req_dict["SECTIONS"], "OperationsMetadata,Contents")
 
 
 class Test_build_describeCoverageCollection_req(unittest.TestCase):
@@ -17,12 +24,62 @@ class Test_build_describeCoverageCollection_req(unittest.TestCase):
 
 
 class Test_build_describeCoverage_req(unittest.TestCase):
-    pass
+    def test_single_id(self):
+        xml = wcs2_builder.build_describeCoverage_req("test_id")
+        root = ET.fromstring(xml)
+        self.assertEqual([elem.text for elem in root], ["test_id"])
+
+    def test_many_ids(self):
+        xml = wcs2_builder.build_describeCoverage_req(["id1", "id2", "a&b"])
+        root = ET.fromstring(xml)
+        self.assertEqual([elem.text for elem in root], ["id1", "id2", "a&b"])
 
 
 class Test_build_getCoverage_req(unittest.TestCase):
     pass
 
 
+class Test_GetCoverageRequestTemplateWriter(unittest.TestCase):
+    def assert_same_xml(self, builder):
+        builder.writer = wcs2_builder.GetCoverageRequestWriter
+        expected = builder.toXML()
+        builder.writer = wcs2_builder.GetCoverageRequestTemplateWriter
+        self.assertEqual(builder.toXML(), expected)
+
+    def test_default_writer(self):
+        builder = wcs2_builder.GetCoverageRequestBuilder()
+        self.assertIs(builder.writer,
+                      wcs2_builder.GetCoverageRequestTemplateWriter)
+
+    def test_empty_request(self):
+        self.assert_same_xml(wcs2_builder.GetCoverageRequestBuilder())
+
+    def test_full_request(self):
+        builder = wcs2_builder.GetCoverageRequestBuilder()
+        builder.setCoverageId("cov&<1>")
+        builder.setComponents("temp", 'say "hi"')
+        builder.setCRS("crs1", "EPSG:4326")
+        builder.setInterpolation("Long", "linear", samplesize=10)
+        builder.setInterpolation("Lat", "nearest")
+        builder.setInterpolation("Height")
+        builder.setLatRange(-10.5, 20, unit="deg")
+        builder.setLong("30")
+        builder.setLevelRange("100", "1000")
+        builder.setTime("2015-01-01T00:00:00Z", unit="ISO8601")
+        builder.setFormat("NetCDF3")
+        builder.setMediaType("multipart/related")
+        self.assert_same_xml(builder)
+
+    def test_build_getCoverage_req(self):
+        xml = wcs2_builder.build_getCoverage_req(
+            "cov", ["a", "b"], format="NetCDF3", elevation=["1", "2"],
+            bbox=[1, 2, 3, 4], time=["2015-01-01", "2015-01-02"],
+            width=10, height=20)
+        root = ET.fromstring(xml)
+        self.assertEqual(
+            root.find("{http://www.opengis.net/wcs/2.0}CoverageId").text,
+            "cov")
+
+
 if __name__ == '__main__':
     unittest.main()
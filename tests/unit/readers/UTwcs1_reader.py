@@ -1,4 +1,5 @@
 import unittest
+import StringIO
 import xml.etree.ElementTree as ET
 from webcoverageservice.coverage import Coverage, CoverageList
 from webcoverageservice.readers import wcs1_reader
@@ -16,6 +17,8 @@ def file_to_string(filename):
 xml_simple    = file_to_string("tests/unit/wcs1_xml_examples/simple.xml")
 xml_simple_ns = file_to_string("tests/unit/wcs1_xml_examples/simple_ns.xml")
 xml_getCaps   = file_to_string("tests/unit/wcs1_xml_examples/getCapabilities.xml")
+xml_getCaps_section = file_to_string("tests/unit/wcs1_xml_examples/"\
+                                     "getCapabilities_ContentMetadata.xml")
 xml_desCov    = file_to_string("tests/unit/wcs1_xml_examples/describeCoverage.xml")
 xml_error     = file_to_string("tests/unit/wcs1_xml_examples/error.xml")
 
@@ -31,6 +34,34 @@ class Test_read_getCapabilities_res(unittest.TestCase):
         covs = wcs1_reader.read_getCapabilities_res(xml_getCaps)
         self.assertEqual(type(covs), CoverageList)
 
+    def test_section(self):
+        # The response to a request for the ContentMetadata section.
+        covs = wcs1_reader.read_getCapabilities_res(xml_getCaps_section)
+        expected = wcs1_reader.read_getCapabilities_res(xml_getCaps)
+        self.assertEqual(len(covs), 18)
+        self.assertEqual([str(cov) for cov in covs],
+                         [str(cov) for cov in expected])
+
+
+class Test_read_getCapabilities_stream(unittest.TestCase):
+    def test_returned_val(self):
+        covs = wcs1_reader.read_getCapabilities_stream(
+                            StringIO.StringIO(xml_getCaps))
+        expected = wcs1_reader.read_getCapabilities_res(xml_getCaps)
+        self.assertEqual(type(covs), CoverageList)
+        self.assertNotEqual(len(covs), 0)
+        self.assertEqual([str(cov) for cov in covs],
+                         [str(cov) for cov in expected])
+
+    def test_section(self):
+        # The response to a request for the ContentMetadata section.
+        covs = wcs1_reader.read_getCapabilities_stream(
+                            StringIO.StringIO(xml_getCaps_section))
+        expected = wcs1_reader.read_getCapabilities_res(xml_getCaps)
+        self.assertEqual(len(covs), 18)
+        self.assertEqual([str(cov) for cov in covs],
+                         [str(cov) for cov in expected])
+
 
 class Test_read_describeCoverage_res(unittest.TestCase):
     def test_returned_type(self):
@@ -38,6 +69,22 @@ class Test_read_describeCoverage_res(unittest.TestCase):
         self.assertEqual(type(cov), Coverage)
 
 
+class Test_read_describeCoverages_res(unittest.TestCase):
+    def test_returned_val(self):
+        # Make a response describing two coverages.
+        cov_start = xml_desCov.index("<CoverageOffering>")
+        cov_end = xml_desCov.index("</CoverageDescription>")
+        cov = xml_desCov[cov_start:cov_end]
+        xml_two = xml_desCov[:cov_end] + \
+                  cov.replace("UKPPBEST_High_cloud_cover", "second_id") + \
+                  xml_desCov[cov_end:]
+        covs = wcs1_reader.read_describeCoverages_res(xml_two)
+        self.assertEqual(type(covs), CoverageList)
+        self.assertEqual([cov.name for cov in covs],
+                         ["UKPPBEST_High_cloud_cover", "second_id"])
+        self.assertEqual(covs[0].times, covs[1].times)
+
+
 class Test_ResponseReader(unittest.TestCase):
     pass
 
@@ -1,6 +1,8 @@
 import unittest
+import StringIO
 import xml.etree.ElementTree as ET
-from webcoverageservice.coverage import Coverage, CoverageList
+from webcoverageservice.coverage import Coverage, CoverageList, \
+                                        CoverageCollection
 from webcoverageservice.readers import wcs2_reader
 from webcoverageservice.readers.xml_reader import get_elements
 
@@ -33,12 +35,39 @@ class Test_read_getCapabilities_res(unittest.TestCase):
         self.assertEqual(type(covs), CoverageList)
 
 
+class Test_read_getCapabilities_stream(unittest.TestCase):
+    def test_returned_val(self):
+        covs = wcs2_reader.read_getCapabilities_stream(
+                            StringIO.StringIO(xml_getCaps))
+        expected = wcs2_reader.read_getCapabilities_res(xml_getCaps)
+        self.assertEqual(type(covs), CoverageList)
+        self.assertNotEqual(len(covs), 0)
+        self.assertEqual([str(cov) for cov in covs],
+                         [str(cov) for cov in expected])
+
+
 class Test_read_describeCoverage_res(unittest.TestCase):
     def test_returned_type(self):
         cov = wcs2_reader.read_describeCoverage_res(xml_desCov)
         self.assertEqual(type(cov), Coverage)
 
 
+class Test_read_describeCoverages_res(unittest.TestCase):
+    def test_returned_val(self):
+        # Make a response describing two coverages.
+        desc_start = xml_desCov.index("<wcs:CoverageDescription ")
+        desc_end = xml_desCov.index("</wcs:CoverageDescriptions>")
+        desc = xml_desCov[desc_start:desc_end]
+        xml_two = xml_desCov[:desc_end] + \
+                  desc.replace("UKPPBEST_Latest_Atmosphere", "second_id") + \
+                  xml_desCov[desc_end:]
+        covs = wcs2_reader.read_describeCoverages_res(xml_two)
+        self.assertEqual(type(covs), CoverageList)
+        self.assertEqual([cov.name for cov in covs],
+                         ["UKPPBEST_Latest_Atmosphere", "second_id"])
+        self.assertEqual(covs[1].bbox, [-14.0, 47.5, 7.0, 61.0])
+
+
 class Test_ResponseReader(unittest.TestCase):
     pass
 
@@ -63,6 +92,66 @@ class Test_CapabilitiesReader(unittest.TestCase):
     pass
 
 
+class Test_CoverageReader(unittest.TestCase):
+    def setUp(self):
+        self.reader = wcs2_reader.CoverageReader(xml_desCov)
+
+    def test_metadata_vals(self):
+        self.assertEqual(self.reader.get_components(), ["Total_cloud_cover"])
+        self.assertEqual(self.reader.get_ref_time(), "2015-06-03T09:00:00Z")
+        self.assertEqual(self.reader.get_crss(),
+                         "http://www.opengis.net/def/crs/EPSG/0/4326")
+
+    def test_from_element(self):
+        reader = wcs2_reader.CoverageReader.from_element(xml_desCov_root)
+        cov = reader.get_coverage()
+        self.assertEqual(cov.name, "UKPPBEST_Latest_Atmosphere")
+        self.assertEqual(cov.components, ["Total_cloud_cover"])
+        self.assertEqual(cov.dim_runs, "2015-06-03T09:00:00Z")
+
+    def test_no_source_observation(self):
+        root = ET.fromstring(xml_desCov)
+        metocean = "{http://def.wmo.int/metce/2013/metocean}"
+        for parent in root.iter(metocean + "MetOceanCoverageMetadata"):
+            for elem in parent.findall(metocean + "sourceObservationProperty"):
+                parent.remove(elem)
+        reader = wcs2_reader.CoverageReader(ET.tostring(root))
+        self.assertEqual(reader.get_components(), ["Total_cloud_cover"])
+        self.assertRaises(UserWarning, reader.get_ref_time)
+        self.assertRaises(UserWarning, reader.get_crss)
+
+
+class Test_missing_sections(unittest.TestCase):
+    def setUp(self):
+        # Remove all but the Contents section.
+        root = ET.fromstring(xml_getCaps)
+        for elem in list(root):
+            if not elem.tag.endswith("Contents"):
+                root.remove(elem)
+        self.xml_contents = ET.tostring(root)
+
+    def test_contents_only(self):
+        reader = wcs2_reader.CapabilitiesReader(self.xml_contents)
+        self.assertEqual(reader.get_operations(), [])
+        self.assertEqual(reader.get_address(), None)
+        self.assertNotEqual(len(reader.get_coverages()), 0)
+        self.assertNotEqual(len(reader.get_coverage_collections()), 0)
+
+    def test_no_contents(self):
+        root = ET.fromstring(xml_getCaps)
+        root.remove(root.find("{http://www.opengis.net/wcs/2.0}Contents"))
+        reader = wcs2_reader.CapabilitiesReader(ET.tostring(root))
+        self.assertEqual(len(reader.get_coverages()), 0)
+        self.assertEqual(reader.get_coverage_collections(), [])
+
+
+class Test_read_getCoverageCollections_res(unittest.TestCase):
+    def test_returned_val(self):
+        cols = wcs2_reader.read_getCoverageCollections_res(xml_getCaps)
+        self.assertNotEqual(len(cols), 0)
+        self.assertEqual(type(cols[0]), CoverageCollection)
+
+
 class Test_get_coverages(unittest.TestCase):
     def setUp(self):
         self.reader = wcs2_reader.CapabilitiesReader(xml_getCaps)
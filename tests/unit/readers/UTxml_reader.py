@@ -4,6 +4,7 @@ be referred to to check what is being tested.
 
 """
 import unittest
+import StringIO
 import xml.etree.ElementTree as ET
 from webcoverageservice.coverage import Coverage, CoverageList
 from webcoverageservice.readers import xml_reader
@@ -40,6 +41,53 @@ class Test_read_xml(unittest.TestCase):
         self.assertRaises(UserWarning, xml_reader.read_xml, xml_error)
 
 
+class Test_iter_elements(unittest.TestCase):
+    def test_returned_val(self):
+        elems = xml_reader.iter_elements(StringIO.StringIO(xml_getCaps),
+                                         "ContentMetadata/CoverageOffering",
+                                         namespace="http://www.opengis.net/wcs")
+        names = [elem[0].text for elem in elems]
+        expected = [elem[0].text for elem in xml_getCaps_root[2]]
+        self.assertEqual(names, expected)
+
+    def test_only_path_matched(self):
+        # "name" elements are found elsewhere in the document.
+        elems = xml_reader.iter_elements(StringIO.StringIO(xml_getCaps),
+                                         "Service/name",
+                                         namespace="http://www.opengis.net/wcs")
+        self.assertEqual([elem.text for elem in elems], ["UKPPBEST"])
+
+    def test_bad_xml(self):
+        elems = xml_reader.iter_elements(StringIO.StringIO(xml_error),
+                                         "Exception")
+        self.assertRaises(UserWarning, list, elems)
+
+    def test_tree_not_retained(self):
+        # Record the root element parsed by iter_elements.
+        roots = []
+        iterparse = ET.iterparse
+        def recording_iterparse(source, events):
+            for event, elem in iterparse(source, events):
+                if not roots:
+                    roots.append(elem)
+                yield event, elem
+        # Many elements, both at the path and elsewhere.
+        start = xml_getCaps.index("<CoverageOffering>")
+        end = xml_getCaps.index("</ContentMetadata>")
+        xml_long = xml_getCaps[:start] + \
+                   xml_getCaps[start:end] * 200 + xml_getCaps[end:]
+        xml_reader.ET.iterparse = recording_iterparse
+        try:
+            elems = xml_reader.iter_elements(StringIO.StringIO(xml_long),
+                                        "ContentMetadata/CoverageOffering",
+                                        namespace="http://www.opengis.net/wcs")
+            names = [elem[0].text for elem in elems]
+        finally:
+            xml_reader.ET.iterparse = iterparse
+        self.assertEqual(len(names), len(xml_getCaps_root[2]) * 200)
+        self.assertEqual(list(roots[0]), [])
+
+
 class Test_check_xml(unittest.TestCase):
     def test_good_xml(self):
         xml_reader.check_xml(xml_desCov_root)
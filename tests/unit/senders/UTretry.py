@@ -0,0 +1,107 @@
+import unittest
+import requests
+from webcoverageservice.senders.retry import RetryPolicy
+
+# Create dummy response class.
+class Response(object):
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class Sender(object):
+    """
+    Return (or raise) the given outcomes in turn.
+
+    """
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self):
+        outcome = self.outcomes[self.calls]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    # The policy records its waits instead of sleeping.
+    def setUp(self):
+        self.waits = []
+        self.policy = RetryPolicy(max_attempts=3, backoff_base=1.0,
+                                  backoff_cap=1.5, jitter=False,
+                                  sleep=self.waits.append)
+
+
+class Test_RetryPolicy(unittest.TestCase):
+    def test_bad_max_attempts(self):
+        self.assertRaises(ValueError, RetryPolicy, max_attempts=0)
+
+
+class Test_backoff(RetryPolicyTestCase):
+    def test_capped(self):
+        self.assertEqual([self.policy.backoff(i) for i in range(3)],
+                         [1.0, 1.5, 1.5])
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff_base=1.0, backoff_cap=10.0)
+        for i in range(20):
+            self.assertTrue(0 <= policy.backoff(2) <= 4.0)
+
+
+class Test_send(RetryPolicyTestCase):
+    def test_success(self):
+        response = self.policy.send(Sender(Response(200)))
+        self.assertEqual(response.retries, 0)
+        self.assertEqual(self.waits, [])
+
+    def test_retry_status(self):
+        first = Response(503)
+        sender = Sender(first, Response(200))
+        response = self.policy.send(sender)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.retries, 1)
+        self.assertEqual(self.waits, [1.0])
+        self.assertTrue(first.closed)
+
+    def test_not_retried_status(self):
+        sender = Sender(Response(404), Response(200))
+        self.assertEqual(self.policy.send(sender).status_code, 404)
+        self.assertEqual(sender.calls, 1)
+
+    def test_attempts_exhausted(self):
+        sender = Sender(Response(503), Response(503), Response(503))
+        response = self.policy.send(sender)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.retries, 2)
+
+    def test_connection_error(self):
+        error = requests.ConnectionError()
+        response = self.policy.send(Sender(error, Response(200)))
+        self.assertEqual(response.retries, 1)
+        self.assertTrue(response.retry_error is error)
+
+        sender = Sender(*[requests.ConnectionError()] * 3)
+        self.assertRaises(requests.ConnectionError, self.policy.send, sender)
+        self.assertEqual(sender.calls, 3)
+        try:
+            self.policy.send(Sender(*[error] * 3))
+        except requests.ConnectionError, err:
+            self.assertEqual(err.retries, 2)
+
+    def test_deadline(self):
+        # The first wait would take the request past the deadline.
+        self.policy.deadline = 0.5
+        sender = Sender(Response(503), Response(200))
+        response = self.policy.send(sender)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.retries, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
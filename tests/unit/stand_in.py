@@ -0,0 +1,132 @@
+"""
+Local stand-in WCS server shared by the unit tests which send real HTTP
+requests.
+
+"""
+import unittest
+import threading
+import BaseHTTPServer
+import numpy
+from UTnetcdf import make_netcdf
+
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """
+    Local stand-in for a WCS2 service. GET requests are answered with the
+    getCapabilities example and POST requests with the describeCoverage
+    example.
+
+    """
+    def _send_file(self, filename):
+        with open(filename, "r") as infile:
+            body = infile.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_file("tests/unit/wcs2_xml_examples/getCapabilities.xml")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self._send_file("tests/unit/wcs2_xml_examples/describeCoverage.xml")
+
+    def log_message(self, *args):
+        pass
+
+
+class GridHandler(StandInHandler):
+    """
+    As StandInHandler, but getCoverage requests (WCS1 GET or WCS2 POST)
+    are answered with a NetCDF file of a 4 by 4 grid of "temp" values over
+    the coverage's bbox. The last getCoverage request (its path or payload)
+    is kept as the server's coverage_request.
+
+    """
+    lons = -14 + 21 / 4.0 * (numpy.arange(4) + 0.5)
+    lats = (47.5 + 13.5 / 4.0 * (numpy.arange(4) + 0.5))[::-1]
+    temps = numpy.arange(16, dtype="f4").reshape(1, 4, 4)
+    body = make_netcdf([("time", 1), ("lat", 4), ("lon", 4)],
+                       [("lat", ["lat"], lats, {}),
+                        ("lon", ["lon"], lons, {}),
+                        ("temp", ["time", "lat", "lon"], temps, {})])
+
+    def _send_grid(self, request):
+        self.server.coverage_request = request
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-netcdf")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def do_GET(self):
+        if "GetCoverage" in self.path:
+            self._send_grid(self.path)
+        else:
+            StandInHandler.do_GET(self)
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers["Content-Length"]))
+        if "GetCoverage" in payload:
+            self._send_grid(payload)
+        else:
+            self._send_file("tests/unit/wcs2_xml_examples/"\
+                            "describeCoverage.xml")
+
+
+class FlakyHandler(StandInHandler):
+    """
+    As StandInHandler, but the first GET request is answered with a 503.
+
+    """
+    def do_GET(self):
+        if getattr(self.server, "failed", False):
+            StandInHandler.do_GET(self)
+            return
+        self.server.failed = True
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class UnavailableHandler(StandInHandler):
+    """
+    As StandInHandler, but getCoverage requests are answered with a 503.
+
+    """
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers["Content-Length"]))
+        if "GetCoverage" not in payload:
+            self._send_file("tests/unit/wcs2_xml_examples/"\
+                            "describeCoverage.xml")
+            return
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def start_stand_in_server(handler=StandInHandler):
+    """
+    Serve the handler on a free local port in a background thread.
+
+    """
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+class StandInServerTestCase(unittest.TestCase):
+    # Starts a stand-in server, serving handler, for each test.
+    handler = StandInHandler
+
+    def setUp(self):
+        self.server = start_stand_in_server(self.handler)
+        self.url = "http://127.0.0.1:%s/wcs" % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -3,10 +3,21 @@ Module for sending requests and handling responses to/from a web coverage
 service (WCS).
 
 """
-import requests
+import os
+from webcoverageservice import download, tiling, timing
+from webcoverageservice.cache import ResponseCache, MetadataCache
+from webcoverageservice.concurrency import map_concurrently
+from webcoverageservice.coverage import CoverageList
+from webcoverageservice.metrics import ClientMetrics
 from webcoverageservice.readers import wcs1_reader, wcs2_reader
 from webcoverageservice.readers.xml_reader import read_xml
 from webcoverageservice.senders import wcs1_sender, wcs2_sender
+from webcoverageservice.senders.retry import RetryPolicy
+from webcoverageservice.senders.sender import create_session
+
+def _save_xml(savepath, xml_str):
+    with open(savepath, "w") as outfile:
+        outfile.write(xml_str)
 
 class _Requester(object):
     """
@@ -27,8 +38,73 @@ class _Requester(object):
         key is valid. This is not entirely necessary as the same check is done
         with all requests.
 
+    * session: requests.Session or None
+        An existing session (e.g. the session attribute of another requester
+        pointing at the same host) whose connection pool is reused. If None
+        a new session is created and owned by this requester.
+
+    * pool_connections: integer
+        The number of host connection pools cached by a new session.
+
+    * pool_maxsize: integer
+        The maximum number of connections a new session keeps open per host.
+
+    * keep_alive: boolean
+        If False, a new session closes connections after every request.
+
+    * retry_policy: RetryPolicy or None
+        How requests which fail for transient reasons are retried. If None,
+        requests are not retried. The number of retries made is given by the
+        retries attribute of each requests.Response, and for the most recent
+        request by the requester's last_retry_count attribute, with the last
+        error raised while sending it (or None) as last_error.
+
+    * response_cache: ResponseCache or None
+        If given, getCoverage responses are kept on disk and identical
+        requests are answered from there without using the network.
+
+    * metadata_cache: MetadataCache or None
+        If given, the results of getCapabilities, describeCoverage and
+        describeCoverageCollection are kept in memory and repeated requests
+        are answered from there. It may be shared by several requesters. Use
+        its invalidate method to drop results when they change, e.g. when a
+        new model run is available.
+
+    * metrics: ClientMetrics or None
+        If given, the requests made are counted and timed in it, so they can
+        be exposed to Prometheus (see metrics.py). It may be shared by
+        several requesters.
+
+    How long each stage of a request takes can be followed by registering a
+    hook with add_timing_hook (see timing.py).
+
     """
-    def __init__(self, url, wcs_version, api_key=None, validate_api=False):
+    # The getCoverage arguments which are not part of the request sent.
+    _getCoverage_options = ["stream", "savepath", "savepath_xml_req",
+                            "chunk_size", "resume", "decode"]
+
+    def __init__(self, url, wcs_version, api_key=None, validate_api=False,
+                 session=None, pool_connections=10, pool_maxsize=10,
+                 keep_alive=True, retry_policy=None, response_cache=None,
+                 metadata_cache=None, metrics=None):
+        if session is None:
+            session = create_session(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     keep_alive=keep_alive)
+            self._owns_session = True
+        else:
+            self._owns_session = False
+        self.session = session
+        self.retry_policy = retry_policy
+        self.last_retry_count = 0
+        self.last_error = None
+        self.response_cache = response_cache
+        self.metadata_cache = metadata_cache
+        self.timing_hooks = []
+        self.metrics = metrics
+        if metrics is not None:
+            self.add_timing_hook(metrics)
+
         self.url = url
         self.version = wcs_version
         self.params = {"SERVICE" : "WCS",
@@ -52,12 +128,81 @@ class _Requester(object):
             self.request_sender  = None
 
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Close all pooled connections. A session given at initialisation is
+        shared, so it is left open for its owner to close.
+
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def add_timing_hook(self, hook):
+        """
+        Call hook with a timing.Timings record of how long each stage took
+        once each request is done. Requests answered by the metadata cache
+        are not recorded. Nothing is timed while there are no hooks.
+
+        Args:
+
+        * hook: callable
+            Takes a timing.Timings. It may be called from several threads at
+            once (e.g. by getCoverages) and the request waits for it, so it
+            should be quick.
+
+        returns:
+            hook
+
+        """
+        # A new list, so requests being timed in other threads are unaffected.
+        self.timing_hooks = self.timing_hooks + [hook]
+        return hook
+
+    def remove_timing_hook(self, hook):
+        self.timing_hooks = [registered for registered in self.timing_hooks
+                             if registered != hook]
+
+    def collect_timings(self, max_samples=10000):
+        """
+        Register a new timing.TimingStats hook, which keeps the durations of
+        each stage of each operation, e.g. use
+        requester.collect_timings().summary() to see their percentiles.
+
+        returns:
+            timing.TimingStats
+
+        """
+        return self.add_timing_hook(timing.TimingStats(max_samples))
+
+    def _start_timing(self, operation):
+        """
+        Return a Timings record for the operation, or None if there are no
+        hooks to give it to.
+
+        """
+        if not self.timing_hooks:
+            return None
+        return timing.Timings(operation, self.version)
+
+    def _finish_timing(self, timings):
+        if timings is None:
+            return
+        timings.total = timing.default_timer() - timings.start
+        for hook in self.timing_hooks:
+            hook(timings)
+
     def _check_api_key(self):
         """
         Send dummy request to BDS and check response.
 
         """
-        response = requests.get(self.url, params=self.params)
+        response = self.session.get(self.url, params=self.params)
         self._check_response_status(response)
 
     @staticmethod
@@ -67,7 +212,8 @@ class _Requester(object):
 
         """
         status = response.status_code
-        if status != 200:
+        # 206 is a successful response to a Range request.
+        if status not in [200, 206]:
             url_message = "Here's the url that was sent:\n%s" % response.url
             if status == 403:
                 raise RuntimeError("403 Error, request forbidden. This is "\
@@ -96,7 +242,84 @@ class _Requester(object):
                               " we want) but the format is not recognised. "\
                               "Here it is to look at:\n%s" % xml_str)
 
-    def getCapabilities(self, show=True, savepath=None):
+    def _send_getCoverage(self, send, savepath=None, resume=False,
+                          timings=None):
+        """
+        Send a getCoverage request using the send function, which takes the
+        extra request headers as its only argument. If resuming, ask for just
+        the missing part of an earlier partial download of savepath, falling
+        back to a full download if the server can not continue it exactly.
+
+        """
+        headers = None
+        if savepath and resume:
+            headers = download.resume_headers(savepath)
+        response = send(headers)
+        if headers and not download.check_resumed_response(response,
+                                                           savepath):
+            response.close()
+            download.discard_partial(savepath)
+            response = send(None)
+        if timings is not None and getattr(response, "from_cache", False):
+            timings.from_cache = True
+            timings.status_code = response.status_code
+        return response
+
+    def _finish_getCoverage(self, response, savepath, chunk_size, resume,
+                            decode, timings):
+        """
+        Check a getCoverage response, then save and/or decode it as asked.
+
+        """
+        self._check_response_status(response)
+        self._check_getCoverage_response(response)
+
+        if savepath:
+            timing.timed(timings, "save", download.save_response, response,
+                         savepath, chunk_size, resume=resume)
+            if timings is not None:
+                timings.bytes = os.path.getsize(savepath)
+
+        if decode:
+            response = timing.timed(timings, "parse",
+                                    self._decode_getCoverage, response,
+                                    savepath)
+        self._finish_timing(timings)
+        return response
+
+    def _decode_getCoverage(self, response, savepath=None):
+        """
+        Read a NetCDF getCoverage response into NumPy arrays.
+
+        """
+        from webcoverageservice import netcdf
+        try:
+            return netcdf.read_response(response, savepath)
+        finally:
+            response.close()
+
+    def _cached_metadata(self, operation, key, savepath=None):
+        """
+        Return the cached result of the operation, or None if it must be
+        requested. The XML is needed to save it, so if a savepath is given
+        the cache is not used. The cache may be shared by requesters of
+        other services, so the key is qualified with the URL and version.
+
+        """
+        if self.metadata_cache is None or savepath:
+            return None
+        value = self.metadata_cache.get(operation,
+                                        (self.url, self.version, key))
+        if value is not None and self.metrics is not None:
+            self.metrics.cache_hit(operation, self.version, "metadata")
+        return value
+
+    def _cache_metadata(self, operation, key, value):
+        if self.metadata_cache is not None:
+            self.metadata_cache.put(operation, (self.url, self.version, key),
+                                    value)
+
+    def getCapabilities(self, show=True, savepath=None, sections=None):
         """
         Send a request to BDS to get an XML file containing all available
         coverages. Coverages are returned as Coverage objects in a
@@ -114,23 +337,52 @@ class _Requester(object):
             If a filepath (and name) is provided, save the returned XML
             (unless it is an XML error response).
 
+        * sections: list of strings or None
+            Only request these sections of the document, e.g. ["Contents"]
+            (WCS2) or ["ContentMetadata"] (WCS1) is all that is needed to
+            list the coverages. Default is the whole document.
+
         returns:
             CoverageList
 
         """
-        response  = self.request_sender.send_getCapabilities_req(self)
-        self._check_response_status(response)
-        xml_str   = response.text
-        coverages = self.response_reader.read_getCapabilities_res(xml_str)
+        cache_key = tuple(sections) if sections else None
+        coverages = self._cached_metadata("getCapabilities", cache_key,
+                                          savepath)
+        if coverages is None:
+            # Unless the XML is to be saved, parse it as it is downloaded
+            # rather than holding the whole document in memory.
+            timings = self._start_timing("getCapabilities")
+            response  = self.request_sender.send_getCapabilities_req(
+                                            self, stream=not savepath,
+                                            sections=sections,
+                                            timings=timings)
+            self._check_response_status(response)
+            if savepath:
+                xml_str   = response.text
+                coverages = timing.timed(timings, "parse",
+                                self.response_reader.read_getCapabilities_res,
+                                xml_str)
+                timing.timed(timings, "save", _save_xml, savepath, xml_str)
+            else:
+                response.raw.decode_content = True
+                # The document is downloaded as it is parsed, so the parse
+                # time includes downloading it.
+                try:
+                    coverages = timing.timed(timings, "parse",
+                            self.response_reader.read_getCapabilities_stream,
+                            response.raw)
+                finally:
+                    response.close()
+                if timings is not None:
+                    timings.bytes = response.raw.tell()
+            self._cache_metadata("getCapabilities", cache_key, coverages)
+            self._finish_timing(timings)
 
         if show:
             for cov in coverages:
                 print cov
 
-        if savepath:
-            with open(savepath, "w") as outfile:
-                outfile.write(xml_str)
-
         return coverages
 
     def describeCoverage(self, coverage_id, show=True, savepath=None):
@@ -158,21 +410,371 @@ class _Requester(object):
             Coverage
 
         """
-        response = self.request_sender.send_describeCoverage_req(self,
-                                                                 coverage_id)
-        self._check_response_status(response)
-        xml_str  = response.text
-        coverage = self.response_reader.read_describeCoverage_res(xml_str)
+        coverage = self._cached_metadata("describeCoverage", coverage_id,
+                                         savepath)
+        if coverage is None:
+            timings = self._start_timing("describeCoverage")
+            response = self.request_sender.send_describeCoverage_req(
+                                           self, coverage_id, timings=timings)
+            self._check_response_status(response)
+            xml_str  = response.text
+            coverage = timing.timed(timings, "parse",
+                           self.response_reader.read_describeCoverage_res,
+                           xml_str)
+            self._cache_metadata("describeCoverage", coverage_id, coverage)
+
+            if savepath:
+                timing.timed(timings, "save", _save_xml, savepath, xml_str)
+            self._finish_timing(timings)
 
         if show:
             print coverage.print_info()
 
-        if savepath:
-            with open(savepath, "w") as outfile:
-                outfile.write(xml_str)
-
         return coverage
 
+    def describeCoverages(self, coverage_ids, batch_size=50, max_workers=1,
+                          show=False):
+        """
+        Get the details of many coverages, packing up to batch_size coverage
+        IDs into each describeCoverage request. Coverages already in the
+        metadata cache are not requested again.
+
+        Args:
+
+        * coverage_ids: list of strings
+            Available coverage IDs are printed by getCapabilities method.
+
+        Kwargs:
+
+        * batch_size: integer
+            The maximum number of coverage IDs in one request. WCS1 requests
+            may hold fewer so the request URL is not too long.
+
+        * max_workers: integer
+            The maximum number of requests in flight at once.
+
+        * show: boolean
+            If True, print out all the coverage information.
+
+        returns:
+            CoverageList, in the same order as coverage_ids.
+
+        """
+        coverages = {}
+        to_request = []
+        for cov_id in coverage_ids:
+            coverage = self._cached_metadata("describeCoverage", cov_id)
+            if coverage is not None:
+                coverages[cov_id] = coverage
+            elif cov_id not in to_request:
+                to_request.append(cov_id)
+
+        def describe_batch(batch):
+            timings = self._start_timing("describeCoverages")
+            response = self.request_sender.send_describeCoverages_req(self,
+                                           batch, timings=timings)
+            self._check_response_status(response)
+            result = timing.timed(timings, "parse",
+                         self.response_reader.read_describeCoverages_res,
+                         response.text)
+            self._finish_timing(timings)
+            return result
+
+        batches = self.request_sender.batch_coverage_ids(to_request,
+                                                         batch_size)
+        results = map_concurrently(describe_batch,
+                                   [{"batch" : batch} for batch in batches],
+                                   max_workers=max_workers)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+            for coverage in result:
+                coverages[coverage.name] = coverage
+                self._cache_metadata("describeCoverage", coverage.name,
+                                     coverage)
+
+        missing = [cov_id for cov_id in coverage_ids
+                   if cov_id not in coverages]
+        if missing:
+            raise UserWarning("No description returned for coverage(s): %s"
+                              % ", ".join(missing))
+        coverages = CoverageList([coverages[cov_id]
+                                  for cov_id in coverage_ids])
+
+        if show:
+            for coverage in coverages:
+                coverage.print_info()
+
+        return coverages
+
+    def _getCoverage_key(self, spec):
+        """
+        Return a key which is the same for getCoverage arguments giving the
+        same result, or None if the result can not be shared (e.g. it is
+        streamed or saved).
+
+        """
+        if self.request_sender is None or spec.get("stream") or \
+           spec.get("savepath") or spec.get("savepath_xml_req"):
+            return None
+        request_kwargs = dict((name, value) for name, value in spec.items()
+                              if name not in self._getCoverage_options)
+        try:
+            request = self.request_sender.make_getCoverage_request(
+                                                            **request_kwargs)
+        except Exception:
+            # getCoverage raises the error in this request's place.
+            return None
+        return (request, bool(spec.get("decode")))
+
+    def getCoverages(self, specs, max_workers=4):
+        """
+        Send many getCoverage requests concurrently. Each request is checked
+        in the same way as a single getCoverage request, but an error in one
+        request does not stop the others. Specs asking for the same request
+        (see builders/request.py), unless streamed or saved, are only sent
+        once and share the result.
+
+        Note, max_workers should not be larger than the pool_maxsize of the
+        session otherwise connections are discarded rather than reused.
+
+        Args:
+
+        * specs: list of dictionaries
+            The getCoverage arguments for each request, e.g.
+            {"coverage_id" : "UKPPBEST_Temperature", "dim_forecast" : "PT3H"}
+
+        Kwargs:
+
+        * max_workers: integer
+            The maximum number of requests in flight at once.
+
+        returns:
+            list of requests.Response, in the same order as specs. Where a
+            request failed the raised exception is in its place.
+
+        """
+        unique_specs = []
+        positions = []
+        first_positions = {}
+        for spec in specs:
+            key = self._getCoverage_key(spec)
+            if key is not None and key in first_positions:
+                positions.append(first_positions[key])
+                continue
+            if key is not None:
+                first_positions[key] = len(unique_specs)
+            positions.append(len(unique_specs))
+            unique_specs.append(spec)
+        results = map_concurrently(self.getCoverage, unique_specs,
+                                   max_workers=max_workers)
+        return [results[position] for position in positions]
+
+    def getCoverageTiles(self, coverage_id, max_cells=None, max_bytes=None,
+                         bytes_per_cell=4, times=None, max_workers=4,
+                         **kwargs):
+        """
+        Split a getCoverage request which is too large for one response into
+        tiles (see tiling.plan_tiles) and send them concurrently.
+
+        Args:
+
+        * coverage_id: string
+
+        Kwargs:
+
+        * max_cells/max_bytes: integer
+            The largest tile, in grid cells or bytes.
+
+        * bytes_per_cell: integer
+            Used with max_bytes, the size of each value.
+
+        * times: list of strings
+            The times available within a WCS2 time range, so it can be split.
+
+        * max_workers: integer
+            The maximum number of requests in flight at once.
+
+        Other kwargs are getCoverage arguments for the whole request. If no
+        bbox is given the coverage's bbox is found with describeCoverage. If
+        savepath is given each tile is saved to its own file, e.g.
+        "data_t0_r1_c2.nc" for "data.nc".
+
+        returns:
+            TilePlan and a list of the responses (or exceptions) for each of
+            its tiles.
+
+        """
+        plan = self._plan_tiles(coverage_id, max_cells, max_bytes,
+                                bytes_per_cell, times, kwargs)
+        responses = self.getCoverages([tile.kwargs for tile in plan],
+                                      max_workers=max_workers)
+        return plan, responses
+
+    def getCoverageArray(self, coverage_id, variable, grid_shape, **kwargs):
+        """
+        Return a lazy (time, y, x) array of a coverage variable, which makes
+        getCoverage requests for chunks of the array as it is indexed (see
+        lazy.LazyCoverageArray). NumPy is needed.
+
+        Args:
+
+        * coverage_id: string
+
+        * variable: string
+            The name of the NetCDF variable in the responses.
+
+        * grid_shape: tuple
+            The number of (y, x) grid cells over the bbox.
+
+        Other kwargs are passed to LazyCoverageArray, e.g. chunks, and from
+        there to getCoverage, e.g. format="NetCDF3".
+
+        returns:
+            lazy.LazyCoverageArray
+
+        """
+        from webcoverageservice.lazy import LazyCoverageArray
+        coverage = self.describeCoverage(coverage_id, show=False)
+        return LazyCoverageArray(self, coverage, variable, grid_shape,
+                                 **kwargs)
+
+    def getPointSeries(self, coverage_id, points, times, variable,
+                       time_key=None, max_span=1.0, buffer=0.1,
+                       max_workers=4, **kwargs):
+        """
+        Get the values of a coverage at many points for each of the given
+        times. Nearby points are grouped (see points.cluster_points) so each
+        group needs only one getCoverage request per time, the requests are
+        sent concurrently and the NetCDF responses are sampled at the grid
+        cells nearest the points. NumPy is needed.
+
+        Args:
+
+        * coverage_id: string
+
+        * points: list of (x, y) pairs
+            e.g. [(-3.5, 50.7), (-0.1, 51.5)] for (longitude, latitude).
+
+        * times: list of strings
+            The times, or dim_forecasts, to get values for.
+
+        * variable: string
+            The name of the NetCDF variable in the responses.
+
+        Kwargs:
+
+        * time_key: string
+            "time" or "dim_forecast", the getCoverage argument the times are
+            given as. Default is dim_forecast if they are all durations (e.g.
+            "PT3H"), otherwise time.
+
+        * max_span: float
+            The largest width or height of the area requested for a group of
+            points.
+
+        * buffer: float
+            How far each request reaches beyond its outermost points.
+
+        * max_workers: integer
+            The maximum number of requests in flight at once.
+
+        Other kwargs are passed on to getCoverage, e.g. format="NetCDF3".
+
+        returns:
+            numpy.ndarray of shape (points, times), NaN where there is no
+            value.
+
+        """
+        import numpy
+        from webcoverageservice import points as point_sampler
+        coords = numpy.asarray(points, dtype=float).reshape(-1, 2)
+        if time_key is None:
+            time_key = "dim_forecast" \
+                       if all(str(time).startswith("P") for time in times) \
+                       else "time"
+        clusters = point_sampler.cluster_points(coords, max_span, buffer)
+
+        def sample(indexes, bbox, time):
+            req_kwargs = dict(kwargs)
+            req_kwargs.update({time_key : time, "bbox" : bbox,
+                               "decode" : True})
+            dataset = self.getCoverage(coverage_id, **req_kwargs)
+            return point_sampler.sample_points(dataset, variable,
+                                               coords[indexes])
+
+        jobs = [{"indexes" : indexes, "bbox" : bbox, "time" : time}
+                for indexes, bbox in clusters for time in times]
+        results = map_concurrently(sample, jobs, max_workers=max_workers)
+        series = numpy.empty((len(coords), len(times)))
+        for job_num, (job, result) in enumerate(zip(jobs, results)):
+            if isinstance(result, Exception):
+                raise result
+            series[job["indexes"], job_num % len(times)] = result
+        return series
+
+    def _plan_tiles(self, coverage_id, max_cells, max_bytes, bytes_per_cell,
+                    times, kwargs):
+        coverage_bbox = None
+        if not kwargs.get("bbox"):
+            coverage_bbox = self.describeCoverage(coverage_id,
+                                                  show=False).bbox
+        kwargs["coverage_id"] = coverage_id
+        return tiling.plan_tiles(kwargs, max_cells=max_cells,
+                                 max_bytes=max_bytes,
+                                 bytes_per_cell=bytes_per_cell,
+                                 coverage_bbox=coverage_bbox, times=times)
+
+    def getCoverageMosaic(self, coverage_id, variable, max_cells=None,
+                          max_bytes=None, bytes_per_cell=4, times=None,
+                          max_workers=4, out=None, filename=None,
+                          **kwargs):
+        """
+        Request a coverage in tiles, as getCoverageTiles, and put the NetCDF
+        responses together into one array (see stitch.Mosaic). Each tile is
+        written into the array as soon as it arrives, so at most max_workers
+        tiles are held in memory. NumPy is needed.
+
+        Args:
+
+        * coverage_id: string
+
+        * variable: string
+            The name of the NetCDF variable to put together.
+
+        Kwargs:
+
+        * out: numpy.ndarray
+            Write into this array rather than making one.
+
+        * filename: string
+            Make the array as a memory mapped .npy file.
+
+        Other kwargs are as getCoverageTiles. The format must be NetCDF.
+
+        returns:
+            stitch.Mosaic and a list of None (or the exception raised) for
+            each of the plan's tiles.
+
+        """
+        from webcoverageservice.stitch import Mosaic
+        plan = self._plan_tiles(coverage_id, max_cells, max_bytes,
+                                bytes_per_cell, times, kwargs)
+        mosaic = Mosaic(plan, variable, out=out, filename=filename)
+
+        def get_tile(tile):
+            response = self.getCoverage(**tile.kwargs)
+            try:
+                mosaic.add(tile, response)
+            finally:
+                response.close()
+
+        results = map_concurrently(get_tile,
+                                   [{"tile" : tile} for tile in plan],
+                                   max_workers=max_workers)
+        mosaic.flush()
+        return mosaic, results
+
 
 class WCS1Requester(_Requester):
     """
@@ -193,15 +795,18 @@ class WCS1Requester(_Requester):
         key is valid. This is not entirely necessary as the same check is done
         with all requests.
 
+    Other kwargs (e.g. session) are passed on to _Requester.
+
     """
-    def __init__(self, url, api_key=None, validate_api=False):
+    def __init__(self, url, api_key=None, validate_api=False, **kwargs):
         super(WCS1Requester, self).__init__(url, "1.0", api_key,
-                                            validate_api)
+                                            validate_api, **kwargs)
 
     def getCoverage(self, coverage_id, format=None, crs=None, elevation=None,
                     bbox=None, dim_run=None, time=None, dim_forecast=None,
                     width=None, height=None, resx=None, resy=None,
-                    interpolation=None, stream=False, savepath=None):
+                    interpolation=None, stream=False, savepath=None,
+                    chunk_size=1048576, resume=False, decode=False):
         """
         Send a request to URL for data specified by the coverage name and a
         parameters. Note, this checks that given parameters are in the correct
@@ -261,25 +866,41 @@ class WCS1Requester(_Requester):
             downloaded.
 
         * savepath: string
-            Save the response to a given loaction.
+            Save the response to a given loaction. The body is streamed to
+            disk (so it is not held by the returned response) and only
+            appears under this name once complete.
+
+        * chunk_size: integer
+            The number of bytes written at a time when saving.
+
+        * resume: boolean
+            If True, a partial download of savepath left by an earlier
+            failed attempt is continued (using a HTTP Range request) if the
+            server supports it, otherwise the download starts again. A
+            failed download is left in place to be resumed.
+
+        * decode: boolean
+            If True, return the NetCDF response read into NumPy arrays (see
+            netcdf.py) rather than the response. The arrays are views onto
+            the response body (or a memory map of savepath), so it is not
+            copied or written to disk. NumPy is needed.
 
         returns
-            requests.Response
+            requests.Response, or netcdf.Dataset if decode is True
 
         """
-        response = self.request_sender.send_getCoverage_req(self, coverage_id,
+        timings = self._start_timing("getCoverage")
+        def send(headers):
+            return self.request_sender.send_getCoverage_req(self, coverage_id,
                         format=format, crs=crs, elevation=elevation, bbox=bbox,
                         dim_run=dim_run, time=time, dim_forecast=dim_forecast,
                         width=width, height=height, resx=resx, resy=resy,
-                        interpolation=interpolation, stream=stream)
-        self._check_response_status(response)
-        self._check_getCoverage_response(response)
-
-        if savepath:
-            with open(savepath, "w") as outfile:
-                outfile.write(response.content)
-
-        return response
+                        interpolation=interpolation,
+                        stream=stream or bool(savepath), headers=headers,
+                        timings=timings)
+        response = self._send_getCoverage(send, savepath, resume, timings)
+        return self._finish_getCoverage(response, savepath, chunk_size,
+                                        resume, decode, timings)
 
 class WCS2Requester(_Requester):
     """
@@ -300,11 +921,45 @@ class WCS2Requester(_Requester):
         key is valid. This is not entirely necessary as the same check is done
         with all requests.
 
+    Other kwargs (e.g. session) are passed on to _Requester.
 
     """
-    def __init__(self, url, api_key=None, validate_api=False):
+    def __init__(self, url, api_key=None, validate_api=False, **kwargs):
         super(WCS2Requester, self).__init__(url, "2.0.0", api_key,
-                                            validate_api)
+                                            validate_api, **kwargs)
+
+    def getCoverageCollections(self, show=True):
+        """
+        Send a getCapabilities request for just the Contents section and
+        return the coverage collections described by its MetOcean extension.
+
+        Kwargs:
+
+        * show: boolean
+            If True, print out all the returned collection IDs.
+
+        returns:
+            list of CoverageCollection
+
+        """
+        collections = self._cached_metadata("getCoverageCollections", None)
+        if collections is None:
+            timings = self._start_timing("getCoverageCollections")
+            response = self.request_sender.send_getCapabilities_req(
+                                           self, sections=["Contents"],
+                                           timings=timings)
+            self._check_response_status(response)
+            collections = timing.timed(timings, "parse",
+                self.response_reader.read_getCoverageCollections_res,
+                response.text)
+            self._cache_metadata("getCoverageCollections", None, collections)
+            self._finish_timing(timings)
+
+        if show:
+            for collection in collections:
+                print collection
+
+        return collections
 
     def describeCoverageCollection(self, collection_id, ref_time, show=True,
                                    savepath=None):
@@ -330,26 +985,36 @@ class WCS2Requester(_Requester):
             CoverageCollection
 
         """
-        response = self.request_sender.send_describeCoverageCollection_req(
-                                       self, collection_id, ref_time)
-        self._check_response_status(response)
-        xml_str  = response.text
-        collection = self.response_reader.read_describeCoverageCollection_res(
-                                          xml_str)
+        cache_key = (collection_id, ref_time)
+        collection = self._cached_metadata("describeCoverageCollection",
+                                           cache_key, savepath)
+        if collection is None:
+            timings = self._start_timing("describeCoverageCollection")
+            response = self.request_sender.send_describeCoverageCollection_req(
+                                           self, collection_id, ref_time,
+                                           timings=timings)
+            self._check_response_status(response)
+            xml_str  = response.text
+            collection = timing.timed(timings, "parse",
+                self.response_reader.read_describeCoverageCollection_res,
+                xml_str)
+            self._cache_metadata("describeCoverageCollection", cache_key,
+                                 collection)
+
+            if savepath:
+                timing.timed(timings, "save", _save_xml, savepath, xml_str)
+            self._finish_timing(timings)
 
         if show:
             print collection.print_info()
 
-        if savepath:
-            with open(savepath, "w") as outfile:
-                outfile.write(xml_str)
-
         return collection
 
     def getCoverage(self, coverage_id, components, format=None, elevation=None,
                     bbox=None, crs=None, time=None, width=None, height=None,
                     interpolation=None, stream=False, savepath=None,
-                    savepath_xml_req=None):
+                    savepath_xml_req=None, chunk_size=1048576,
+                    resume=False, decode=False):
         """
         Send a request to URL for data specified by the components of a
         particular coverage ID, along with parameters. Note, this checks that
@@ -398,27 +1063,43 @@ class WCS2Requester(_Requester):
             downloaded.
 
         * savepath: string
-            Save the response to a given location.
+            Save the response to a given location. The body is streamed to
+            disk (so it is not held by the returned response) and only
+            appears under this name once complete.
 
         * savepath_xml_req: string
             Save the XML posted as request to given location. Note, this is
             saved before XML is posted and hence before it is validated by the
             WCS.
 
+        * chunk_size: integer
+            The number of bytes written at a time when saving.
+
+        * resume: boolean
+            If True, a partial download of savepath left by an earlier
+            failed attempt is continued (using a HTTP Range request) if the
+            server supports it, otherwise the download starts again. A
+            failed download is left in place to be resumed.
+
+        * decode: boolean
+            If True, return the NetCDF response read into NumPy arrays (see
+            netcdf.py) rather than the response. The arrays are views onto
+            the response body (or a memory map of savepath), so it is not
+            copied or written to disk. NumPy is needed.
+
         returns
-            requests.Response
+            requests.Response, or netcdf.Dataset if decode is True
 
         """
-        response = self.request_sender.send_getCoverage_req(self, coverage_id,
+        timings = self._start_timing("getCoverage")
+        def send(headers):
+            return self.request_sender.send_getCoverage_req(self, coverage_id,
                         components, format=format, elevation=elevation,
                         bbox=bbox,  crs=crs, time=time, width=width,
                         height=height, interpolation=interpolation,
-                        stream=stream, savepath_xml_req=savepath_xml_req)
-        self._check_response_status(response)
-        self._check_getCoverage_response(response)
+                        stream=stream or bool(savepath), headers=headers,
+                        savepath_xml_req=savepath_xml_req, timings=timings)
+        response = self._send_getCoverage(send, savepath, resume, timings)
+        return self._finish_getCoverage(response, savepath, chunk_size,
+                                        resume, decode, timings)
 
-        if savepath:
-            with open(savepath, "w") as outfile:
-                outfile.write(response.content)
-
-        return response
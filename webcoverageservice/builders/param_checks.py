@@ -2,8 +2,24 @@
 Module containing checker functions for user input when building a request.
 
 """
+import datetime
+import re
+import threading
+from collections import OrderedDict
 import dateutil.parser
 
+# Strict ISO 8601 times, e.g. 2015-04-21, 2015-04-21T06:00:00Z or
+# 2015-04-21T06:00:00.5+01:00, which are sorted without dateutil.
+ISO_TIME = re.compile(r"(\d{4})-(\d{2})-(\d{2})"
+                      r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?)?"
+                      r"(?:Z|[+-]\d{2}(?::?\d{2})?)?$")
+
+# Recently sorted ISO 8601 times, least recently used first, holding at most
+# _SORTED_TIMES_SIZE entries.
+_sorted_times = OrderedDict()
+_sorted_times_lock = threading.Lock()
+_SORTED_TIMES_SIZE = 10000
+
 def check_dim_forecast(dim_fcst):
     """
     Check the dim_forecast is valid format.
@@ -44,19 +60,59 @@ def sort_grid_size(grid_size):
     except ValueError:
         raise ValueError("resx/resy values must be float like.")
 
+def _parse_iso_time(time):
+    """
+    Return a datetime for a strict ISO 8601 time string (ignoring any time
+    zone), or None if it is not one.
+
+    """
+    match = ISO_TIME.match(time)
+    if match is None:
+        return None
+    fields = [int(val) for val in match.groups()[:6] if val is not None]
+    fraction = match.group(7)
+    if fraction:
+        fields += [0] * (6 - len(fields)) + [int(fraction.ljust(6, "0"))]
+    try:
+        return datetime.datetime(*fields)
+    except ValueError:
+        # E.g. 24:00, leave these to dateutil.
+        return None
+
 def sort_time(time):
     """
     Check time string is valid time format and return in ISO format.
 
+    Times already in ISO 8601 format are sorted without dateutil, and
+    recently sorted ones are remembered, as this is called for every time in
+    bulk requests. Other times are not remembered, as dateutil fills in any
+    missing fields (e.g. the year) from the current date.
+
     """
-    try:
-        # Returns a datetime object.
-        dtime = dateutil.parser.parse(time, ignoretz=True)
-    except ValueError, AttributeError:
-        raise ValueError("Invalid time argument given: %s" % time)
+    dtime = None
+    if isinstance(time, basestring):
+        with _sorted_times_lock:
+            time_str = _sorted_times.pop(time, None)
+            if time_str is not None:
+                # Put back in as the most recently used.
+                _sorted_times[time] = time_str
+                return time_str
+        dtime = _parse_iso_time(time)
+    iso_time = dtime is not None
+    if dtime is None:
+        try:
+            # Returns a datetime object.
+            dtime = dateutil.parser.parse(time, ignoretz=True)
+        except ValueError, AttributeError:
+            raise ValueError("Invalid time argument given: %s" % time)
     time_str = dtime.isoformat()
     if time_str[-1] != "Z":
         time_str += "Z"
+    if iso_time:
+        with _sorted_times_lock:
+            _sorted_times[time] = time_str
+            while len(_sorted_times) > _SORTED_TIMES_SIZE:
+                _sorted_times.popitem(last=False)
     return time_str
 
 def check_bbox(bbox):
@@ -0,0 +1,126 @@
+"""
+Normalised, hashable getCoverage requests, made by make_getCoverage_request
+in wcs1_builder and wcs2_builder. Requests which ask for the same data
+compare (and hash) equal however their parameters were given, e.g. bbox
+values as strings or floats or times as "1/2/2015" or "2015-01-02", so
+they can be used to key caches and remove duplicate requests. The senders
+build every getCoverage request from one of these.
+
+"""
+import hashlib
+import json
+from collections import namedtuple
+from webcoverageservice.builders import param_checks as checker
+
+_FIELDS = ["wcs_version", "coverage_id", "components", "format", "crs",
+           "elevation", "bbox", "dim_run", "time", "dim_forecast", "width",
+           "height", "resx", "resy", "interpolation"]
+
+class GetCoverageRequest(namedtuple("GetCoverageRequest", _FIELDS)):
+    """
+    An immutable getCoverage request. Unused parameters are None and
+    parameters giving bounds (e.g. a WCS2 time range) are tuples.
+
+    """
+    __slots__ = ()
+
+    @property
+    def digest(self):
+        """
+        A hash of the request which, unlike hash(), is the same in every
+        process and session.
+
+        returns:
+            string
+
+        """
+        return hashlib.sha1(json.dumps(list(self))).hexdigest()
+
+    def as_kwargs(self):
+        """
+        Return the parameters as keyword arguments for build_getCoverage_req
+        (and getCoverage) of the request's WCS version.
+
+        returns:
+            dictionary
+
+        """
+        kwargs = {}
+        for name, value in zip(_FIELDS[1:], self[1:]):
+            if value is None:
+                continue
+            if isinstance(value, tuple):
+                value = list(value)
+            kwargs[name] = value
+        return kwargs
+
+
+def sort_components(components):
+    """
+    Return the components as a sorted tuple without duplicates.
+
+    """
+    if isinstance(components, basestring):
+        components = [components]
+    return tuple(sorted(set(components)))
+
+def sort_bbox(bbox):
+    """
+    Check bbox is valid and return it as a tuple of floats.
+
+    """
+    checker.check_bbox(bbox)
+    return tuple(float(val) for val in bbox)
+
+def sort_bounds(value, sort_func=str):
+    """
+    Return a single value, or a tuple for a list of 2 bounds, passed through
+    sort_func.
+
+    """
+    if isinstance(value, (list, tuple)):
+        if len(value) != 2:
+            raise UserWarning("Provide a list of 2 values if specifing "\
+                              "bounds.")
+        return tuple(sort_func(val) for val in value)
+    return sort_func(value)
+
+def make_request(wcs_version, coverage_id, components=None, format=None,
+                 crs=None, elevation=None, bbox=None, dim_run=None,
+                 time=None, dim_forecast=None, width=None, height=None,
+                 resx=None, resy=None, interpolation=None):
+    """
+    Check and normalise the parameters and return them as a
+    GetCoverageRequest. Arguments are as for build_getCoverage_req.
+
+    returns:
+        GetCoverageRequest
+
+    """
+    if components is not None:
+        components = sort_components(components)
+    if elevation:
+        elevation = sort_bounds(elevation)
+    if bbox:
+        bbox = sort_bbox(bbox)
+    if dim_run:
+        dim_run = checker.sort_time(dim_run)
+    if time:
+        time = sort_bounds(time, checker.sort_time)
+    if dim_forecast:
+        checker.check_dim_forecast(dim_forecast)
+        dim_forecast = dim_forecast.strip().upper()
+    if width:
+        width = checker.sort_grid_num(width)
+    if height:
+        height = checker.sort_grid_num(height)
+    if resx:
+        resx = checker.sort_grid_size(resx)
+    if resy:
+        resy = checker.sort_grid_size(resy)
+    return GetCoverageRequest(wcs_version, coverage_id, components,
+                              format or None, crs or None, elevation or None,
+                              bbox or None, dim_run or None, time or None,
+                              dim_forecast or None, width or None,
+                              height or None, resx or None, resy or None,
+                              interpolation or None)
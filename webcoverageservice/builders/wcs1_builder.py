@@ -2,15 +2,92 @@
 Build appropriate requests for WCS1 requests.
 
 """
+import urllib
 from webcoverageservice.builders import param_checks as checker
+from webcoverageservice.builders.request import make_request
 
-def build_getCapabilities_req():
-    return {"REQUEST" : "GetCapabilities"}
+def build_getCapabilities_req(sections=None):
+    """
+    Create a dictionary of parameters for a getCapabilities request.
+
+    Kwargs:
+
+    * sections: list of strings or None
+        Only return this section of the document, one of "Service",
+        "Capability" or "ContentMetadata" (WCS1 allows only one). Default is
+        the whole document.
+
+    returns:
+        dictionary
+
+    """
+    params = {"REQUEST" : "GetCapabilities"}
+    if sections:
+        if len(sections) != 1:
+            raise UserWarning("WCS 1.0 getCapabilities requests can only "\
+                              "ask for one section.")
+        params["SECTION"] = "/WCS_Capabilities/" + sections[0]
+    return params
 
 def build_describeCoverage_req(coverage_id):
+    """
+    Create a dictionary of parameters for a describeCoverage request.
+
+    Args:
+
+    * coverage_id: string or list
+        The coverage name, or a list of names to describe them all in one
+        request.
+
+    returns:
+        dictionary
+
+    """
+    if not isinstance(coverage_id, basestring):
+        coverage_id = ",".join(coverage_id)
     return {"REQUEST"  : "DescribeCoverage",
             "COVERAGE" : coverage_id}
 
+def batch_coverage_ids(coverage_ids, batch_size, max_length=1500):
+    """
+    Split coverage names into groups for describeCoverage requests. Each
+    group has at most batch_size names and, once URL encoded and comma
+    separated, is at most max_length characters long so the request URL
+    stays within the limits of servers and proxies.
+
+    Args:
+
+    * coverage_ids: list of strings
+
+    * batch_size: integer
+
+    Kwargs:
+
+    * max_length: integer
+
+    returns:
+        list of lists of strings
+
+    """
+    batches = []
+    batch = []
+    length = 0
+    for cov_id in coverage_ids:
+        id_length = len(urllib.quote(cov_id, safe=""))
+        if batch:
+            # An encoded comma ("%2C") separates names.
+            id_length += 3
+            if len(batch) == batch_size or length + id_length > max_length:
+                batches.append(batch)
+                batch = []
+                length = 0
+                id_length -= 3
+        batch.append(cov_id)
+        length += id_length
+    if batch:
+        batches.append(batch)
+    return batches
+
 def build_getCoverage_req(coverage_id, format=None, crs=None, elevation=None,
                           bbox=None, dim_run=None, time=None,
                           dim_forecast=None, width=None, height=None,
@@ -138,3 +215,29 @@ def build_getCoverage_req(coverage_id, format=None, crs=None, elevation=None,
         param_dict["INTERPOLATION"] = interpolation
 
     return param_dict
+
+def make_getCoverage_request(coverage_id, format=None, crs=None,
+                             elevation=None, bbox=None, dim_run=None,
+                             time=None, dim_forecast=None, width=None,
+                             height=None, resx=None, resy=None,
+                             interpolation=None):
+    """
+    Check the getCoverage parameters, as build_getCoverage_req does, and
+    return them normalised as a hashable request. Arguments are as for
+    build_getCoverage_req.
+
+    returns:
+        GetCoverageRequest
+
+    """
+    if dim_run and time and dim_forecast:
+        raise UserWarning("Cannot use more than 2 of dim_run, "\
+                          "dim_forecast or time parameters together.")
+    if (width and resx) or (height and resy):
+        raise UserWarning("Cannot specify width/height and resx/resy "\
+                          "together; one implies the other.")
+    return make_request("1.0", coverage_id, format=format, crs=crs,
+                        elevation=elevation, bbox=bbox, dim_run=dim_run,
+                        time=time, dim_forecast=dim_forecast, width=width,
+                        height=height, resx=resx, resy=resy,
+                        interpolation=interpolation)
@@ -3,10 +3,44 @@ Build appropriate requests for WCS2 requests.
 
 """
 import xml.dom.minidom as dom
+from xml.sax.saxutils import escape as xml_escape
 from webcoverageservice.builders import param_checks as checker
+from webcoverageservice.builders.request import make_request
+
+GETCOVERAGE_NAMESPACES = {
+    "xlink"    : "http://www.w3.org/1999/xlink",
+    "wcs"      : "http://www.opengis.net/wcs/2.0",
+    "wcsCRS"   : "http://www.opengis.net/wcs_service-extension_crs/1.0",
+    "int"      : "http://www.opengis.net/WCS_service-extension_interpolation/1.0",
+    "rsub"     : "http://www.opengis.net/wcs/range-subsetting/1.0",
+    "xsi"      : "http://www.w3.org/2001/XMLSchema-instance",
+    "metocean" : "http://def.wmo.int/metce/2013/metocean"}
+
+DEFAULT_CRSS = {
+    "crs0" : "http://www.opengis.net/def/crs-combine",
+    "crs1" : "http://www.opengis.net/def/crs/EPSG/0/4326",
+    "crs2" : "http://www.codes.wmo.int/GRIB2/table4.5/IsobaricSurface",
+    "crs3" : "http://www.opengis.net/def/temporal/ISO8601"}
+
+def build_getCapabilities_req(sections=None):
+    """
+    Create a dictionary of parameters for a getCapabilities request.
+
+    Kwargs:
 
-def build_getCapabilities_req():
-    return {"REQUEST" : "GetCapabilities"}
+    * sections: list of strings or None
+        Only return these sections of the document, any of
+        "ServiceIdentification", "ServiceProvider", "OperationsMetadata" and
+        "Contents". Default is the whole document.
+
+    returns:
+        dictionary
+
+    """
+    params = {"REQUEST" : "GetCapabilities"}
+    if sections:
+        params["SECTIONS"] = ",".join(sections)
+    return params
 
 def build_describeCoverageCollection_req(collection_id, ref_time):
     return {"REQUEST" : "DescribeCoverageCollection",
@@ -14,16 +48,52 @@ def build_describeCoverageCollection_req(collection_id, ref_time):
             "ReferenceTime" : ref_time}
 
 def build_describeCoverage_req(coverage_id):
+    """
+    Create an XML document for a describeCoverage request.
+
+    Args:
+
+    * coverage_id: string or list
+        The coverage ID, or a list of IDs to describe them all in one
+        request.
+
+    returns:
+        XML string
+
+    """
+    if isinstance(coverage_id, basestring):
+        coverage_id = [coverage_id]
+    cov_id_elems = "\n            ".join("<CoverageId>%s</CoverageId>"
+                                         % xml_escape(cov_id)
+                                         for cov_id in coverage_id)
     xml = """<?xml version="1.0" encoding="UTF-8"?>
         <DescribeCoverage xmlns="http://www.opengis.net/wcs/2.0"
                           xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
                           xsi:schemaLocation="http://www.opengis.net/wcs/2.0
                                 http://schemas.opengis.net/wcs/2.0/wcsAll.xsd"
                           service="WCS" version="2.0.0">
-            <CoverageId>{cov_id}</CoverageId>
-        </DescribeCoverage>""".format(cov_id=coverage_id)
+            {cov_ids}
+        </DescribeCoverage>""".format(cov_ids=cov_id_elems)
     return xml
 
+def batch_coverage_ids(coverage_ids, batch_size):
+    """
+    Split coverage IDs into groups of at most batch_size for describeCoverage
+    requests.
+
+    Args:
+
+    * coverage_ids: list of strings
+
+    * batch_size: integer
+
+    returns:
+        list of lists of strings
+
+    """
+    return [coverage_ids[i:i + batch_size]
+            for i in range(0, len(coverage_ids), batch_size)]
+
 def build_getCoverage_req(coverage_id, components, format=None, elevation=None,
                           crs=None, bbox=None, time=None, width=None,
                           height=None, interpolation=None):
@@ -129,12 +199,43 @@ def build_getCoverage_req(coverage_id, components, format=None, elevation=None,
 
     return req.toXML()
 
+def make_getCoverage_request(coverage_id, components, format=None,
+                             elevation=None, crs=None, bbox=None, time=None,
+                             width=None, height=None, interpolation=None):
+    """
+    Check the getCoverage parameters, as build_getCoverage_req does, and
+    return them normalised as a hashable request. Arguments are as for
+    build_getCoverage_req.
+
+    returns:
+        GetCoverageRequest
+
+    """
+    # The interpolation is only used when re-gridding.
+    if width or height:
+        interpolation = interpolation or "linear"
+    else:
+        interpolation = None
+    return make_request("2.0.0", coverage_id, components=components,
+                        format=format, crs=crs, elevation=elevation,
+                        bbox=bbox, time=time, width=width, height=height,
+                        interpolation=interpolation)
+
 class GetCoverageRequestBuilder(object):
     """
     Class for setting getCoverage request parameters.
 
+    Kwargs:
+
+    * writer: class
+        Writes the XML, i.e. GetCoverageRequestTemplateWriter (the default)
+        or GetCoverageRequestWriter, which builds a DOM. Both give the same
+        document.
+
     """
-    def __init__(self):
+    def __init__(self, writer=None):
+        self.writer = writer if writer is not None \
+                      else GetCoverageRequestTemplateWriter
         self.components = []
         self.crs_dict = {'crs0':None, 'crs1':None, 'crs2':None, 'crs3':None}
         self.interpolation_dict = {}
@@ -336,7 +437,7 @@ class GetCoverageRequestBuilder(object):
         Write out all parameters to XML.
 
         """
-        return GetCoverageRequestWriter().returnXml(self)
+        return self.writer().returnXml(self)
 
     def saveXML(self, filename):
         """
@@ -359,18 +460,10 @@ class GetCoverageRequestWriter(dom.Document):
     """
     def __init__(self):
         dom.Document.__init__(self)
-        self.xlink = "http://www.w3.org/1999/xlink"
-        self.wcs = "http://www.opengis.net/wcs/2.0"
-        self.wcsCRS = "http://www.opengis.net/wcs_service-extension_crs/1.0"
-        self.int = "http://www.opengis.net/WCS_service-extension_interpolation/1.0"
-        self.rsub = "http://www.opengis.net/wcs/range-subsetting/1.0"
-        self.xsi = "http://www.w3.org/2001/XMLSchema-instance"
-        self.metocean = "http://def.wmo.int/metce/2013/metocean"
-
-        self.crs0 = "http://www.opengis.net/def/crs-combine"
-        self.crs1 = "http://www.opengis.net/def/crs/EPSG/0/4326"
-        self.crs2 = "http://www.codes.wmo.int/GRIB2/table4.5/IsobaricSurface"
-        self.crs3 = "http://www.opengis.net/def/temporal/ISO8601"
+        for prefix, namespace in GETCOVERAGE_NAMESPACES.items():
+            setattr(self, prefix, namespace)
+        for crs, value in DEFAULT_CRSS.items():
+            setattr(self, crs, value)
 
     def _mkAttribute(self, name, value):
         """
@@ -825,3 +918,130 @@ class GetCoverageRequestWriter(dom.Document):
         """
         self.appendChild(self.createGetCoverageNode(request))
         return self.toxml()
+
+
+def _escape_text(value):
+    """
+    Escape text as minidom does when writing.
+
+    """
+    return xml_escape(value, {'"' : "&quot;"})
+
+class GetCoverageRequestTemplateWriter(object):
+    """
+    Write XML specifically for getCoverage request by filling in string
+    templates, avoiding building a DOM. The document is byte for byte the one
+    GetCoverageRequestWriter writes, i.e. minidom's output with attributes in
+    sorted order and no whitespace between elements.
+
+    """
+    header = '<?xml version="1.0" ?><wcs:GetCoverage%s>' % "".join(
+        ' %s="%s"' % (name, _escape_text(value))
+        for name, value in sorted(
+            [("xmlns:" + prefix, namespace)
+             for prefix, namespace in GETCOVERAGE_NAMESPACES.items()] +
+            [("service", "WCS"), ("version", "2.0.0")]))
+    footer = "</wcs:GetCoverage>"
+
+    crs_template = "{crs0}? 1={crs1}& 2={crs2}& 3={crs3}"
+
+    def _element(self, tag, text=None, unit=None):
+        """
+        Args:
+
+        * tag: string
+
+        * text: string or None
+            The element is written empty (e.g. "<tag/>") if None.
+
+        * unit: string or None
+            The uomLabels attribute.
+
+        """
+        attr = ' uomLabels="%s"' % _escape_text(unit) if unit != None else ""
+        if text is None:
+            return "<%s%s/>" % (tag, attr)
+        return "<%s%s>%s</%s>" % (tag, attr, _escape_text(text), tag)
+
+    def writeExtension(self, request):
+        """
+        Args:
+
+        * request: GetCoverageRequestBuilder
+
+        """
+        parts = ["<wcs:Extension>"]
+        if request.components:
+            parts.append("<rsub:rangeSubset>")
+            parts.extend(self._element("rsub:rangeComponent", component)
+                         for component in request.components)
+            parts.append("</rsub:rangeSubset>")
+        else:
+            parts.append("<rsub:rangeSubset/>")
+
+        crss = dict((crs, value if value != None else DEFAULT_CRSS[crs])
+                    for crs, value in request.crs_dict.items())
+        parts.append("<wcsCRS:GetCoverageCrs>%s</wcsCRS:GetCoverageCrs>"
+                     % self._element("wcsCRS:subsettingCrs",
+                                     self.crs_template.format(**crss)))
+
+        axes = []
+        for (name, (method, samplesize)) in request.interpolation_dict.items():
+            if method != None:
+                if samplesize != None:
+                    method += '/samplesize=%d'%(samplesize)
+                axes.append('<int:InterpolationAxis axis="%s" '
+                            'interpolationMethod="%s"/>'
+                            % (_escape_text(name), _escape_text(method)))
+        if axes:
+            parts.append("<int:Interpolation><int:InterpolationAxes>%s"
+                         "</int:InterpolationAxes></int:Interpolation>"
+                         % "".join(axes))
+        else:
+            parts.append("<int:Interpolation><int:InterpolationAxes/>"
+                         "</int:Interpolation>")
+        parts.append("</wcs:Extension>")
+        return "".join(parts)
+
+    def writeDim(self, name, item):
+        """
+        Args:
+
+        * name: string
+
+        * item: dict or None
+
+        """
+        if item is None:
+            return ""
+        dimension = self._element("wcs:Dimension", name)
+        if item['type'] == 'trim':
+            return "<metocean:DimensionTrim>%s%s%s</metocean:DimensionTrim>" \
+                   % (dimension,
+                      self._element("metocean:TrimLow", str(item['low']),
+                                    item['unit']),
+                      self._element("metocean:TrimHigh", str(item['high']),
+                                    item['unit']))
+        return "<metocean:DimensionSlice>%s%s</metocean:DimensionSlice>" \
+               % (dimension,
+                  self._element("metocean:SlicePoint", str(item['value']),
+                                item['unit']))
+
+    def returnXml(self, request):
+        """
+        Args:
+
+        * request: GetCoverageRequestBuilder
+
+        """
+        return "".join([self.header,
+                        self.writeExtension(request),
+                        self._element("wcs:CoverageId", request.coverageId),
+                        self.writeDim('lat', request.lat),
+                        self.writeDim('long', request.long),
+                        self.writeDim('IsobaricSurface',
+                                      request.IsobaricSurface),
+                        self.writeDim('ValidityTime', request.ValidityTime),
+                        self._element("wcs:format", request.format),
+                        self._element("wcs:mediaType", request.mediaType),
+                        self.footer])
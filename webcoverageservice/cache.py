@@ -0,0 +1,356 @@
+"""
+Module for caching WCS responses.
+
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from requests.structures import CaseInsensitiveDict
+from webcoverageservice.builders.request import GetCoverageRequest
+from webcoverageservice.download import replace_file
+
+# Request parameters which do not change the response and so are left out of
+# cache keys.
+_KEY_IGNORED_PARAMS = ["key", "KEY"]
+
+# Temporary files older than this (in seconds) were left by a writer which
+# died, rather than being written now, and are removed.
+_TMP_MAX_AGE = 3600
+
+def make_request_key(url, request):
+    """
+    Return a canonical hash for a request.
+
+    Args:
+
+    * url: string
+        URL to web coverage service.
+
+    * request: GetCoverageRequest, dictionary or string
+        The normalised getCoverage request, or the built request, i.e. the
+        KVP parameter dictionary of a GET request or the XML payload of a
+        POST request.
+
+    returns:
+        string
+
+    """
+    if isinstance(request, GetCoverageRequest):
+        request = request.digest
+    elif isinstance(request, dict):
+        request = sorted((str(name), str(val))
+                         for name, val in request.items()
+                         if name not in _KEY_IGNORED_PARAMS)
+    canonical = json.dumps([url, request])
+    return hashlib.sha1(canonical).hexdigest()
+
+
+class CachedResponse(object):
+    """
+    A response read from the cache, with the parts of the requests.Response
+    interface used for getCoverage responses. The body is only read from disk
+    when asked for.
+
+    """
+    def __init__(self, body_path, status_code, headers, url):
+        self.body_path   = body_path
+        self.status_code = status_code
+        self.headers     = CaseInsensitiveDict(headers)
+        self.url         = url
+        self.retries     = 0
+        self.from_cache  = True
+        self._content    = None
+
+    @property
+    def content(self):
+        if self._content is None:
+            with open(self.body_path, "rb") as infile:
+                self._content = infile.read()
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", "replace")
+
+    def iter_content(self, chunk_size=1):
+        if self._content is not None:
+            for i in range(0, len(self._content), chunk_size):
+                yield self._content[i:i + chunk_size]
+        else:
+            with open(self.body_path, "rb") as infile:
+                while True:
+                    chunk = infile.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    def close(self):
+        pass
+
+
+class ResponseCache(object):
+    """
+    On disk cache of responses, keyed by a hash of the normalised request
+    (see make_request_key). Several processes may share the same directory; every
+    file is written to a temporary name and renamed into place, so readers
+    only ever see complete entries (on Windows an entry being replaced is
+    briefly missing, which is a cache miss).
+
+    Args:
+
+    * directory: string
+        Where cached responses are kept. It is created if it does not exist.
+
+    Kwargs:
+
+    * max_bytes: integer
+        When the cached bodies exceed this size the least recently used
+        entries are removed.
+
+    * ttls: dictionary
+        The number of seconds responses for each operation (e.g.
+        "getCoverage") are kept. Operations not given are not cached.
+
+    """
+    def __init__(self, directory, max_bytes=1073741824,
+                 ttls={"getCoverage" : 86400}):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls      = dict(ttls)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Another process may have just created it.
+                if not os.path.isdir(directory):
+                    raise
+
+    def _paths(self, key):
+        path = os.path.join(self.directory, key)
+        return path + ".body", path + ".json"
+
+    def _write_atomic(self, path, chunks):
+        """
+        Write the chunks to a temporary file then move it to path.
+
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as outfile:
+                for chunk in chunks:
+                    outfile.write(chunk)
+            replace_file(tmp_path, path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def caches(self, operation):
+        """
+        Return True if responses for the operation are cached.
+
+        """
+        return operation in self.ttls
+
+    def get(self, operation, key):
+        """
+        Return the cached response, or None if there is no entry for the key
+        or it has expired.
+
+        returns:
+            CachedResponse or None
+
+        """
+        body_path, info_path = self._paths(key)
+        try:
+            with open(info_path, "r") as infile:
+                info = json.load(infile)
+            if time.time() - info["created"] > self.ttls[operation]:
+                return None
+            # The modified time of the info file records the last use.
+            os.utime(info_path, None)
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        return CachedResponse(body_path, info["status_code"], info["headers"],
+                              info["url"])
+
+    def put(self, operation, key, response, chunk_size=1048576):
+        """
+        Store the response, reading its body in chunks. As the body is then
+        consumed, a response read back from the cache is returned to use
+        in its place.
+
+        returns:
+            CachedResponse
+
+        """
+        body_path, info_path = self._paths(key)
+        self._write_atomic(body_path,
+                           response.iter_content(chunk_size=chunk_size))
+        info = {"operation"   : operation,
+                "created"     : time.time(),
+                "status_code" : response.status_code,
+                "headers"     : dict(response.headers),
+                "url"         : response.url}
+        self._write_atomic(info_path, [json.dumps(info)])
+        self.evict()
+        return CachedResponse(body_path, info["status_code"], info["headers"],
+                              info["url"])
+
+    def _sweep_tmp(self):
+        """
+        Remove temporary files orphaned by writers which died.
+
+        """
+        oldest = time.time() - _TMP_MAX_AGE
+        for name in os.listdir(self.directory):
+            if not name.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < oldest:
+                    os.remove(path)
+            except OSError:
+                # Another process has renamed or removed it.
+                pass
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache is within
+        max_bytes, and any orphaned temporary files.
+
+        """
+        self._sweep_tmp()
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            body_path, info_path = self._paths(name[:-len(".json")])
+            try:
+                size = os.path.getsize(body_path)
+                last_used = os.path.getmtime(info_path)
+            except OSError:
+                continue
+            entries.append((last_used, body_path, info_path))
+            total += size
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, body_path, info_path = entries.pop(0)
+            try:
+                size = os.path.getsize(body_path)
+                # Remove the info file first so the entry is never seen
+                # without its body.
+                os.remove(info_path)
+                os.remove(body_path)
+            except OSError:
+                # Another process has removed it.
+                continue
+            total -= size
+
+    def clear(self):
+        """
+        Remove all entries, and any orphaned temporary files.
+
+        """
+        self._sweep_tmp()
+        for name in os.listdir(self.directory):
+            if name.endswith(".json") or name.endswith(".body"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class MetadataCache(object):
+    """
+    In memory cache of parsed metadata, i.e. the CoverageList, Coverage and
+    CoverageCollection objects returned by getCapabilities, describeCoverage
+    and describeCoverageCollection. The cached objects are returned
+    themselves (not copies), so they should not be modified.
+
+    Kwargs:
+
+    * ttls: dictionary
+        The number of seconds results for each operation are kept.
+        Operations not given are not cached.
+
+    * max_entries: integer
+        When there are more entries than this the least recently used are
+        removed.
+
+    * clock: callable
+        Returns the current time in seconds.
+
+    """
+    def __init__(self, ttls={"getCapabilities"            : 3600,
+                             "getCoverageCollections"     : 3600,
+                             "describeCoverage"           : 3600,
+                             "describeCoverageCollection" : 3600},
+                 max_entries=1000, clock=time.time):
+        self.ttls        = dict(ttls)
+        self.max_entries = max_entries
+        self.clock       = clock
+        self.hits        = 0
+        self.misses      = 0
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, operation, key):
+        """
+        Return the cached result, or None if there is none or it has expired.
+
+        """
+        if operation not in self.ttls:
+            return None
+        with self._lock:
+            entry = self._entries.pop((operation, key), None)
+            if entry is None or \
+               self.clock() - entry[0] > self.ttls[operation]:
+                self.misses += 1
+                return None
+            # Put back in as the most recently used.
+            self._entries[(operation, key)] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(self, operation, key, value):
+        """
+        Store the result of the operation.
+
+        """
+        if operation not in self.ttls:
+            return
+        with self._lock:
+            self._entries.pop((operation, key), None)
+            self._entries[(operation, key)] = (self.clock(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, operation=None, key=None):
+        """
+        Remove cached results, e.g. when a new model run is available. With
+        no arguments everything is removed, given just an operation all
+        results of that operation are removed. Requesters key their results
+        as (url, wcs_version, key), e.g. key is the coverage id for
+        describeCoverage.
+
+        """
+        with self._lock:
+            if operation is None:
+                self._entries.clear()
+            elif key is None:
+                for entry_key in self._entries.keys():
+                    if entry_key[0] == operation:
+                        del self._entries[entry_key]
+            else:
+                self._entries.pop((operation, key), None)
@@ -0,0 +1,53 @@
+"""
+Module for running many requests concurrently on a bounded pool of threads.
+
+"""
+from multiprocessing.pool import ThreadPool
+
+def _call_safely(func_args):
+    """
+    Call the function with the given keyword arguments. Any exception raised
+    is returned rather than raised so that one failure does not abort the
+    others.
+
+    """
+    func, kwargs = func_args
+    try:
+        return func(**kwargs)
+    except Exception, err:
+        return err
+
+def map_concurrently(func, kwargs_list, max_workers=4):
+    """
+    Call func once for each dictionary of keyword arguments, using at most
+    max_workers threads.
+
+    Args:
+
+    * func: callable
+
+    * kwargs_list: list of dictionaries
+        The keyword arguments for each call.
+
+    Kwargs:
+
+    * max_workers: integer
+        The maximum number of calls running at once.
+
+    returns:
+        list of results, in the same order as kwargs_list. Where a call
+        raised an exception the exception instance is in its place.
+
+    """
+    kwargs_list = list(kwargs_list)
+    if not kwargs_list:
+        return []
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    pool = ThreadPool(min(max_workers, len(kwargs_list)))
+    try:
+        return pool.map(_call_safely,
+                        [(func, kwargs) for kwargs in kwargs_list])
+    finally:
+        pool.close()
+        pool.join()
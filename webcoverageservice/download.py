@@ -0,0 +1,189 @@
+"""
+Module for saving getCoverage responses to disk, optionally resuming
+interrupted downloads with HTTP Range requests.
+
+A download is written to "<savepath>.part" and only renamed to savepath once
+complete. For resumable downloads the validators needed to resume (whether
+the server accepts ranges, the ETag, the Last-Modified date and the full
+length) are kept alongside in "<savepath>.part.json".
+
+"""
+import json
+import os
+import re
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+def replace_file(src, dst, attempts=3):
+    """
+    Move src to dst, replacing any existing file. On POSIX this is a single
+    atomic rename. Windows does not allow renaming over an existing file, so
+    there dst is removed first and is missing until the rename; readers must
+    treat a missing file as not there yet (e.g. a cache miss). Another
+    process may put dst back in between, so the rename is retried.
+
+    """
+    for attempt in range(attempts):
+        try:
+            os.rename(src, dst)
+            return
+        except OSError:
+            if attempt == attempts - 1 or not os.path.exists(dst):
+                raise
+        try:
+            os.remove(dst)
+        except OSError:
+            # Another process has just removed it.
+            pass
+
+def _part_paths(savepath):
+    part_path = savepath + ".part"
+    return part_path, part_path + ".json"
+
+def _read_part_info(savepath):
+    """
+    Return the size of the partial download and its validators, or None if
+    there is no partial download which can be resumed.
+
+    """
+    part_path, info_path = _part_paths(savepath)
+    if not (os.path.exists(part_path) and os.path.exists(info_path)):
+        return None
+    try:
+        with open(info_path, "r") as infile:
+            info = json.load(infile)
+    except ValueError:
+        return None
+    if not info.get("accept_ranges"):
+        return None
+    return os.path.getsize(part_path), info
+
+def discard_partial(savepath):
+    """
+    Remove any partial download (and its validators) for savepath.
+
+    """
+    for path in _part_paths(savepath):
+        if os.path.exists(path):
+            os.remove(path)
+
+def resume_headers(savepath):
+    """
+    Return the request headers needed to continue a partial download of
+    savepath, or None if the download must start from the beginning.
+
+    """
+    part_info = _read_part_info(savepath)
+    if part_info is None or part_info[0] == 0:
+        return None
+    size, info = part_info
+    headers = {"Range" : "bytes=%d-" % size}
+    if info.get("etag"):
+        headers["If-Range"] = info["etag"]
+    elif info.get("last_modified"):
+        headers["If-Range"] = info["last_modified"]
+    return headers
+
+def check_resumed_response(response, savepath):
+    """
+    Check a response to a Range request leaves the partial download of
+    savepath usable. It does not if the range is not satisfiable (416) or a
+    206 response does not continue it exactly. A 200 response (the server
+    has ignored the range and is sending the whole body) is fine, as is any
+    other status: that is an error for the caller to raise, and the partial
+    download is kept for a later attempt.
+
+    returns:
+        boolean
+
+    """
+    if response.status_code == 416:
+        return False
+    if response.status_code != 206:
+        return True
+    part_info = _read_part_info(savepath)
+    match = CONTENT_RANGE.match(response.headers.get("content-range", ""))
+    if part_info is None or match is None:
+        return False
+    size, info = part_info
+    if int(match.group(1)) != size:
+        return False
+    total = match.group(3)
+    if total != "*" and info.get("length") is not None and \
+       int(total) != info["length"]:
+        return False
+    for header, key in [("etag", "etag"), ("last-modified", "last_modified")]:
+        value = response.headers.get(header)
+        if value and info.get(key) and value != info[key]:
+            return False
+    return True
+
+def _write_part_info(response, savepath):
+    """
+    Record the validators of a fresh download so it can later be resumed.
+
+    """
+    headers = response.headers
+    length = headers.get("content-length")
+    # A content encoded (e.g. gzip) body is decoded as it is written so its
+    # size on disk does not match the byte ranges of the server.
+    info = {"accept_ranges" : headers.get("accept-ranges") == "bytes" and
+                              not headers.get("content-encoding"),
+            "etag"          : headers.get("etag"),
+            "last_modified" : headers.get("last-modified"),
+            "length"        : int(length) if length else None}
+    with open(_part_paths(savepath)[1], "w") as outfile:
+        json.dump(info, outfile)
+    return info["length"]
+
+def save_response(response, savepath, chunk_size, resume=False):
+    """
+    Stream the response body to file in chunks, so the whole body is never
+    held in memory.
+
+    Args:
+
+    * response: requests.Response
+
+    * savepath: string
+
+    * chunk_size: integer
+        The number of bytes written at a time.
+
+    Kwargs:
+
+    * resume: boolean
+        If True, a 206 response is appended to the existing partial download
+        and, if the download fails, the partial download is kept so it can be
+        resumed. Otherwise the partial download is removed on failure.
+
+    """
+    part_path, info_path = _part_paths(savepath)
+    if resume and response.status_code == 206:
+        mode = "ab"
+        total = CONTENT_RANGE.match(response.headers["content-range"])\
+                .group(3)
+        expected_size = None if total == "*" else int(total)
+    else:
+        mode = "wb"
+        if resume:
+            expected_size = _write_part_info(response, savepath)
+        else:
+            expected_size = None
+    try:
+        with open(part_path, mode) as outfile:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                outfile.write(chunk)
+        if expected_size is not None and \
+           os.path.getsize(part_path) != expected_size:
+            raise IOError("Download of %s incomplete, %s of %s bytes "\
+                          "received." % (savepath,
+                                         os.path.getsize(part_path),
+                                         expected_size))
+    except:
+        if not resume:
+            discard_partial(savepath)
+        raise
+    if os.path.exists(info_path):
+        os.remove(info_path)
+    replace_file(part_path, savepath)
@@ -0,0 +1,291 @@
+"""
+Module for indexing a coverage like a NumPy array, with only the parts used
+being requested.
+
+The array is split into chunks on a fixed grid. Indexing works out which
+chunks are needed, requests those not already held concurrently (one
+getCoverage request each) and keeps the most recently used chunks so
+repeated indexing is served locally.
+
+NumPy is needed to use this module.
+
+"""
+import threading
+from collections import OrderedDict
+import numpy
+from webcoverageservice.concurrency import map_concurrently
+from webcoverageservice.stitch import orient_grid
+
+class ChunkCache(object):
+    """
+    Least recently used cache of chunk arrays.
+
+    Kwargs:
+
+    * max_chunks: integer
+        When there are more chunks than this the least recently used are
+        removed.
+
+    """
+    def __init__(self, max_chunks=64):
+        self.max_chunks = max_chunks
+        self.hits       = 0
+        self.misses     = 0
+        self._chunks    = OrderedDict()
+        self._lock      = threading.Lock()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __contains__(self, index):
+        return index in self._chunks
+
+    def get(self, index):
+        with self._lock:
+            chunk = self._chunks.pop(index, None)
+            if chunk is None:
+                self.misses += 1
+                return None
+            self._chunks[index] = chunk
+            self.hits += 1
+            return chunk
+
+    def put(self, index, chunk):
+        with self._lock:
+            self._chunks.pop(index, None)
+            self._chunks[index] = chunk
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+
+
+def _axis_indices(key, length):
+    """
+    Return the indices selected along an axis of the given length by an
+    integer or slice, and whether the axis is kept.
+
+    """
+    if isinstance(key, slice):
+        return numpy.arange(*key.indices(length)), True
+    try:
+        index = int(key)
+    except TypeError:
+        raise TypeError("Only integers and slices can index a "\
+                        "LazyCoverageArray.")
+    if index < 0:
+        index += length
+    if not 0 <= index < length:
+        raise IndexError("Index %s out of range for axis of length %s."
+                         % (key, length))
+    return numpy.array([index]), False
+
+
+class LazyCoverageArray(object):
+    """
+    A (time, y, x) array of one variable of a coverage, requested chunk by
+    chunk with getCoverage as it is indexed. The y axis runs from the y-min
+    edge of the bounding box. Indexing with integers and slices returns a
+    numpy.ndarray.
+
+    Args:
+
+    * requester: WCS1Requester or WCS2Requester
+
+    * coverage: Coverage
+        From describeCoverage, giving the name, bbox and times.
+
+    * variable: string
+        The name of the NetCDF variable in the responses.
+
+    * grid_shape: tuple
+        The number of (y, x) grid cells over the bbox. Each chunk is
+        requested with the matching width and height.
+
+    Kwargs:
+
+    * bbox: list
+        The area of the array, default is the coverage's bbox.
+
+    * time_key: string
+        "time" or "dim_forecast", the getCoverage argument indexed by the
+        time axis. Default is dim_forecast if the coverage has
+        dim_forecasts, otherwise time.
+
+    * times: list of strings
+        The values along the time axis, default is the coverage's times or
+        dim_forecasts.
+
+    * chunks: tuple
+        The (time, y, x) size of each chunk. A chunk with more than one time
+        is requested with a [first, last] time range, which only WCS2
+        supports.
+
+    * max_chunks: integer
+        The number of chunks kept in memory.
+
+    * max_workers: integer
+        The maximum number of chunk requests in flight at once.
+
+    Other kwargs (e.g. format, elevation or components) are passed to every
+    getCoverage request.
+
+    """
+    def __init__(self, requester, coverage, variable, grid_shape, bbox=None,
+                 time_key=None, times=None, chunks=(1, 256, 256),
+                 max_chunks=64, max_workers=4, **kwargs):
+        if time_key is None:
+            time_key = "dim_forecast" if coverage.dim_forecasts else "time"
+        if times is None:
+            times = getattr(coverage, time_key + "s")
+        if not times:
+            raise UserWarning("No %ss to index, give times." % time_key)
+        if chunks[0] > 1 and time_key == "dim_forecast":
+            raise UserWarning("Only one dim_forecast can be requested at "\
+                              "once, chunks must have a time size of 1.")
+        self.requester   = requester
+        self.coverage    = coverage
+        self.variable    = variable
+        self.bbox        = [float(val) for val in (bbox or coverage.bbox)]
+        self.time_key    = time_key
+        self.times       = list(times)
+        self.shape       = (len(self.times),) + tuple(grid_shape)
+        self.chunks      = tuple(chunks)
+        self.cache       = ChunkCache(max_chunks)
+        self.max_workers = max_workers
+        self.kwargs      = kwargs
+        self.dtype       = None
+
+    ndim = 3
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def cell_size(self):
+        """
+        The (y, x) size of a grid cell.
+
+        """
+        return ((self.bbox[3] - self.bbox[1]) / self.shape[1],
+                (self.bbox[2] - self.bbox[0]) / self.shape[2])
+
+    @property
+    def y_points(self):
+        return self.bbox[1] + self.cell_size[0] * \
+               (numpy.arange(self.shape[1]) + 0.5)
+
+    @property
+    def x_points(self):
+        return self.bbox[0] + self.cell_size[1] * \
+               (numpy.arange(self.shape[2]) + 0.5)
+
+    def _chunk_bounds(self, index):
+        """
+        Return the (start, stop) of the chunk along each axis.
+
+        """
+        return [(i * size, min((i + 1) * size, length))
+                for i, size, length in zip(index, self.chunks, self.shape)]
+
+    def chunk_kwargs(self, index):
+        """
+        Return the getCoverage keyword arguments for the chunk at the given
+        (time, y, x) chunk index.
+
+        """
+        (t0, t1), (y0, y1), (x0, x1) = self._chunk_bounds(index)
+        cell_y, cell_x = self.cell_size
+        kwargs = dict(self.kwargs)
+        kwargs.update({"coverage_id" : self.coverage.name,
+                       "bbox" : [self.bbox[0] + x0 * cell_x,
+                                 self.bbox[1] + y0 * cell_y,
+                                 self.bbox[0] + x1 * cell_x,
+                                 self.bbox[1] + y1 * cell_y],
+                       "width" : x1 - x0,
+                       "height" : y1 - y0,
+                       "decode" : True})
+        times = self.times[t0:t1]
+        kwargs[self.time_key] = times[0] if len(times) == 1 \
+                                else [times[0], times[-1]]
+        return kwargs
+
+    def _fetch_chunk(self, index):
+        dataset = self.requester.getCoverage(**self.chunk_kwargs(index))
+        try:
+            variable = dataset.variables[self.variable]
+        except KeyError:
+            raise UserWarning("No %s variable in the response." %
+                              self.variable)
+        data = orient_grid(dataset, variable)
+        if data.ndim == 2:
+            data = data[numpy.newaxis]
+        expected = tuple(stop - start for start, stop
+                         in self._chunk_bounds(index))
+        if data.shape != expected:
+            raise ValueError("Chunk %s has shape %s, %s was expected."
+                             % (index, data.shape, expected))
+        # Copy into native byte order so the response can be released.
+        chunk = numpy.array(data, dtype=data.dtype.newbyteorder("="))
+        self.cache.put(index, chunk)
+        return chunk
+
+    def get_chunks(self, indexes):
+        """
+        Return the chunks at the given chunk indexes, requesting those not in
+        the cache concurrently.
+
+        returns:
+            dictionary of chunk index to numpy.ndarray
+
+        """
+        chunks = {}
+        missing = []
+        for index in indexes:
+            chunk = self.cache.get(index)
+            if chunk is None:
+                missing.append(index)
+            else:
+                chunks[index] = chunk
+        results = map_concurrently(self._fetch_chunk,
+                                   [{"index" : index} for index in missing],
+                                   max_workers=self.max_workers)
+        for index, result in zip(missing, results):
+            if isinstance(result, Exception):
+                raise result
+            chunks[index] = result
+        return chunks
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > self.ndim:
+            raise IndexError("Too many indices for a %s dimensional array."
+                             % self.ndim)
+        key = key + (slice(None),) * (self.ndim - len(key))
+        selections = [_axis_indices(axis_key, length)
+                      for axis_key, length in zip(key, self.shape)]
+        indices = [selected for selected, _ in selections]
+
+        # For each axis, the chunk of each selected index.
+        axis_chunks = [selected // size
+                       for selected, size in zip(indices, self.chunks)]
+        needed = sorted(set((int(t), int(y), int(x))
+                            for t in numpy.unique(axis_chunks[0])
+                            for y in numpy.unique(axis_chunks[1])
+                            for x in numpy.unique(axis_chunks[2])))
+        chunks = self.get_chunks(needed)
+
+        dtype = chunks[needed[0]].dtype if needed else numpy.float64
+        self.dtype = dtype
+        out = numpy.empty([len(selected) for selected in indices],
+                          dtype=dtype)
+        for index, chunk in chunks.items():
+            out_pos = []
+            chunk_pos = []
+            for axis in range(self.ndim):
+                in_chunk = axis_chunks[axis] == index[axis]
+                out_pos.append(numpy.nonzero(in_chunk)[0])
+                chunk_pos.append(indices[axis][in_chunk] -
+                                 index[axis] * self.chunks[axis])
+            out[numpy.ix_(*out_pos)] = chunk[numpy.ix_(*chunk_pos)]
+        keep = tuple(slice(None) if kept else 0 for _, kept in selections)
+        return out[keep]
@@ -0,0 +1,353 @@
+"""
+Module for counting the requests made by requesters and how long they take,
+in a form which can be exposed to Prometheus.
+
+Give a ClientMetrics to a requester (its metrics keyword argument) and it is
+fed as requests are sent: requests by operation, WCS version and status
+code, retries, bytes sent and received, cache hits, requests in flight and
+histograms of how long each operation and each stage of it takes (see
+timing.py). Several requesters can share one ClientMetrics. Its render
+method gives the Prometheus text exposition format, e.g. for a /metrics
+page.
+
+"""
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        if value == float("-inf"):
+            return "-Inf"
+        if value != value:
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n")\
+                     .replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = ['%s="%s"' % (name, _escape_label(value))
+             for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append('%s="%s"' % extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(pairs)
+
+
+class _Metric(object):
+    """
+    A metric with a value for each combination of label values.
+
+    """
+    type_name = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name      = name
+        self.help_text = help_text
+        self.labels    = tuple(labels)
+        self._values   = {}
+        self._lock     = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError("%s takes the labels %s, not %s."
+                             % (self.name, ", ".join(self.labels),
+                                ", ".join(sorted(labels))))
+        return tuple(labels[name] for name in self.labels)
+
+    def value(self, **labels):
+        """
+        Return the value for the given label values (0 if there is none).
+
+        """
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+    def _sample_lines(self, key, value):
+        return ["%s%s %s" % (self.name, _format_labels(self.labels, key),
+                             _format_value(value))]
+
+    def render(self):
+        """
+        returns:
+            list of lines in the Prometheus text exposition format.
+
+        """
+        lines = ["# HELP %s %s" % (self.name,
+                                   self.help_text.replace("\\", "\\\\")
+                                                 .replace("\n", "\\n")),
+                 "# TYPE %s %s" % (self.name, self.type_name)]
+        for key, value in self._items():
+            lines.extend(self._sample_lines(key, value))
+        return lines
+
+
+class Counter(_Metric):
+    """
+    A count which only goes up.
+
+    """
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can not go down.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    A value which goes up and down, e.g. the number of requests in flight.
+
+    """
+    type_name = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Counts of observed values (e.g. durations in seconds) at or below each
+    bucket's upper bound, with their sum and count.
+
+    Kwargs:
+
+    * buckets: sequence of numbers
+        The upper bounds of the buckets, in increasing order. A +Inf bucket
+        is always added.
+
+    """
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        if "le" in labels:
+            raise ValueError("The le label is used by the buckets.")
+        if list(buckets) != sorted(buckets):
+            raise ValueError("Buckets must be in increasing order.")
+        super(Histogram, self).__init__(name, help_text, labels)
+        self.buckets = tuple(float(bound) for bound in buckets)
+        if not self.buckets or self.buckets[-1] != float("inf"):
+            self.buckets += (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def value(self, **labels):
+        """
+        Return the (count, sum) of the observed values for the given label
+        values.
+
+        """
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (0, 0.0) if state is None else (state[2], state[1])
+
+    def _sample_lines(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append("%s_bucket%s %s" % (self.name,
+                         _format_labels(self.labels, key,
+                                        ("le", _format_value(bound))),
+                         cumulative))
+        labels = _format_labels(self.labels, key)
+        lines.append("%s_sum%s %s" % (self.name, labels,
+                                      _format_value(total)))
+        lines.append("%s_count%s %s" % (self.name, labels, count))
+        return lines
+
+    def _items(self):
+        # Copy each state under the lock, as observe changes them in place.
+        with self._lock:
+            return sorted((key, [list(state[0]), state[1], state[2]])
+                          for key, state in self._values.items())
+
+
+class MetricsRegistry(object):
+    """
+    A set of metrics rendered together.
+
+    """
+    def __init__(self):
+        self._metrics = []
+        self._names   = {}
+        self._lock    = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric, or return the existing metric of the same name and
+        type.
+
+        """
+        with self._lock:
+            existing = self._names.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or \
+                   existing.labels != metric.labels:
+                    raise ValueError("A different metric called %s is "\
+                                     "already registered." % metric.name)
+                return existing
+            self._names[metric.name] = metric
+            self._metrics.append(metric)
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def get(self, name):
+        return self._names.get(name)
+
+    def render(self):
+        """
+        returns:
+            string, all metrics in the Prometheus text exposition format.
+
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ClientMetrics(object):
+    """
+    The metrics of the requests made by requesters. Pass it to a requester as
+    its metrics keyword argument.
+
+    Kwargs:
+
+    * registry: MetricsRegistry or None
+        The registry to add the metrics to, e.g. one shared with other parts
+        of a service. Default is a new registry.
+
+    * prefix: string
+        The start of each metric's name.
+
+    * buckets: sequence of numbers
+        The upper bounds (in seconds) of the duration histogram buckets.
+
+    """
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry=None, prefix="wcs_client",
+                 buckets=DEFAULT_BUCKETS):
+        if registry is None:
+            registry = MetricsRegistry()
+        self.registry = registry
+        op_labels = ("operation", "version")
+        self.requests = registry.counter(prefix + "_requests_total",
+            "HTTP requests sent, by status code (error if no response).",
+            op_labels + ("status",))
+        self.retries = registry.counter(prefix + "_retries_total",
+            "Requests retried by the retry policy.", op_labels)
+        self.request_bytes = registry.counter(prefix + "_request_bytes_total",
+            "Bytes of request parameters and payloads sent.", op_labels)
+        self.response_bytes = registry.counter(
+            prefix + "_response_bytes_total",
+            "Bytes of response bodies received.", op_labels)
+        self.cache_hits = registry.counter(prefix + "_cache_hits_total",
+            "Operations answered by the response or metadata cache.",
+            op_labels + ("cache",))
+        self.in_flight = registry.gauge(prefix + "_requests_in_flight",
+            "HTTP requests waiting for a response.", op_labels)
+        self.duration = registry.histogram(
+            prefix + "_operation_duration_seconds",
+            "Time taken by successful operations.", op_labels, buckets)
+        self.stage_duration = registry.histogram(
+            prefix + "_stage_duration_seconds",
+            "Time taken by each stage of successful operations.",
+            op_labels + ("stage",), buckets)
+
+    def request_started(self, operation, version):
+        self.in_flight.inc(operation=operation, version=version)
+
+    def request_finished(self, operation, version, status, retries=0,
+                         request_bytes=0):
+        """
+        Record the end of a HTTP request, status being the status code or
+        "error" if no response was received.
+
+        """
+        self.in_flight.dec(operation=operation, version=version)
+        self.requests.inc(operation=operation, version=version,
+                          status=status)
+        if retries:
+            self.retries.inc(retries, operation=operation, version=version)
+        if request_bytes:
+            self.request_bytes.inc(request_bytes, operation=operation,
+                                   version=version)
+
+    def cache_hit(self, operation, version, cache):
+        self.cache_hits.inc(operation=operation, version=version,
+                            cache=cache)
+
+    def __call__(self, timings):
+        """
+        Record a timing.Timings record. The requester registers this as a
+        timing hook.
+
+        """
+        labels = {"operation" : timings.operation,
+                  "version" : timings.wcs_version}
+        if timings.total is not None:
+            self.duration.observe(timings.total, **labels)
+        for stage, seconds in timings.durations().items():
+            if stage != "total":
+                self.stage_duration.observe(seconds, stage=stage, **labels)
+        if timings.bytes:
+            self.response_bytes.inc(timings.bytes, **labels)
+        if timings.from_cache:
+            self.cache_hit(cache="response", **labels)
+
+    def render(self):
+        """
+        returns:
+            string, the metrics in the Prometheus text exposition format
+            (served with the content_type attribute as Content-Type).
+
+        """
+        return self.registry.render()
@@ -0,0 +1,322 @@
+"""
+Module for reading NetCDF getCoverage responses into NumPy arrays.
+
+NetCDF3 (classic and 64 bit offset) responses are read directly, the
+variables' data being views onto the response body or a memory map of the
+saved file, so nothing is copied until it is used. NetCDF4 responses are read
+with the netCDF4 package, if it is installed.
+
+NumPy is needed to use this module.
+
+"""
+import struct
+from collections import OrderedDict
+import numpy
+
+NC_DIMENSION = 10
+NC_VARIABLE  = 11
+NC_ATTRIBUTE = 12
+
+NC_TYPES = {1 : numpy.dtype(">i1"),
+            2 : numpy.dtype("S1"),
+            3 : numpy.dtype(">i2"),
+            4 : numpy.dtype(">i4"),
+            5 : numpy.dtype(">f4"),
+            6 : numpy.dtype(">f8")}
+
+HDF5_MAGIC = "\x89HDF"
+
+class Variable(object):
+    """
+    A variable of a NetCDF file.
+
+    Args:
+
+    * name: string
+
+    * dimensions: tuple of strings
+        The names of the variable's dimensions.
+
+    * attributes: dictionary
+
+    * data: numpy.ndarray
+        The raw values, i.e. without scale_factor etc. applied.
+
+    """
+    def __init__(self, name, dimensions, attributes, data):
+        self.name       = name
+        self.dimensions = dimensions
+        self.attributes = attributes
+        self.data       = data
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __repr__(self):
+        return "<Variable %s%s>" % (self.name, self.shape)
+
+    def decode(self):
+        """
+        Return the values with scale_factor and add_offset applied and
+        _FillValue/missing_value values masked.
+
+        returns:
+            numpy.ma.MaskedArray
+
+        """
+        data = self.data
+        mask = numpy.zeros(data.shape, dtype=bool)
+        for attr in ["_FillValue", "missing_value"]:
+            if attr in self.attributes:
+                mask |= data == self.attributes[attr]
+        scale = self.attributes.get("scale_factor")
+        offset = self.attributes.get("add_offset")
+        if scale is not None or offset is not None:
+            data = data * (1 if scale is None else scale) + \
+                   (0 if offset is None else offset)
+        return numpy.ma.MaskedArray(data, mask=mask)
+
+
+class Dataset(object):
+    """
+    The dimensions, variables and global attributes of a NetCDF file.
+
+    """
+    def __init__(self, dimensions, variables, attributes):
+        self.dimensions = dimensions
+        self.variables  = variables
+        self.attributes = attributes
+
+    def __getitem__(self, name):
+        return self.variables[name]
+
+    def coordinates(self, name):
+        """
+        Return the coordinate values along each dimension of a variable, for
+        the dimensions which have a coordinate variable.
+
+        Args:
+
+        * name: string
+            The variable name.
+
+        returns:
+            OrderedDict of dimension name to numpy.ndarray
+
+        """
+        coords = OrderedDict()
+        for dim in self.variables[name].dimensions:
+            coord = self.variables.get(dim)
+            if coord is not None and coord.dimensions == (dim,):
+                coords[dim] = coord.data
+        return coords
+
+
+class _HeaderParser(object):
+    """
+    Parse the header of a NetCDF3 file held in buf (a string or a uint8
+    array).
+
+    """
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+
+    def read(self, size):
+        data = self.buf[self.pos:self.pos + size]
+        if isinstance(data, numpy.ndarray):
+            data = data.tostring()
+        if len(data) != size:
+            raise ValueError("NetCDF header is truncated.")
+        self.pos += size
+        return data
+
+    def read_int(self):
+        return struct.unpack(">i", self.read(4))[0]
+
+    def read_offset(self, size):
+        return struct.unpack(">q" if size == 8 else ">i", self.read(size))[0]
+
+    def read_name(self):
+        length = self.read_int()
+        name = self.read(length)
+        self.read(-length % 4)
+        return name
+
+    def read_list(self, tag, read_item):
+        list_tag = self.read_int()
+        count = self.read_int()
+        if list_tag == 0 and count == 0:
+            return []
+        if list_tag != tag:
+            raise ValueError("Unexpected tag %s in NetCDF header." % list_tag)
+        return [read_item() for _ in range(count)]
+
+    def read_attribute(self):
+        name = self.read_name()
+        dtype = NC_TYPES[self.read_int()]
+        count = self.read_int()
+        raw = self.read(count * dtype.itemsize)
+        self.read(-len(raw) % 4)
+        if dtype.char == "S":
+            value = raw.rstrip("\x00")
+        else:
+            value = numpy.frombuffer(raw, dtype=dtype)\
+                         .astype(dtype.newbyteorder("="))
+            if count == 1:
+                value = value[0]
+        return name, value
+
+    def read_attributes(self):
+        return OrderedDict(self.read_list(NC_ATTRIBUTE, self.read_attribute))
+
+
+def _record_size(record_vars):
+    """
+    Return the number of bytes in each record. With a single record variable
+    its records are not padded.
+
+    """
+    if len(record_vars) == 1:
+        _, shape, dtype, _, _ = record_vars[0]
+        return int(numpy.prod(shape[1:])) * dtype.itemsize
+    return sum(var[3] for var in record_vars)
+
+def _read_netcdf3(buf):
+    """
+    Read a NetCDF3 file held in buf (a string or a uint8 array) without
+    copying the variables' data.
+
+    """
+    parser = _HeaderParser(buf)
+    magic = parser.read(4)
+    if magic[:3] != "CDF" or magic[3] not in "\x01\x02":
+        raise ValueError("Not a NetCDF3 file.")
+    offset_size = 8 if magic[3] == "\x02" else 4
+    num_records = parser.read_int()
+    dims = parser.read_list(NC_DIMENSION,
+                            lambda: (parser.read_name(), parser.read_int()))
+    attributes = parser.read_attributes()
+
+    def read_var():
+        name = parser.read_name()
+        dim_ids = [parser.read_int() for _ in range(parser.read_int())]
+        var_attrs = parser.read_attributes()
+        dtype = NC_TYPES[parser.read_int()]
+        vsize = parser.read_int()
+        begin = parser.read_offset(offset_size)
+        return name, dim_ids, var_attrs, dtype, vsize, begin
+    var_headers = parser.read_list(NC_VARIABLE, read_var)
+
+    dimensions = OrderedDict((name, num_records if length == 0 else length)
+                             for name, length in dims)
+    record_vars = []
+    for name, dim_ids, _, dtype, vsize, begin in var_headers:
+        if dim_ids and dims[dim_ids[0]][1] == 0:
+            shape = tuple(dimensions[dims[i][0]] for i in dim_ids)
+            record_vars.append((name, shape, dtype, vsize, begin))
+    record_size = _record_size(record_vars)
+
+    variables = OrderedDict()
+    for name, dim_ids, var_attrs, dtype, vsize, begin in var_headers:
+        dim_names = tuple(dims[i][0] for i in dim_ids)
+        shape = tuple(dimensions[dim] for dim in dim_names)
+        strides = None
+        if dim_ids and dims[dim_ids[0]][1] == 0:
+            # Records of each variable are interleaved.
+            strides = (record_size,) + \
+                      numpy.empty(shape[1:], dtype).strides
+        data = numpy.ndarray(shape, dtype=dtype, buffer=buf, offset=begin,
+                             strides=strides)
+        variables[name] = Variable(name, dim_names, var_attrs, data)
+    return Dataset(dimensions, variables, attributes)
+
+def _read_netcdf4(path=None, content=None):
+    """
+    Read a NetCDF4 file with the netCDF4 package.
+
+    """
+    try:
+        import netCDF4
+    except ImportError:
+        raise ValueError("The netCDF4 package is needed to read NetCDF4 "\
+                         "responses.")
+    if path is not None:
+        nc_file = netCDF4.Dataset(path)
+    else:
+        nc_file = netCDF4.Dataset("response.nc", memory=content)
+    try:
+        nc_file.set_auto_maskandscale(False)
+        dimensions = OrderedDict((name, len(dim))
+                                 for name, dim in nc_file.dimensions.items())
+        variables = OrderedDict()
+        for name, var in nc_file.variables.items():
+            attrs = OrderedDict((attr, var.getncattr(attr))
+                                for attr in var.ncattrs())
+            variables[name] = Variable(name, var.dimensions, attrs,
+                                       numpy.asarray(var[...]))
+        attributes = OrderedDict((attr, nc_file.getncattr(attr))
+                                 for attr in nc_file.ncattrs())
+    finally:
+        nc_file.close()
+    return Dataset(dimensions, variables, attributes)
+
+def read_bytes(content):
+    """
+    Read a NetCDF file from the body of a response.
+
+    Args:
+
+    * content: string, bytearray or memoryview
+
+    returns:
+        Dataset
+
+    """
+    if isinstance(content, memoryview):
+        # A uint8 view of the same memory, which numpy can use as a buffer.
+        content = numpy.asarray(content)
+    magic = content[:4]
+    if isinstance(magic, numpy.ndarray):
+        magic = magic.tostring()
+    if magic == HDF5_MAGIC:
+        if isinstance(content, numpy.ndarray):
+            content = content.tostring()
+        return _read_netcdf4(content=str(content))
+    return _read_netcdf3(content)
+
+def read_file(path):
+    """
+    Read a saved NetCDF file. NetCDF3 files are memory mapped, so only the
+    parts used are read from disk.
+
+    Args:
+
+    * path: string
+
+    returns:
+        Dataset
+
+    """
+    with open(path, "rb") as infile:
+        magic = infile.read(4)
+    if magic == HDF5_MAGIC:
+        return _read_netcdf4(path=path)
+    return _read_netcdf3(numpy.memmap(path, dtype=numpy.uint8, mode="r"))
+
+def read_response(response, savepath=None):
+    """
+    Read a NetCDF getCoverage response, from savepath if it was saved.
+
+    returns:
+        Dataset
+
+    """
+    if savepath:
+        return read_file(savepath)
+    return read_bytes(response.content)
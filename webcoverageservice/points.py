@@ -0,0 +1,92 @@
+"""
+Module for extracting the values of a coverage at many points, grouping
+nearby points so they share a getCoverage request.
+
+NumPy is needed to use this module.
+
+"""
+import numpy
+
+def cluster_points(points, max_span=1.0, buffer=0.1):
+    """
+    Group points into clusters, each of which fits within a square of side
+    max_span (the squares being a fixed grid from 0, 0).
+
+    Args:
+
+    * points: list of (x, y) pairs
+        e.g. (longitude, latitude).
+
+    Kwargs:
+
+    * max_span: float
+        The largest width or height of a cluster.
+
+    * buffer: float
+        How far each cluster's bbox reaches beyond its outermost points, so
+        the grid cells around the points are included.
+
+    returns:
+        list of (numpy.ndarray of the indexes of the points in the cluster,
+        bbox of the cluster) pairs
+
+    """
+    points = numpy.asarray(points, dtype=float).reshape(-1, 2)
+    if max_span <= 0:
+        raise ValueError("max_span must be positive.")
+    cells = numpy.floor(points / max_span).astype(int)
+    clusters = {}
+    for index, cell in enumerate(map(tuple, cells)):
+        clusters.setdefault(cell, []).append(index)
+    result = []
+    for cell in sorted(clusters):
+        indexes = numpy.array(clusters[cell])
+        members = points[indexes]
+        mins = members.min(axis=0) - buffer
+        maxs = members.max(axis=0) + buffer
+        result.append((indexes, [mins[0], mins[1], maxs[0], maxs[1]]))
+    return result
+
+def _nearest(coord, values):
+    """
+    Return the index of the nearest coordinate point to each value.
+
+    """
+    return numpy.abs(coord[numpy.newaxis, :] -
+                     values[:, numpy.newaxis]).argmin(axis=1)
+
+def sample_points(dataset, variable, points):
+    """
+    Return the variable's values in the grid cells nearest the points. The
+    last two dimensions of the variable must be (y, x) with coordinate
+    variables, any others must have length 1.
+
+    Args:
+
+    * dataset: netcdf.Dataset
+
+    * variable: string
+
+    * points: numpy.ndarray
+        (x, y) pairs.
+
+    returns:
+        numpy.ndarray of floats, NaN where there is no value.
+
+    """
+    var = dataset.variables[variable]
+    coords = dataset.coordinates(variable)
+    y_dim, x_dim = var.dimensions[-2:]
+    if y_dim not in coords or x_dim not in coords:
+        raise UserWarning("%s has no coordinates to sample points with."
+                          % variable)
+    values = var.decode()
+    if values.ndim > 2:
+        if any(size != 1 for size in values.shape[:-2]):
+            raise UserWarning("%s has more than one value per grid cell, "\
+                              "shape %s." % (variable, values.shape))
+        values = values.reshape(values.shape[-2:])
+    rows = _nearest(coords[y_dim], points[:, 1])
+    cols = _nearest(coords[x_dim], points[:, 0])
+    sampled = values[rows, cols]
+    return numpy.ma.filled(sampled.astype(float), numpy.nan)
@@ -3,7 +3,8 @@ Module containing functions for reading XML responses from WCS1 requests.
 
 """
 from webcoverageservice.readers.xml_reader import get_elements, \
-                                                  get_elements_text, read_xml
+                                                  get_elements_text, \
+                                                  iter_elements, read_xml
 from webcoverageservice.coverage import Coverage, CoverageList
 
 def read_getCapabilities_res(xml_str):
@@ -23,6 +24,23 @@ def read_getCapabilities_res(xml_str):
     reader = CapabilitiesReader(xml_str)
     return reader.get_coverages()
 
+def read_getCapabilities_stream(source):
+    """
+    As read_getCapabilities_res, but the xml is read incrementally from a
+    file-like object (e.g. the raw stream of a response) so the whole
+    document is never held in memory.
+
+    Args:
+
+    * source: file-like object
+
+    returns
+        CoverageList
+
+    """
+    reader = StreamingCapabilitiesReader(source)
+    return CoverageList(list(reader.iter_coverages()))
+
 def read_describeCoverage_res(xml_str):
     """
     Extract coverage information from xml (given as string) returned by
@@ -40,6 +58,24 @@ def read_describeCoverage_res(xml_str):
     reader = CoverageReader(xml_str)
     return reader.get_coverage()
 
+def read_describeCoverages_res(xml_str):
+    """
+    Extract the information of every coverage from xml (given as string)
+    returned by a describeCoverage request for many coverages and return as
+    CoverageList object.
+
+    Args:
+
+    * xml_str: string
+        The xml as a string.
+
+    returns
+        CoverageList
+
+    """
+    reader = CoverageListReader(xml_str)
+    return reader.get_coverages()
+
 class ResponseReader(object):
     """
     Read XML returned from WCS1.
@@ -72,19 +108,44 @@ class CapabilitiesReader(ResponseReader):
     Read getCapabilities response.
 
     """
-    def get_coverages(self):
-        cov_elems = get_elements("ContentMetadata/CoverageOffering", self.root,
+    coverages_path = "ContentMetadata/CoverageOffering"
+    # A response to a request for just the ContentMetadata section has it as
+    # the root element.
+    coverages_root_paths = {"ContentMetadata" : "CoverageOffering"}
+
+    def _get_coverage(self, cov_elem):
+        name = get_elements_text("name", cov_elem, single_elem=True,
                                  namespace=self.xmlns)
-        coverages = []
-        for cov_elem in cov_elems:
-            name = get_elements_text("name", cov_elem, single_elem=True,
-                                     namespace=self.xmlns)
-            label = get_elements_text("label", cov_elem, single_elem=True,
-                                      namespace=self.xmlns)
-            bbox = self._get_bbox(cov_elem, namespace=self.xmlns)
-            coverages.append(Coverage(name=name, label=label, bbox=bbox))
+        label = get_elements_text("label", cov_elem, single_elem=True,
+                                  namespace=self.xmlns)
+        bbox = self._get_bbox(cov_elem, namespace=self.xmlns)
+        return Coverage(name=name, label=label, bbox=bbox)
+
+    def get_coverages(self):
+        path = self.coverages_root_paths.get(self.root.tag.split("}")[-1],
+                                             self.coverages_path)
+        cov_elems = get_elements(path, self.root, namespace=self.xmlns)
+        return CoverageList([self._get_coverage(cov_elem)
+                             for cov_elem in cov_elems])
+
+class StreamingCapabilitiesReader(CapabilitiesReader):
+    """
+    Read getCapabilities response incrementally from a file-like object.
+
+    """
+    def __init__(self, source):
+        self.source = source
+        self.xmlns  = "http://www.opengis.net/wcs"
+
+    def iter_coverages(self):
+        """
+        Yield each Coverage as soon as its element has been read.
 
-        return CoverageList(coverages)
+        """
+        for cov_elem in iter_elements(self.source, self.coverages_path,
+                                      namespace=self.xmlns,
+                                      root_paths=self.coverages_root_paths):
+            yield self._get_coverage(cov_elem)
 
 class CoverageReader(ResponseReader):
     """
@@ -98,6 +159,18 @@ class CoverageReader(ResponseReader):
         self.root = get_elements("CoverageOffering", self.root,
                                  single_elem=True, namespace=self.xmlns)
 
+    @classmethod
+    def from_element(cls, cov_elem):
+        """
+        Create a reader for a CoverageOffering element which has already
+        been read.
+
+        """
+        reader = cls.__new__(cls)
+        reader.xmlns = "http://www.opengis.net/wcs"
+        reader.root  = cov_elem
+        return reader
+
     def _get_values(self, root, namespace=None):
         """
         Values are given under the element path "values/singleValue". Given a root
@@ -219,3 +292,14 @@ class CoverageReader(ResponseReader):
                         dim_forecasts=dim_fcsts, times=times,
                         elevations=elevations, CRSs=CRSs, formats=formats,
                         interpolations=interps)
+
+class CoverageListReader(ResponseReader):
+    """
+    Read describeCoverage response containing any number of coverages.
+
+    """
+    def get_coverages(self):
+        cov_elems = get_elements("CoverageOffering", self.root,
+                                 namespace=self.xmlns)
+        return CoverageList([CoverageReader.from_element(elem).get_coverage()
+                             for elem in cov_elems])
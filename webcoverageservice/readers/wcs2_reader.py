@@ -4,7 +4,8 @@ Module containing functions for reading XML responses from WCS2 requests.
 """
 from webcoverageservice.readers.xml_reader import get_elements, \
                                                   get_elements_text, \
-                                                  get_elements_attr, read_xml
+                                                  get_elements_attr, \
+                                                  iter_elements, read_xml
 from webcoverageservice.coverage import Coverage, CoverageList, \
                                         CoverageCollection
 
@@ -25,6 +26,41 @@ def read_getCapabilities_res(xml_str):
     reader = CapabilitiesReader(xml_str)
     return reader.get_coverages()
 
+def read_getCapabilities_stream(source):
+    """
+    As read_getCapabilities_res, but the xml is read incrementally from a
+    file-like object (e.g. the raw stream of a response) so the whole
+    document is never held in memory.
+
+    Args:
+
+    * source: file-like object
+
+    returns
+        CoverageList
+
+    """
+    reader = StreamingCapabilitiesReader(source)
+    return CoverageList(list(reader.iter_coverages()))
+
+def read_getCoverageCollections_res(xml_str):
+    """
+    Extract all coverage collection information from xml (given as string)
+    returned by getCapabilities request and return as a list of
+    CoverageCollection objects.
+
+    Args:
+
+    * xml_str: string
+        The xml as a string.
+
+    returns
+        list of CoverageCollection
+
+    """
+    reader = CapabilitiesReader(xml_str)
+    return reader.get_coverage_collections()
+
 def read_describeCoverageCollection_res(xml_str):
     """
     Extract coverage collection information from xml (given as string) returned
@@ -59,6 +95,24 @@ def read_describeCoverage_res(xml_str):
     reader = CoverageReader(xml_str)
     return reader.get_coverage()
 
+def read_describeCoverages_res(xml_str):
+    """
+    Extract the information of every coverage from xml (given as string)
+    returned by a describeCoverage request for many coverage IDs and return as
+    CoverageList object.
+
+    Args:
+
+    * xml_str: string
+        The xml as a string.
+
+    returns
+        CoverageList
+
+    """
+    reader = CoverageListReader(xml_str)
+    return reader.get_coverages()
+
 
 class ResponseReader(object):
     """
@@ -66,7 +120,10 @@ class ResponseReader(object):
 
     """
     def __init__(self, xml_str):
-        self.root     = read_xml(xml_str)
+        self.root = read_xml(xml_str)
+        self._set_namespaces()
+
+    def _set_namespaces(self):
         self.ows      = "http://www.opengis.net/ows/2.0"
         self.wcs      = "http://www.opengis.net/wcs/2.0"
         self.metocean = "http://def.wmo.int/metce/2013/metocean"
@@ -110,34 +167,43 @@ class CapabilitiesReader(ResponseReader):
     Read getCapabilities response.
 
     """
+    # Any section of the document may have been left out of the response
+    # (see the sections argument of getCapabilities) so missing sections are
+    # treated as empty.
+
+    def _get_operation_elems(self):
+        return get_elements("OperationsMetadata/Operation", self.root,
+                            namespace=self.ows)
+
     def get_address(self):
-        op_meta_elem = get_elements("OperationsMetadata", self.root,
-                                    single_elem=True, namespace=self.ows)
-        op_elems = get_elements("Operation", op_meta_elem, namespace=self.ows)
+        op_elems = self._get_operation_elems()
+        if not op_elems:
+            return None
         # Just use firt element.
         get_elem = get_elements("DCP/HTTP/Get", op_elems[0], single_elem=True,
                                 namespace=self.ows)
         return get_elements_attr("href", get_elem, namespace=self.xlink)
 
     def get_operations(self):
-        op_meta_elem = get_elements("OperationsMetadata", self.root,
-                                    single_elem=True, namespace=self.ows)
-        op_elems = get_elements("Operation", op_meta_elem, namespace=self.ows)
+        op_elems = self._get_operation_elems()
         operations = [elem.attrib["name"] for elem in op_elems]
         return operations
 
     def get_coverage_ids(self):
-        contents_elem = get_elements("Contents", self.root, single_elem=True,
-                                     namespace=self.wcs)
-        return get_elements_text("CoverageSummary/CoverageId", contents_elem,
-                                 namespace=self.wcs)
+        if not get_elements("Contents/CoverageSummary", self.root,
+                            namespace=self.wcs):
+            return []
+        return get_elements_text("Contents/CoverageSummary/CoverageId",
+                                 self.root, namespace=self.wcs)
 
     def _get_collection_summary_elems(self):
-        extension_elem = get_elements("Contents/Extension", self.root,
-                                      single_elem=True, namespace=self.wcs)
-        col_summary_elems = get_elements("CoverageCollectionSummary",
-                                         extension_elem,
-                                         namespace=self.metocean)
+        extension_elems = get_elements("Contents/Extension", self.root,
+                                       namespace=self.wcs)
+        col_summary_elems = []
+        for extension_elem in extension_elems:
+            col_summary_elems += get_elements("CoverageCollectionSummary",
+                                              extension_elem,
+                                              namespace=self.metocean)
         return col_summary_elems
 
     def _get_collection_id(self, col_elem):
@@ -167,6 +233,28 @@ class CapabilitiesReader(ResponseReader):
                                                       col_ref_times))
         return cov_collections
 
+class StreamingCapabilitiesReader(CapabilitiesReader):
+    """
+    Read getCapabilities response incrementally from a file-like object.
+
+    """
+    def __init__(self, source):
+        self.source = source
+        self._set_namespaces()
+
+    def iter_coverages(self):
+        """
+        Yield each Coverage as soon as its CoverageSummary element has been
+        read.
+
+        """
+        for summary_elem in iter_elements(self.source,
+                                          "Contents/CoverageSummary",
+                                          namespace=self.wcs):
+            yield Coverage(get_elements_text("CoverageId", summary_elem,
+                                             single_elem=True,
+                                             namespace=self.wcs))
+
 class CollectionReader(ResponseReader):
     """
     Read getCoverageCollection response.
@@ -213,44 +301,88 @@ class CoverageReader(ResponseReader):
     """
     Read describeCoverage response.
 
+    The components, reference time and CRSs all come from the
+    MetOceanCoverageMetadata extension, which is walked once (when the first
+    of them is asked for) and the results kept for the others.
+
     """
+    # (components, SourceObservation elements) once the metadata is read.
+    _metadata = None
+
     def __init__(self, xml_str):
         super(CoverageReader, self).__init__(xml_str)
         # Describe coverage XML only contains one coverage description.
         self.root = get_elements("CoverageDescription", self.root,
                                  single_elem=True, namespace=self.wcs)
 
+    @classmethod
+    def from_element(cls, desc_elem):
+        """
+        Create a reader for a CoverageDescription element which has already
+        been read.
+
+        """
+        reader = cls.__new__(cls)
+        reader._set_namespaces()
+        reader.root = desc_elem
+        return reader
+
     def get_coverage_name(self):
         return get_elements_text("CoverageId", self.root, single_elem=True,
                                  namespace=self.wcs)
 
-    def get_components(self):
-        components = []
+    def _read_metadata(self):
+        """
+        Walk the children of each MetOceanCoverageMetadata element once,
+        picking out the component names and the SourceObservation elements.
+
+        returns:
+            tuple of (list of strings, list of
+            xml.etree.ElementTree.Element)
+
+        """
+        if self._metadata is not None:
+            return self._metadata
         extension_elem = get_elements("metadata/Extension", self.root,
                                       single_elem=True, namespace=self.gmlcov)
-        member_list_elems = get_elements("extensionProperty/"\
-                                         "MetOceanCoverageMetadata/"\
-                                         "dataMaskReferenceProperty/"\
-                                         "DataMaskReferenceMemberList/"\
-                                         "dataMaskReference",
-                                         extension_elem,
-                                         namespace=self.metocean)
-        for elem in member_list_elems:
-            components.append(get_elements_attr("fieldName", elem))
-        return components
+        mask_ref_tag = "{%s}dataMaskReferenceProperty" % self.metocean
+        source_obs_tag = "{%s}sourceObservationProperty" % self.metocean
+        components = []
+        source_obs_elems = []
+        for metadata_elem in get_elements("extensionProperty/"\
+                                          "MetOceanCoverageMetadata",
+                                          extension_elem,
+                                          namespace=self.metocean):
+            for child in metadata_elem:
+                if child.tag == mask_ref_tag:
+                    for elem in get_elements("DataMaskReferenceMemberList/"\
+                                             "dataMaskReference", child,
+                                             namespace=self.metocean):
+                        components.append(get_elements_attr("fieldName",
+                                                            elem))
+                elif child.tag == source_obs_tag:
+                    source_obs_elems += get_elements("SourceObservation",
+                                                     child,
+                                                     namespace=self.metocean)
+        self._metadata = (components, source_obs_elems)
+        return self._metadata
+
+    def _get_source_observation(self):
+        source_obs_elems = self._read_metadata()[1]
+        if len(source_obs_elems) != 1:
+            raise UserWarning("Expected to find exactly 1 SourceObservation "\
+                              "element, but found {fnd} instead."\
+                              .format(fnd=len(source_obs_elems)))
+        return source_obs_elems[0]
+
+    def get_components(self):
+        return list(self._read_metadata()[0])
 
     def get_bbox(self):
         return self._get_bbox(self.root, namespace=self.gml)
 
     def get_ref_time(self):
-        extension_elem = get_elements("metadata/Extension", self.root,
-                                      single_elem=True, namespace=self.gmlcov)
-        source_obs_elem = get_elements("extensionProperty/"\
-                                       "MetOceanCoverageMetadata/"\
-                                       "sourceObservationProperty/"\
-                                       "SourceObservation", extension_elem,
-                                       single_elem=True,
-                                       namespace=self.metocean)
+        source_obs_elem = self._get_source_observation()
         value_elem = get_elements("parameter/NamedValue/value",
                                   source_obs_elem, single_elem=True,
                                   namespace=self.om)
@@ -258,14 +390,7 @@ class CoverageReader(ResponseReader):
                                  single_elem=True, namespace=self.gml)
 
     def get_crss(self):
-        extension_elem = get_elements("metadata/Extension", self.root,
-                                      single_elem=True, namespace=self.gmlcov)
-        source_obs_elem = get_elements("extensionProperty/"\
-                                       "MetOceanCoverageMetadata/"\
-                                       "sourceObservationProperty/"\
-                                       "SourceObservation", extension_elem,
-                                       single_elem=True,
-                                       namespace=self.metocean)
+        source_obs_elem = self._get_source_observation()
         intrst_elem = get_elements("featureOfInterest", source_obs_elem,
                                    single_elem=True, namespace=self.om)
         SF_spatial_elem = get_elements("SF_SpatialSamplingFeature",
@@ -289,3 +414,16 @@ class CoverageReader(ResponseReader):
         cov_crss   = self.get_crss()
         return Coverage(name=cov_name, components=components, bbox=cov_bbox,
                         CRSs=cov_crss, dim_runs=cov_ref_time)
+
+
+class CoverageListReader(ResponseReader):
+    """
+    Read describeCoverage response containing any number of coverage
+    descriptions.
+
+    """
+    def get_coverages(self):
+        desc_elems = get_elements("CoverageDescription", self.root,
+                                  namespace=self.wcs)
+        return CoverageList([CoverageReader.from_element(elem).get_coverage()
+                             for elem in desc_elems])
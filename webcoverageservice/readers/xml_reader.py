@@ -23,6 +23,83 @@ def read_xml(xml_str):
     check_xml(root, namespace=ERR_XMLNS)
     return root
 
+def iter_elements(source, path, namespace=None, root_paths=None):
+    """
+    Parse XML from a file-like object incrementally, yielding each element at
+    the given path (relative to the root element) as soon as it is complete.
+    Each yielded element is removed from the tree once it has been processed,
+    and every other element is cleared and removed as soon as it is complete
+    (unless it is within an element still to be yielded), so memory use does
+    not grow with the size of the document. An error response is detected in
+    the same way as read_xml.
+
+    Args:
+
+    * source: file-like object
+        Anything with a read method, e.g. the raw stream of a response.
+
+    * path: string
+        The path (in terms of nested elements) to the required elements.
+
+    Kwargs:
+
+    * namespace: string or None
+        The xml namespace for the given path.
+
+    * root_paths: dictionary or None
+        Paths to use instead of path when the root element has a given tag
+        (without its namespace), e.g. when the document is a single section
+        of a larger one.
+
+    returns:
+        generator of xml.etree.ElementTree.Element
+
+    """
+    path_tags = None
+    error_tag = "{%s}ExceptionReport" % ERR_XMLNS
+    # The stack of open elements, the root first.
+    stack = []
+    # The depth of the open element at the path, if any. Its descendants are
+    # kept until it is complete.
+    match_depth = None
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if path_tags is None:
+                path_tags = _path_tags(root_paths, elem.tag, path, namespace)
+            if match_depth is None and len(stack) == len(path_tags) + 1 and \
+               [child.tag for child in stack[1:]] == path_tags:
+                match_depth = len(stack)
+            continue
+        depth = len(stack)
+        stack.pop()
+        if not stack:
+            # The root element is complete, which only needs checking for an
+            # error response.
+            check_xml(elem, namespace=ERR_XMLNS)
+        elif stack[0].tag == error_tag:
+            # The whole (small) error response is kept for check_xml.
+            continue
+        elif depth == match_depth:
+            match_depth = None
+            yield elem
+            stack[-1].remove(elem)
+        elif match_depth is None:
+            elem.clear()
+            stack[-1].remove(elem)
+
+def _path_tags(root_paths, root_tag, path, namespace):
+    """
+    Return the tags of the path to use for a document with the given root.
+
+    """
+    if root_paths:
+        path = root_paths.get(root_tag.split("}")[-1], path)
+    path_tags = path.split("/")
+    if namespace:
+        path_tags = [add_namespace(tag, namespace) for tag in path_tags]
+    return path_tags
+
 def check_xml(root, namespace=None):
     """
     Check the XML is not the error response.
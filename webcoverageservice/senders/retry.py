@@ -0,0 +1,118 @@
+"""
+Retry requests which fail for transient reasons, e.g. the service being
+temporarily unavailable or a dropped connection.
+
+"""
+import random
+import time
+import requests
+
+class RetryPolicy(object):
+    """
+    Describes when and how often a request is retried. The wait before retry
+    n (counting from 0) is a random time between 0 and
+    min(backoff_cap, backoff_base * 2**n) seconds ("full jitter"), or exactly
+    that upper limit if jitter is False.
+
+    Kwargs:
+
+    * max_attempts: integer
+        The maximum number of times a request is sent, including the first.
+
+    * backoff_base: float
+        The wait in seconds before the first retry (before jitter).
+
+    * backoff_cap: float
+        The maximum wait in seconds before any retry.
+
+    * jitter: boolean
+        If True, randomise the waits so many clients do not retry in step.
+
+    * retry_statuses: list of integers
+        The HTTP status codes which are retried, e.g. add 403 if the service
+        reports being temporarily down with a 403.
+
+    * retry_errors: tuple of exception classes
+        The errors raised when sending which are retried.
+
+    * deadline: float or None
+        If given, no retry is started which would end its wait more than this
+        many seconds after the first attempt.
+
+    * sleep: callable
+        Called with the number of seconds to wait.
+
+    """
+    def __init__(self, max_attempts=3, backoff_base=0.5, backoff_cap=30.0,
+                 jitter=True, retry_statuses=(500, 502, 503, 504),
+                 retry_errors=(requests.ConnectionError, requests.Timeout),
+                 deadline=None, sleep=time.sleep):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.max_attempts   = max_attempts
+        self.backoff_base   = backoff_base
+        self.backoff_cap    = backoff_cap
+        self.jitter         = jitter
+        self.retry_statuses = retry_statuses
+        self.retry_errors   = retry_errors
+        self.deadline       = deadline
+        self.sleep          = sleep
+
+    def backoff(self, retry_num):
+        """
+        Return the number of seconds to wait before the given retry.
+
+        """
+        limit = min(self.backoff_cap, self.backoff_base * 2 ** retry_num)
+        if self.jitter:
+            return random.uniform(0, limit)
+        return limit
+
+    def send(self, send_func):
+        """
+        Call send_func (which takes no arguments and returns a
+        requests.Response) until it gives a response which should not be
+        retried, or there are no attempts (or time) left.
+
+        The number of retries made is set as the retries attribute of the
+        returned response, or of the error raised if the last attempt fails.
+        The last error raised by send_func (and retried) is set as the
+        retry_error attribute of the response, or None.
+
+        returns:
+            requests.Response
+
+        """
+        start = time.time()
+        retry_num = 0
+        last_error = None
+        while True:
+            last_attempt = retry_num + 1 >= self.max_attempts
+            try:
+                response = send_func()
+            except self.retry_errors, err:
+                if last_attempt:
+                    err.retries = retry_num
+                    raise
+                response = None
+                last_error = err
+            if response is not None:
+                if last_attempt or \
+                   response.status_code not in self.retry_statuses:
+                    response.retries = retry_num
+                    response.retry_error = last_error
+                    return response
+            wait = self.backoff(retry_num)
+            if self.deadline is not None and \
+               time.time() - start + wait > self.deadline:
+                if response is None:
+                    last_error.retries = retry_num
+                    raise last_error
+                response.retries = retry_num
+                response.retry_error = last_error
+                return response
+            if response is not None:
+                # Release the connection back to the pool.
+                response.close()
+            self.sleep(wait)
+            retry_num += 1
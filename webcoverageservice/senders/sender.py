@@ -2,9 +2,85 @@
 Send get and post requests, tailored for WCS requests.
 
 """
+import urllib
+from timeit import default_timer
 import requests
+from requests.adapters import HTTPAdapter
+from webcoverageservice.cache import make_request_key
 
-def send_get_request(requester, params={}, stream=False):
+def create_session(pool_connections=10, pool_maxsize=10, keep_alive=True):
+    """
+    Create a requests.Session with its own connection pool, so that
+    connections to the WCS can be reused between requests.
+
+    Kwargs:
+
+    * pool_connections: integer
+        The number of host connection pools to cache.
+
+    * pool_maxsize: integer
+        The maximum number of connections kept open per host.
+
+    * keep_alive: boolean
+        If False, connections are closed after every request.
+
+    returns:
+        requests.Session
+
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+def _send(requester, send_func, stream=False, timings=None,
+          request_bytes=0):
+    """
+    Send the request, retrying according to the requester's retry policy (if
+    it has one), and record the response in timings and the requester's
+    metrics (if given). The number of retries made and the last error are
+    kept as the requester's last_retry_count and last_error.
+
+    """
+    if timings is None:
+        metrics = None
+    else:
+        sent = default_timer()
+        # A requester with metrics always times its requests.
+        metrics = requester.metrics
+    if metrics is not None:
+        metrics.request_started(timings.operation, requester.version)
+    try:
+        if requester.retry_policy is None:
+            response = send_func()
+            response.retries = 0
+            response.retry_error = None
+        else:
+            response = requester.retry_policy.send(send_func)
+    except Exception, err:
+        requester.last_retry_count = getattr(err, "retries", 0)
+        requester.last_error = err
+        if metrics is not None:
+            metrics.request_finished(timings.operation, requester.version,
+                                     "error", requester.last_retry_count,
+                                     request_bytes)
+        raise
+    requester.last_retry_count = response.retries
+    requester.last_error = response.retry_error
+    if timings is not None:
+        timings.add_response(response, sent, stream)
+    if metrics is not None:
+        metrics.request_finished(timings.operation, requester.version,
+                                 response.status_code, response.retries,
+                                 request_bytes)
+    return response
+
+def send_get_request(requester, params={}, stream=False, headers=None,
+                     timings=None):
     """
     Add the given parameters to the existing parameters, send request and
     check response.
@@ -21,15 +97,27 @@ def send_get_request(requester, params={}, stream=False):
         If False (default), the response content will be immediately
         downloaded.
 
+    * headers: dictionary or None
+        Extra HTTP headers to send, e.g. a Range header.
+
+    * timings: timing.Timings or None
+        If given, the response time and size are recorded in it.
+
     returns:
         requests.response
 
     """
     params.update(requester.params)
-    response = requests.get(requester.url, params=params, stream=stream)
-    return response
-
-def send_post_request(requester, payload, params={}, stream=False):
+    def send():
+        return requester.session.get(requester.url, params=params,
+                                     stream=stream, headers=headers)
+    request_bytes = 0
+    if timings is not None and requester.metrics is not None:
+        request_bytes = len(urllib.urlencode(params))
+    return _send(requester, send, stream, timings, request_bytes)
+
+def send_post_request(requester, payload, params={}, stream=False,
+                      headers=None, timings=None):
     """
     Add the given parameters to the existing parameters, send request with
     payload and check response.
@@ -49,12 +137,65 @@ def send_post_request(requester, payload, params={}, stream=False):
         If False (default), the response content will be immediately
         downloaded.
 
+    * headers: dictionary or None
+        Extra HTTP headers to send, e.g. a Range header.
+
+    * timings: timing.Timings or None
+        If given, the response time and size are recorded in it.
+
     returns:
         requests.response
 
     """
     params.update(requester.params)
-    response = requests.post(requester.url, data=payload, params=params,
-                             stream=stream,
-                             headers={'Content-Type': 'application/xml'})
+    post_headers = {'Content-Type': 'application/xml'}
+    if headers:
+        post_headers.update(headers)
+    def send():
+        return requester.session.post(requester.url, data=payload,
+                                      params=params, stream=stream,
+                                      headers=post_headers)
+    return _send(requester, send, stream, timings, len(payload))
+
+def send_cached_request(requester, operation, request, send_func):
+    """
+    Return the response from the requester's response cache if there is one,
+    otherwise send the request with send_func and cache a successful
+    response.
+
+    Args:
+
+    * requester: wcs.Requester
+
+    * operation: string
+        The name of the operation, e.g. "getCoverage".
+
+    * request: GetCoverageRequest, dictionary or string
+        The request, used to make the cache key (see
+        cache.make_request_key).
+
+    * send_func: callable
+        Takes no arguments, sends the request and returns the response.
+
+    returns:
+        requests.response or cache.CachedResponse
+
+    """
+    cache = requester.response_cache
+    if cache is None or not cache.caches(operation):
+        return send_func()
+    key = make_request_key(requester.url, request)
+    response = cache.get(operation, key)
+    if response is not None:
+        requester.last_retry_count = 0
+        requester.last_error = None
+        return response
+    response = send_func()
+    # XML responses to getCoverage are errors, which must not be cached.
+    if response.status_code == 200 and \
+       "xml" not in response.headers.get("content-type", ""):
+        retries = response.retries
+        response = cache.put(operation, key, response)
+        response.retries = retries
+        response.from_cache = False
     return response
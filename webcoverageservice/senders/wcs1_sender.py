@@ -5,17 +5,47 @@ Send WCS1 requests.
 from webcoverageservice.builders.wcs1_builder import \
      build_getCapabilities_req,                      \
      build_describeCoverage_req,                     \
-     build_getCoverage_req
-from webcoverageservice.senders.sender import send_get_request
+     build_getCoverage_req,                          \
+     make_getCoverage_request,                       \
+     batch_coverage_ids
+from webcoverageservice.senders.sender import send_get_request, \
+                                              send_cached_request
+from webcoverageservice.timing import timed
 
-def send_getCapabilities_req(requester):
-    payload = build_getCapabilities_req()
-    return send_get_request(requester, payload)
+def send_getCapabilities_req(requester, stream=False, sections=None,
+                             timings=None):
+    payload = timed(timings, "build", build_getCapabilities_req, sections)
+    return send_get_request(requester, payload, stream=stream,
+                            timings=timings)
 
-def send_describeCoverage_req(requester, coverage_id):
-    payload = build_describeCoverage_req(coverage_id)
-    return send_get_request(requester, payload)
+def send_describeCoverage_req(requester, coverage_id, timings=None):
+    payload = timed(timings, "build", build_describeCoverage_req,
+                    coverage_id)
+    return send_get_request(requester, payload, timings=timings)
 
-def send_getCoverage_req(requester, coverage_id, stream=False, **kwargs):
-    payload = build_getCoverage_req(coverage_id, **kwargs)
-    return send_get_request(requester, payload, stream=stream)
+def send_describeCoverages_req(requester, coverage_ids, timings=None):
+    payload = timed(timings, "build", build_describeCoverage_req,
+                    coverage_ids)
+    return send_get_request(requester, payload, timings=timings)
+
+def _build_getCoverage_req(coverage_id, **kwargs):
+    """
+    Build the request from the parameters as given. They are also normalised
+    as a GetCoverageRequest, which only keys the response cache so that
+    equivalent requests share an entry.
+
+    """
+    request = make_getCoverage_request(coverage_id, **kwargs)
+    return request, build_getCoverage_req(coverage_id, **kwargs)
+
+def send_getCoverage_req(requester, coverage_id, stream=False, headers=None,
+                         timings=None, **kwargs):
+    request, payload = timed(timings, "build", _build_getCoverage_req,
+                             coverage_id, **kwargs)
+    def send():
+        return send_get_request(requester, payload, stream=stream,
+                                headers=headers, timings=timings)
+    if headers:
+        # Partial (e.g. Range) requests are not cached.
+        return send()
+    return send_cached_request(requester, "getCoverage", request, send)
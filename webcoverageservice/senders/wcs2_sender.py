@@ -6,29 +6,60 @@ from webcoverageservice.builders.wcs2_builder import \
      build_getCapabilities_req,                      \
      build_describeCoverageCollection_req,           \
      build_describeCoverage_req,                     \
-     build_getCoverage_req
+     build_getCoverage_req,                          \
+     make_getCoverage_request,                       \
+     batch_coverage_ids
 from webcoverageservice.senders.sender import send_get_request, \
-                                              send_post_request
+                                              send_post_request, \
+                                              send_cached_request
+from webcoverageservice.timing import timed
 
-def send_getCapabilities_req(requester):
-    params = build_getCapabilities_req()
-    return send_get_request(requester, params)
+def send_getCapabilities_req(requester, stream=False, sections=None,
+                             timings=None):
+    params = timed(timings, "build", build_getCapabilities_req, sections)
+    return send_get_request(requester, params, stream=stream,
+                            timings=timings)
 
-def send_describeCoverageCollection_req(requester, collection_id, ref_time):
-    params = build_describeCoverageCollection_req(collection_id, ref_time)
-    return send_get_request(requester, params)
+def send_describeCoverageCollection_req(requester, collection_id, ref_time,
+                                        timings=None):
+    params = timed(timings, "build", build_describeCoverageCollection_req,
+                   collection_id, ref_time)
+    return send_get_request(requester, params, timings=timings)
 
-def send_describeCoverage_req(requester, coverage_id):
-    payload = build_describeCoverage_req(coverage_id)
-    return send_post_request(requester, payload)
+def send_describeCoverage_req(requester, coverage_id, timings=None):
+    payload = timed(timings, "build", build_describeCoverage_req,
+                    coverage_id)
+    return send_post_request(requester, payload, timings=timings)
+
+def send_describeCoverages_req(requester, coverage_ids, timings=None):
+    payload = timed(timings, "build", build_describeCoverage_req,
+                    coverage_ids)
+    return send_post_request(requester, payload, timings=timings)
+
+def _build_getCoverage_req(coverage_id, components, **kwargs):
+    """
+    Build the request from the parameters as given. They are also normalised
+    as a GetCoverageRequest, which only keys the response cache so that
+    equivalent requests share an entry.
+
+    """
+    request = make_getCoverage_request(coverage_id, components, **kwargs)
+    return request, build_getCoverage_req(coverage_id, components, **kwargs)
 
 def send_getCoverage_req(requester, coverage_id, components, stream=False,
-                         **kwargs):
+                         headers=None, timings=None, **kwargs):
     savepath_xml_req = kwargs.pop("savepath_xml_req")
-    payload = build_getCoverage_req(coverage_id, components, **kwargs)
+    request, payload = timed(timings, "build", _build_getCoverage_req,
+                             coverage_id, components, **kwargs)
 
     if savepath_xml_req is not None:
         with open(savepath_xml_req, 'w') as outfile:
             outfile.write(payload)
 
-    return send_post_request(requester, payload, stream=stream)
+    def send():
+        return send_post_request(requester, payload, stream=stream,
+                                 headers=headers, timings=timings)
+    if headers:
+        # Partial (e.g. Range) requests are not cached.
+        return send()
+    return send_cached_request(requester, "getCoverage", request, send)
@@ -0,0 +1,165 @@
+"""
+Module for putting the NetCDF responses to the tiles of a TilePlan (see
+tiling.py) back together into one array.
+
+NumPy is needed to use this module.
+
+"""
+import threading
+import numpy
+import numpy.lib.format
+from webcoverageservice import netcdf
+
+def read_tile(tile, response):
+    """
+    Read the NetCDF response to a tile, from its savepath if it was saved.
+
+    returns:
+        netcdf.Dataset
+
+    """
+    return netcdf.read_response(response, tile.kwargs.get("savepath"))
+
+def orient_grid(dataset, variable):
+    """
+    Return the variable's data with its last two (y, x) axes increasing
+    along their coordinates, so row 0 is at the y-min edge as in a TilePlan.
+
+    """
+    data = variable.data
+    for axis, dim in ((-2, variable.dimensions[-2]),
+                      (-1, variable.dimensions[-1])):
+        coord = dataset.variables.get(dim)
+        if coord is not None and coord.data.ndim == 1 and \
+           coord.data.shape[0] > 1 and coord.data[0] > coord.data[-1]:
+            index = [slice(None)] * data.ndim
+            index[axis] = slice(None, None, -1)
+            data = data[tuple(index)]
+    return data
+
+
+class Mosaic(object):
+    """
+    An array for the whole of a TilePlan, filled in tile by tile as responses
+    arrive. Each tile is decoded and written straight into the array so only
+    the tiles being written are held in memory.
+
+    The array has a leading time axis (one step for each time or
+    dim_forecast, or the times of the response if the request was not split
+    in time), then any other axes of the variable, then the (y, x) grid with
+    y increasing. It is made when the first tile arrives.
+
+    Args:
+
+    * plan: TilePlan
+
+    * variable: string
+        The name of the NetCDF variable to put together.
+
+    Kwargs:
+
+    * out: numpy.ndarray
+        Write into this array rather than making one.
+
+    * filename: string
+        Make the array as a memory mapped .npy file (see numpy.load) so it
+        need not fit in memory.
+
+    * fill_value: number
+        The value of cells no tile has been written to. The default is the
+        variable's _FillValue, or NaN for floats and 0 otherwise.
+
+    """
+    def __init__(self, plan, variable, out=None, filename=None,
+                 fill_value=None):
+        self.plan       = plan
+        self.variable   = variable
+        self.array      = out
+        self.filename   = filename
+        self.fill_value = fill_value
+        self.added      = set()
+        self._lock      = threading.Lock()
+        self._allocated = False
+
+        self._steps = [len(time_slice) if isinstance(time_slice, list) else 1
+                       for time_slice in plan.time_slices]
+        self._step_offsets = [sum(self._steps[:i])
+                              for i in range(len(self._steps))]
+        self._split_in_time = plan.time_slices != [None]
+
+    @property
+    def complete(self):
+        return len(self.added) == len(self.plan)
+
+    def _allocate(self, variable, data):
+        n_steps = sum(self._steps) if self._split_in_time else data.shape[0]
+        shape = (n_steps,) + data.shape[1:-2] + self.plan.grid_shape
+        dtype = data.dtype.newbyteorder("=")
+        if self.array is not None:
+            if self.array.shape != shape:
+                raise ValueError("out has shape %s, %s is needed."
+                                 % (self.array.shape, shape))
+            return
+        if self.filename:
+            self.array = numpy.lib.format.open_memmap(
+                             self.filename, mode="w+", dtype=dtype,
+                             shape=shape)
+        else:
+            self.array = numpy.empty(shape, dtype=dtype)
+        fill_value = self.fill_value
+        if fill_value is None:
+            fill_value = variable.attributes.get("_FillValue")
+        if fill_value is None:
+            fill_value = numpy.nan if dtype.kind == "f" else 0
+        self.array[...] = fill_value
+
+    def add(self, tile, response):
+        """
+        Write the response to a tile into the array. This may be called from
+        several threads at once.
+
+        Args:
+
+        * tile: Tile
+
+        * response: requests.Response
+            The getCoverage response for the tile. Not used if the tile was
+            saved to file.
+
+        """
+        dataset = read_tile(tile, response)
+        try:
+            variable = dataset.variables[self.variable]
+        except KeyError:
+            raise UserWarning("No %s variable in the response." %
+                              self.variable)
+        data = orient_grid(dataset, variable)
+        if data.ndim == 2:
+            data = data[numpy.newaxis]
+        if data.shape[-2:] != (tile.height, tile.width):
+            raise ValueError("Tile %s has %s grid cells, %s were expected."
+                             % ((tile.time_index, tile.row, tile.col),
+                                data.shape[-2:], (tile.height, tile.width)))
+        if self._split_in_time and \
+           data.shape[0] != self._steps[tile.time_index]:
+            raise ValueError("Tile %s has %s time steps, %s were expected."
+                             % ((tile.time_index, tile.row, tile.col),
+                                data.shape[0], self._steps[tile.time_index]))
+        with self._lock:
+            if not self._allocated:
+                self._allocate(variable, data)
+                self._allocated = True
+        step = self._step_offsets[tile.time_index]
+        self.array[step:step + data.shape[0], ...,
+                   tile.y_offset:tile.y_offset + tile.height,
+                   tile.x_offset:tile.x_offset + tile.width] = data
+        with self._lock:
+            self.added.add((tile.time_index, tile.row, tile.col))
+
+    def flush(self):
+        """
+        Write a memory mapped array out to its file.
+
+        """
+        if isinstance(self.array, numpy.memmap):
+            self.array.flush()
@@ -0,0 +1,228 @@
+"""
+Module for splitting getCoverage requests which are too large for a single
+response into tiles (parts of the bounding box) and time slices.
+
+The size of a request is estimated in grid cells from width/height, or from
+resx/resy and the bounding box. Tiles are laid out on that grid, with the
+bounding box taken as the outer edges of the cells, so each tile knows where
+its cells go in the full grid.
+
+"""
+import math
+import os
+from collections import namedtuple
+
+class Tile(namedtuple("Tile", ["time_index", "row", "col", "x_offset",
+                               "y_offset", "width", "height", "kwargs"])):
+    """
+    One getCoverage request of a TilePlan.
+
+    * time_index: integer
+        Index of the tile's time slice in TilePlan.time_slices.
+
+    * row, col: integers
+        Position of the tile among the tiles of its time slice. Row 0 is at
+        the y-min edge of the bounding box.
+
+    * x_offset, y_offset: integers
+        Number of grid cells between the x-min and y-min edges of the
+        bounding box and the tile.
+
+    * width, height: integers
+        Number of grid cells in the tile.
+
+    * kwargs: dictionary
+        getCoverage keyword arguments for the tile.
+
+    """
+    __slots__ = ()
+
+
+class TilePlan(object):
+    """
+    The tiles a getCoverage request is split into.
+
+    Args:
+
+    * tiles: list of Tiles
+        In order of time slice then row then column.
+
+    * time_slices: list
+        The time (or dim_forecast) value of each time slice.
+
+    * bbox: list
+        The bounding box of the whole request.
+
+    * grid_shape: tuple
+        The number of (y, x) grid cells in the whole request.
+
+    """
+    def __init__(self, tiles, time_slices, bbox, grid_shape):
+        self.tiles       = tiles
+        self.time_slices = time_slices
+        self.bbox        = bbox
+        self.grid_shape  = grid_shape
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __iter__(self):
+        return iter(self.tiles)
+
+    @property
+    def max_cells(self):
+        """
+        The largest number of cells in any one tile.
+
+        """
+        return max(tile.width * tile.height * self._slice_len(tile)
+                   for tile in self.tiles)
+
+    def _slice_len(self, tile):
+        time_slice = self.time_slices[tile.time_index]
+        return len(time_slice) if isinstance(time_slice, list) else 1
+
+
+def _split(length, size):
+    """
+    Return (offset, size) pairs covering length in pieces of at most size.
+
+    """
+    return [(offset, min(size, length - offset))
+            for offset in range(0, length, size)]
+
+def _grid_shape(bbox, width=None, height=None, resx=None, resy=None):
+    """
+    Return the number of (y, x) cells requested.
+
+    """
+    if width:
+        n_x = int(width)
+    elif resx:
+        n_x = int(math.ceil((bbox[2] - bbox[0]) / float(resx)))
+    else:
+        raise UserWarning("The size of the request can not be estimated, "\
+                          "give width or resx.")
+    if height:
+        n_y = int(height)
+    elif resy:
+        n_y = int(math.ceil((bbox[3] - bbox[1]) / float(resy)))
+    else:
+        raise UserWarning("The size of the request can not be estimated, "\
+                          "give height or resy.")
+    return max(n_y, 1), max(n_x, 1)
+
+def _time_slices(kwargs, times, steps_per_slice):
+    """
+    Return the time key of the request and the values of each time slice.
+
+    """
+    if isinstance(kwargs.get("dim_forecast"), list):
+        # WCS1 only takes one dim_forecast per request.
+        return "dim_forecast", kwargs["dim_forecast"]
+    if isinstance(kwargs.get("time"), list):
+        if times is None:
+            raise UserWarning("The times within the time range must be "\
+                              "given to split it.")
+        return "time", [times[i:i + steps_per_slice]
+                        for i in range(0, len(times), steps_per_slice)]
+    return None, [None]
+
+def plan_tiles(kwargs, max_cells=None, max_bytes=None, bytes_per_cell=4,
+               coverage_bbox=None, times=None):
+    """
+    Split a getCoverage request into tiles of at most max_cells grid cells
+    (or max_bytes bytes).
+
+    Whole time slices are kept together where they fit. Otherwise each tile
+    is a single time step and the bounding box is split into near square
+    tiles.
+
+    Args:
+
+    * kwargs: dictionary
+        The getCoverage keyword arguments for the whole request. The
+        bbox and width/height or resx/resy are needed to estimate its size.
+        A WCS1 dim_forecast may be a list, each is requested separately. A
+        WCS2 time may be a [start, end] range, see times.
+
+    Kwargs:
+
+    * max_cells: integer
+        The largest number of grid cells in a tile.
+
+    * max_bytes: integer
+        Alternative to max_cells, the largest tile in bytes.
+
+    * bytes_per_cell: integer
+        Used with max_bytes, the size of each value (4 for float32 data).
+
+    * coverage_bbox: list
+        The bounding box of the coverage (e.g. from describeCoverage) used if
+        kwargs has no bbox.
+
+    * times: list of strings
+        The times available within a WCS2 time range, so it can be split.
+
+    returns:
+        TilePlan
+
+    """
+    if max_cells is None:
+        if max_bytes is None:
+            raise UserWarning("Give max_cells or max_bytes.")
+        max_cells = max_bytes // bytes_per_cell
+    if max_cells < 1:
+        raise ValueError("Tiles must be allowed at least one cell.")
+    bbox = kwargs.get("bbox") or coverage_bbox
+    if not bbox:
+        raise UserWarning("No bbox given to split.")
+    bbox = [float(val) for val in bbox]
+    n_y, n_x = _grid_shape(bbox, kwargs.get("width"), kwargs.get("height"),
+                           kwargs.get("resx"), kwargs.get("resy"))
+
+    cells = n_x * n_y
+    if cells <= max_cells:
+        tile_w, tile_h = n_x, n_y
+        steps_per_slice = max_cells // cells
+    else:
+        tile_w = max(1, min(n_x, int(math.sqrt(max_cells))))
+        tile_h = max(1, min(n_y, max_cells // tile_w))
+        tile_w = max(1, min(n_x, max_cells // tile_h))
+        steps_per_slice = 1
+    time_key, time_slices = _time_slices(kwargs, times, steps_per_slice)
+
+    # With resx/resy the last column/row of cells may be cut by the bbox.
+    cell_x = (bbox[2] - bbox[0]) / n_x if kwargs.get("width") \
+             else float(kwargs["resx"])
+    cell_y = (bbox[3] - bbox[1]) / n_y if kwargs.get("height") \
+             else float(kwargs["resy"])
+    savepath = kwargs.get("savepath")
+    tiles = []
+    for time_index, time_slice in enumerate(time_slices):
+        for row, (y_offset, height) in enumerate(_split(n_y, tile_h)):
+            for col, (x_offset, width) in enumerate(_split(n_x, tile_w)):
+                tile_kwargs = dict(kwargs)
+                tile_kwargs["bbox"] = [
+                    bbox[0] + x_offset * cell_x,
+                    bbox[1] + y_offset * cell_y,
+                    min(bbox[2], bbox[0] + (x_offset + width) * cell_x),
+                    min(bbox[3], bbox[1] + (y_offset + height) * cell_y)]
+                if kwargs.get("width"):
+                    tile_kwargs["width"] = width
+                if kwargs.get("height"):
+                    tile_kwargs["height"] = height
+                if time_key == "time":
+                    tile_kwargs["time"] = [time_slice[0], time_slice[-1]] \
+                                          if len(time_slice) > 1 \
+                                          else time_slice[0]
+                elif time_key is not None:
+                    tile_kwargs[time_key] = time_slice
+                if savepath:
+                    root, ext = os.path.splitext(savepath)
+                    tile_kwargs["savepath"] = "%s_t%d_r%d_c%d%s" \
+                                              % (root, time_index, row, col,
+                                                 ext)
+                tiles.append(Tile(time_index, row, col, x_offset, y_offset,
+                                  width, height, tile_kwargs))
+    return TilePlan(tiles, time_slices, bbox, (n_y, n_x))
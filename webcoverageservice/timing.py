@@ -0,0 +1,231 @@
+"""
+Module for timing the stages of each request made by a requester.
+
+Functions registered with a requester's add_timing_hook method are called
+with a Timings record once each request is done. TimingStats is such a
+function which keeps the durations so their percentiles can be looked at.
+When no hooks are registered nothing is timed.
+
+"""
+import math
+import threading
+from collections import deque
+from timeit import default_timer
+
+PHASES = ["build", "ttfb", "download", "parse", "save", "total"]
+
+class Timings(object):
+    """
+    The durations (in seconds) of the stages of one request. A stage which
+    did not happen is None.
+
+    * operation: string
+        e.g. "getCoverage" or "describeCoverage".
+
+    * wcs_version: string
+        The WCS version of the requester, e.g. "2.0.0".
+
+    * build: float
+        Building the request (e.g. build_getCoverage_req).
+
+    * ttfb: float
+        From sending the request until its response headers were read, so
+        connecting (unless a pooled connection was reused), the server's
+        work and the time to first byte. Taken from requests' elapsed.
+
+    * download: float
+        Reading the response body into memory.
+
+    * parse: float
+        Reading the response (e.g. read_describeCoverage_res, or decoding a
+        NetCDF getCoverage response).
+
+    * save: float
+        Streaming the response body to savepath, so downloading it too.
+
+    * total: float
+        The whole operation.
+
+    * bytes: integer
+        The size of the response body.
+
+    * status_code: integer
+
+    * retries: integer
+        The number of retries made by the retry policy.
+
+    * from_cache: boolean
+        True if the response came from the response cache.
+
+    """
+    __slots__ = ["operation", "wcs_version", "start", "bytes", "status_code",
+                 "retries", "from_cache"] + PHASES
+
+    def __init__(self, operation, wcs_version=None):
+        self.operation = operation
+        self.wcs_version = wcs_version
+        self.start = default_timer()
+        for name in PHASES + ["bytes", "status_code", "retries"]:
+            setattr(self, name, None)
+        self.from_cache = False
+
+    def __repr__(self):
+        durations = ", ".join("%s=%.4f" % item
+                              for item in self.durations().items())
+        return "<Timings %s %s>" % (self.operation, durations)
+
+    def add(self, phase, seconds):
+        """
+        Add to the duration of a stage, which may happen more than once (e.g.
+        when a resumed download starts again).
+
+        """
+        current = getattr(self, phase)
+        setattr(self, phase, seconds if current is None
+                             else current + seconds)
+
+    def add_response(self, response, sent, stream=False):
+        """
+        Record the details of a response sent for at time sent (from
+        default_timer). If the body was not streamed, it has been read so the
+        time taken is also recorded as the download time.
+
+        """
+        seconds = default_timer() - sent
+        self.status_code = response.status_code
+        self.retries = getattr(response, "retries", None)
+        self.from_cache = getattr(response, "from_cache", False)
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None and not self.from_cache:
+            ttfb = elapsed.total_seconds()
+            self.add("ttfb", ttfb)
+            if not stream:
+                self.add("download", max(seconds - ttfb, 0.0))
+                self.bytes = len(response.content)
+
+    def durations(self):
+        """
+        returns:
+            dictionary of stage name to seconds, for the stages which
+            happened.
+
+        """
+        return dict((phase, getattr(self, phase)) for phase in PHASES
+                    if getattr(self, phase) is not None)
+
+
+def timed(timings, phase, func, *args, **kwargs):
+    """
+    Call func with the given arguments, adding the time taken to the phase
+    of timings unless timings is None.
+
+    """
+    if timings is None:
+        return func(*args, **kwargs)
+    started = default_timer()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings.add(phase, default_timer() - started)
+
+
+def _percentile(ordered, percent):
+    """
+    Return the nearest rank percentile of a sorted list.
+
+    """
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class TimingStats(object):
+    """
+    A timing hook which keeps the durations of each stage for each
+    operation. Register it with a requester's add_timing_hook method.
+
+    Kwargs:
+
+    * max_samples: integer
+        The number of most recent durations kept for each stage of each
+        operation, which the percentiles are taken from.
+
+    """
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self.counts      = {}
+        self.bytes       = {}
+        self._samples    = {}
+        self._lock       = threading.Lock()
+
+    def __call__(self, timings):
+        self.record(timings)
+
+    def record(self, timings):
+        """
+        Add the durations of a Timings record.
+
+        """
+        operation = timings.operation
+        with self._lock:
+            self.counts[operation] = self.counts.get(operation, 0) + 1
+            if timings.bytes is not None:
+                self.bytes[operation] = self.bytes.get(operation, 0) + \
+                                        timings.bytes
+            for phase, seconds in timings.durations().items():
+                key = (operation, phase)
+                samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = \
+                              deque(maxlen=self.max_samples)
+                samples.append(seconds)
+
+    def percentile(self, operation, phase, percent):
+        """
+        Return the percentile of the durations of a stage of an operation, or
+        None if there are none.
+
+        Args:
+
+        * operation: string
+
+        * phase: string
+            One of PHASES, e.g. "ttfb".
+
+        * percent: number
+            e.g. 95
+
+        """
+        with self._lock:
+            samples = sorted(self._samples.get((operation, phase), []))
+        if not samples:
+            return None
+        return _percentile(samples, percent)
+
+    def summary(self):
+        """
+        returns:
+            dictionary of operation to a dictionary with the "count" of
+            requests, "bytes" downloaded, and for each stage the "count",
+            "mean", "p50", "p95" and "p99" of its durations.
+
+        """
+        with self._lock:
+            samples = dict((key, sorted(values))
+                           for key, values in self._samples.items())
+            result = dict((operation, {"count" : count,
+                                       "bytes" : self.bytes.get(operation, 0)})
+                          for operation, count in self.counts.items())
+        for (operation, phase), ordered in samples.items():
+            result[operation][phase] = {
+                "count" : len(ordered),
+                "mean"  : sum(ordered) / len(ordered),
+                "p50"   : _percentile(ordered, 50),
+                "p95"   : _percentile(ordered, 95),
+                "p99"   : _percentile(ordered, 99)}
+        return result
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.bytes.clear()
+            self._samples.clear()